@@ -0,0 +1,140 @@
+"""
+Microbenchmark: training epochs per second with DataLoader vs. fastbatch.TensorBatcher.
+
+Trains the notebook's RegressionDNN with batch_size 32 three ways, from the same initial
+weights and with the same shuffling seed, so all three see the same batches:
+
+  dataloader    DataLoader(TensorDataset(X, y), shuffle=True) and loss.item() every step,
+                as the notebook's training loops used to do
+  batcher-item  TensorBatcher slices, still loss.item() every step
+  batcher       TensorBatcher slices and fastbatch.train_epoch: loss summed on the device,
+                read back once per epoch
+
+Usage (from the repository root; needs torch and numpy):
+    python benchmarks/bench_batching.py --epochs 20
+    python benchmarks/bench_batching.py --csv /content/covid.train.csv --device cuda
+
+Besides epochs/s it prints how far each variant's per-epoch loss curve is from the
+DataLoader loop's, which checks that summing the loss on the device changes nothing.
+
+Without --csv the data is random, shaped like covid.train.csv (2700 rows, 116 features).
+With --csv the first column (id) is dropped, the last is the target and features are standardized.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader, Sampler, TensorDataset
+
+from fastbatch import TensorBatcher, train_epoch
+from hpsearch import RegressionDNN
+
+
+def load_data(opts):
+    if opts.csv:
+        data = np.loadtxt(opts.csv, delimiter=',', skiprows=1, dtype=np.float32)
+        X, y = data[:, 1:-1], data[:, -1]
+        X = (X - X.mean(axis=0)) / np.where(X.std(axis=0) > 0, X.std(axis=0), 1)
+    else:
+        rng = np.random.default_rng(opts.seed)
+        X = rng.standard_normal((opts.rows, opts.features), dtype=np.float32)
+        y = (X[:, :8].sum(axis=1) + rng.standard_normal(opts.rows, dtype=np.float32)).astype(np.float32)
+    return torch.tensor(X), torch.tensor(y).reshape(-1, 1)
+
+
+class EpochPermutation(Sampler):
+    """
+    RandomSampler's order, one randperm per epoch, drawn from generator as TensorBatcher draws
+    it. (DataLoader(shuffle=True, generator=g) also takes a base seed from g each epoch, so its
+    batches would differ.)
+    """
+    def __init__(self, n: int, generator: torch.Generator):
+        self.n = n
+        self.generator = generator
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(torch.randperm(self.n, generator=self.generator).tolist())
+
+
+def dataloader_epoch(model, loader, loss_function, optimizer, device):
+    # The notebook's loop as it was
+    model.train()
+    total_loss = 0
+    for batch_X, batch_y in loader:
+        batch_X, batch_y = batch_X.to(device), batch_y.to(device)
+
+        outputs = model(batch_X)
+        loss = loss_function(outputs, batch_y)
+
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+
+        total_loss += loss.item()
+    return total_loss / len(loader)
+
+
+def measure(label, X, y, opts, device):
+    torch.manual_seed(opts.seed)
+    model = RegressionDNN(X.shape[1]).to(device)
+    optimizer = optim.Adam(model.parameters(), lr=0.001)
+    loss_function = nn.MSELoss()
+    generator = torch.Generator().manual_seed(opts.seed)
+    if label == 'dataloader':
+        loader = DataLoader(TensorDataset(X, y), batch_size=opts.batch_size,
+                            sampler=EpochPermutation(len(X), generator))
+        run = lambda: dataloader_epoch(model, loader, loss_function, optimizer, device)
+    else:
+        loader = TensorBatcher(X, y, batch_size=opts.batch_size, shuffle=True, device=device, generator=generator)
+        if label == 'batcher':
+            run = lambda: train_epoch(model, loader, loss_function, optimizer)
+        else:
+            run = lambda: dataloader_epoch(model, loader, loss_function, optimizer, device)
+    run()   # warm-up: allocator, kernels, first permutation
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    losses = [run() for _ in range(opts.epochs)]
+    elapsed = time.perf_counter() - start
+    return opts.epochs / elapsed, losses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--epochs', type=int, default=20, help='timed epochs per variant')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--csv', help='covid.train.csv instead of random data')
+    parser.add_argument('--rows', type=int, default=2700)
+    parser.add_argument('--features', type=int, default=116)
+    parser.add_argument('--device', default='cuda' if torch.cuda.is_available() else 'cpu')
+    parser.add_argument('--threads', type=int, help='torch intra-op threads (default: torch decides)')
+    parser.add_argument('--seed', type=int, default=0)
+    opts = parser.parse_args(argv)
+
+    if opts.threads:
+        torch.set_num_threads(opts.threads)
+    device = torch.device(opts.device)
+    X, y = load_data(opts)
+    print(f"{len(X)} rows x {X.shape[1]} features, batch_size={opts.batch_size}, device={device}, "
+          f"threads={torch.get_num_threads()}")
+    baseline = reference = None
+    for label in ('dataloader', 'batcher-item', 'batcher'):
+        rate, losses = measure(label, X, y, opts, device)
+        baseline, reference = baseline or rate, reference or losses
+        drift = max(abs(a - b) / b for a, b in zip(losses, reference))
+        print(f"{label:<13} epochs/s={rate:8.2f}  speedup={rate / baseline:5.2f}x  last epoch loss={losses[-1]:.6f}  "
+              f"max relative loss difference from dataloader={drift:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+-- Benchmark: row-level vs. compound triggers for bulk student deletes
+-- Run in SQL*Plus as the schema owner after loading sequence_triggers.sql:
+--     SQL> @benchmarks/bench_delete_students.sql
+-- Creates c_students throw-away students with c_per_student enrollments each, deletes them
+-- with one DELETE, and rolls back, once with the old FOR EACH ROW triggers and once with
+-- trg_g_enrollments_dml / trg_students_delete. Edit the constants below to change N and M.
+-- Reports elapsed time, SQL executions, logical reads and redo for the DELETE alone; the
+-- statistics come from v$mystat, so the user needs SELECT on v$mystat and v$statname.
+-- Note the trigger swaps are DDL and commit; nothing else is committed.
+
+SET SERVEROUTPUT ON
+SET FEEDBACK OFF
+SET DEFINE OFF
+
+-- The pre-compound triggers, created disabled under bench_ names so both versions can be
+-- timed against the same data.
+CREATE OR REPLACE TRIGGER bench_log_enrollment
+AFTER INSERT OR DELETE ON g_enrollments
+FOR EACH ROW
+DISABLE
+BEGIN
+    INSERT INTO logs(log#, user_name, op_time, table_name, operation, tuple_keyvalue)
+    VALUES (log_seq.NEXTVAL, USER, SYSDATE, 'G_ENROLLMENTS',
+            CASE WHEN INSERTING THEN 'insert' ELSE 'delete' END,
+            NVL(:NEW.g_B#, :OLD.g_B#) || ',' || NVL(:NEW.classid, :OLD.classid));
+END;
+/
+
+CREATE OR REPLACE TRIGGER bench_log_delete_student
+AFTER DELETE ON students
+FOR EACH ROW
+DISABLE
+BEGIN
+    INSERT INTO logs(log#, user_name, op_time, table_name, operation, tuple_keyvalue)
+    VALUES (log_seq.NEXTVAL, USER, SYSDATE, 'STUDENTS', 'delete', :OLD.B#);
+END;
+/
+
+CREATE OR REPLACE TRIGGER bench_update_class_size
+AFTER INSERT OR DELETE ON g_enrollments
+FOR EACH ROW
+DISABLE
+BEGIN
+    IF INSERTING THEN
+        UPDATE classes SET class_size = class_size + 1 WHERE classid = :NEW.classid;
+    ELSE
+        UPDATE classes SET class_size = class_size - 1 WHERE classid = :OLD.classid;
+    END IF;
+END;
+/
+
+CREATE OR REPLACE TRIGGER bench_cascade_delete_enrollments
+AFTER DELETE ON students
+FOR EACH ROW
+DISABLE
+BEGIN
+    DELETE FROM g_enrollments WHERE g_B# = :OLD.B#;
+END;
+/
+
+
+DECLARE
+    c_students CONSTANT PLS_INTEGER := 500;     -- N students deleted by one statement
+    c_per_student CONSTANT PLS_INTEGER := 5;    -- M enrollments per student (one bench class each)
+
+    TYPE t_names IS TABLE OF VARCHAR2(30);
+    v_legacy t_names := t_names('BENCH_LOG_ENROLLMENT', 'BENCH_LOG_DELETE_STUDENT',
+                                'BENCH_UPDATE_CLASS_SIZE', 'BENCH_CASCADE_DELETE_ENROLLMENTS');
+    v_compound t_names := t_names('TRG_G_ENROLLMENTS_DML', 'TRG_STUDENTS_DELETE');
+
+    FUNCTION stat(p_name IN VARCHAR2) RETURN NUMBER IS
+        v_value NUMBER;
+    BEGIN
+        SELECT m.value INTO v_value
+        FROM v$mystat m JOIN v$statname n ON m.statistic# = n.statistic#
+        WHERE n.name = p_name;
+        RETURN v_value;
+    END;
+
+    PROCEDURE set_triggers(p_names IN t_names, p_state IN VARCHAR2) IS
+    BEGIN
+        FOR i IN 1 .. p_names.COUNT LOOP
+            EXECUTE IMMEDIATE 'ALTER TRIGGER ' || p_names(i) || ' ' || p_state;
+        END LOOP;
+    END;
+
+    PROCEDURE setup IS
+        v_dept classes.dept_code%TYPE;
+        v_course classes.course#%TYPE;
+    BEGIN
+        SELECT dept_code, course# INTO v_dept, v_course FROM courses FETCH FIRST 1 ROWS ONLY;
+
+        INSERT INTO classes(classid, dept_code, course#, sect#, year, semester, limit, class_size, room)
+        SELECT 'x' || LPAD(LEVEL, 4, '0'), v_dept, v_course, LEVEL, 2021, 'Spring',
+               c_students, 0, 'BENCH'
+        FROM dual CONNECT BY LEVEL <= c_per_student;
+
+        INSERT INTO students(b#, first_name, last_name, st_level, gpa, email, bdate)
+        SELECT 'BX' || LPAD(LEVEL, 6, '0'), 'Bench', 'Student', 'master', 3.0,
+               'bench' || LEVEL || '@bench.invalid', DATE '2000-01-01'
+        FROM dual CONNECT BY LEVEL <= c_students;
+
+        INSERT INTO g_enrollments(g_b#, classid, score)
+        SELECT s.b#, c.classid, NULL
+        FROM students s CROSS JOIN classes c
+        WHERE s.b# LIKE 'BX%' AND c.room = 'BENCH';
+    END;
+
+    PROCEDURE run(p_label IN VARCHAR2, p_on IN t_names, p_off IN t_names) IS
+        v_start PLS_INTEGER;
+        v_elapsed PLS_INTEGER;
+        v_execs NUMBER;
+        v_reads NUMBER;
+        v_redo NUMBER;
+        v_left NUMBER;
+    BEGIN
+        set_triggers(p_off, 'DISABLE');
+        set_triggers(p_on, 'ENABLE');
+        setup;
+
+        v_execs := stat('execute count');
+        v_reads := stat('session logical reads');
+        v_redo := stat('redo size');
+        v_start := DBMS_UTILITY.GET_TIME;
+        DELETE FROM students WHERE b# LIKE 'BX%';
+        v_elapsed := DBMS_UTILITY.GET_TIME - v_start;
+        v_execs := stat('execute count') - v_execs;
+        v_reads := stat('session logical reads') - v_reads;
+        v_redo := stat('redo size') - v_redo;
+
+        -- Every bench class must be back to zero, whichever trigger set ran
+        SELECT NVL(SUM(ABS(class_size)), 0) INTO v_left FROM classes WHERE room = 'BENCH';
+        ROLLBACK;
+
+        DBMS_OUTPUT.PUT_LINE(RPAD(p_label, 10) ||
+            ' students=' || c_students || ' enrollments=' || c_students * c_per_student ||
+            '  ms=' || v_elapsed * 10 ||
+            '  executions=' || v_execs ||
+            '  logical reads=' || v_reads ||
+            '  redo bytes=' || v_redo ||
+            CASE WHEN v_left != 0 THEN '  CLASS_SIZE MISMATCH' END);
+    END;
+BEGIN
+    run('warm-up', v_compound, v_legacy);
+    run('row-level', v_legacy, v_compound);
+    run('compound', v_compound, v_legacy);
+EXCEPTION
+    WHEN OTHERS THEN
+        ROLLBACK;
+        set_triggers(v_legacy, 'DISABLE');
+        set_triggers(v_compound, 'ENABLE');
+        RAISE;
+END;
+/
+
+DROP TRIGGER bench_log_enrollment;
+DROP TRIGGER bench_log_delete_student;
+DROP TRIGGER bench_update_class_size;
+DROP TRIGGER bench_cascade_delete_enrollments;
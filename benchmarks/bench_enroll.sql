@@ -0,0 +1,133 @@
+-- Benchmark: legacy vs. set-based reg_pkg.enroll_grad_student
+-- Run in SQL*Plus as the schema owner after loading "reg_pkg (2).sql":
+--     SQL> @benchmarks/bench_enroll.sql
+-- Each attempt is rolled back, so the data is left as it was.
+-- Reports elapsed time, SQL executions and logical reads per call; the statistics
+-- come from v$mystat, so the user needs SELECT on v$mystat and v$statname.
+
+SET SERVEROUTPUT ON
+SET FEEDBACK OFF
+SET DEFINE OFF
+
+-- The pre-rewrite procedure (eight lookups plus one COUNT per prerequisite), kept here only
+-- so both versions can be timed against the same data.
+CREATE OR REPLACE PROCEDURE bench_enroll_legacy(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE) IS
+    v_level students.st_level%TYPE;
+    v_year classes.year%TYPE;
+    v_semester classes.semester%TYPE;
+    v_count NUMBER;
+    v_limit NUMBER;
+    v_size NUMBER;
+    v_exists NUMBER;
+BEGIN
+    SELECT COUNT(*) INTO v_exists FROM students WHERE b# = p_b#;
+    IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('The B# is invalid.'); RETURN; END IF;
+
+    SELECT st_level INTO v_level FROM students WHERE b# = p_b#;
+    IF v_level NOT IN ('master', 'PhD') THEN DBMS_OUTPUT.PUT_LINE('This is not a graduate student.'); RETURN; END IF;
+
+    SELECT COUNT(*) INTO v_exists FROM classes WHERE classid = p_classid;
+    IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('The classid is invalid.'); RETURN; END IF;
+
+    SELECT year, semester INTO v_year, v_semester FROM classes WHERE classid = p_classid;
+    IF v_year != 2021 OR v_semester != 'Spring' THEN DBMS_OUTPUT.PUT_LINE('Cannot enroll into a class from a previous semester.'); RETURN; END IF;
+
+    SELECT limit, class_size INTO v_limit, v_size FROM classes WHERE classid = p_classid;
+    IF v_size >= v_limit THEN DBMS_OUTPUT.PUT_LINE('The class is already full.'); RETURN; END IF;
+
+    SELECT COUNT(*) INTO v_exists FROM g_enrollments WHERE g_b# = p_b# AND classid = p_classid;
+    IF v_exists > 0 THEN DBMS_OUTPUT.PUT_LINE('The student is already in the class.'); RETURN; END IF;
+
+    SELECT COUNT(*) INTO v_count
+    FROM g_enrollments g JOIN classes c ON g.classid = c.classid
+    WHERE g.g_b# = p_b# AND c.semester = 'Spring' AND c.year = 2021;
+    IF v_count >= 5 THEN DBMS_OUTPUT.PUT_LINE('Students cannot be enrolled in more than five classes in the same semester.'); RETURN; END IF;
+
+    FOR pre IN (
+        SELECT pre_dept_code, pre_course#
+        FROM prerequisites
+        WHERE dept_code || course# = (
+            SELECT dept_code || course# FROM classes WHERE classid = p_classid
+        )
+    ) LOOP
+        SELECT COUNT(*) INTO v_exists
+        FROM g_enrollments g
+        JOIN classes c ON g.classid = c.classid
+        JOIN score_grade sg ON g.score = sg.score
+        WHERE g.g_b# = p_b#
+          AND c.dept_code = pre.pre_dept_code
+          AND c.course# = pre.pre_course#
+          AND sg.lgrade <= 'C';
+        IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('Prerequisite not satisfied.'); RETURN; END IF;
+    END LOOP;
+
+    INSERT INTO g_enrollments(g_b#, classid, score) VALUES (p_b#, p_classid, NULL);
+    DBMS_OUTPUT.PUT_LINE('Enrollment successful.');
+END;
+/
+
+
+DECLARE
+    c_rounds CONSTANT PLS_INTEGER := 20;
+
+    TYPE t_pair IS RECORD (b# students.b#%TYPE, classid classes.classid%TYPE);
+    TYPE t_pairs IS TABLE OF t_pair;
+    v_pairs t_pairs;
+
+    FUNCTION stat(p_name IN VARCHAR2) RETURN NUMBER IS
+        v_value NUMBER;
+    BEGIN
+        SELECT m.value INTO v_value
+        FROM v$mystat m JOIN v$statname n ON m.statistic# = n.statistic#
+        WHERE n.name = p_name;
+        RETURN v_value;
+    END;
+
+    PROCEDURE run(p_label IN VARCHAR2, p_legacy IN BOOLEAN) IS
+        v_start PLS_INTEGER;
+        v_execs NUMBER;
+        v_reads NUMBER;
+        v_calls PLS_INTEGER := c_rounds * v_pairs.COUNT;
+    BEGIN
+        v_execs := stat('execute count');
+        v_reads := stat('session logical reads');
+        v_start := DBMS_UTILITY.GET_TIME;
+        DBMS_OUTPUT.DISABLE;
+        FOR r IN 1 .. c_rounds LOOP
+            FOR i IN 1 .. v_pairs.COUNT LOOP
+                IF p_legacy THEN
+                    bench_enroll_legacy(v_pairs(i).b#, v_pairs(i).classid);
+                ELSE
+                    reg_pkg.enroll_grad_student(v_pairs(i).b#, v_pairs(i).classid);
+                END IF;
+                ROLLBACK;
+            END LOOP;
+        END LOOP;
+        DBMS_OUTPUT.ENABLE(NULL);
+        DBMS_OUTPUT.PUT_LINE(RPAD(p_label, 12) ||
+            ' calls=' || v_calls ||
+            '  ms/call=' || TO_CHAR((DBMS_UTILITY.GET_TIME - v_start) * 10 / v_calls, 'FM9990.000') ||
+            '  executions/call=' || TO_CHAR((stat('execute count') - v_execs) / v_calls, 'FM9990.0') ||
+            '  logical reads/call=' || TO_CHAR((stat('session logical reads') - v_reads) / v_calls, 'FM99990.0'));
+    END;
+BEGIN
+    -- Every graduate student against every class: exercises the success path as well as
+    -- each validation failure (wrong term, full, duplicate, load limit, prerequisites).
+    SELECT s.b#, c.classid BULK COLLECT INTO v_pairs
+    FROM students s CROSS JOIN classes c
+    WHERE s.st_level IN ('master', 'PhD')
+    ORDER BY s.b#, c.classid
+    FETCH FIRST 500 ROWS ONLY;
+
+    IF v_pairs.COUNT = 0 THEN
+        DBMS_OUTPUT.PUT_LINE('No graduate students or classes to benchmark with.');
+        RETURN;
+    END IF;
+
+    run('warm-up', FALSE);
+    run('legacy', TRUE);
+    run('set-based', FALSE);
+END;
+/
+
+DROP PROCEDURE bench_enroll_legacy;
@@ -0,0 +1,93 @@
+"""
+Microbenchmark: parse counts for literal SQL vs. bind variables.
+
+Runs the same calls two ways through one database session and reports the session's
+'parse count (total)' / 'parse count (hard)' deltas from v$mystat, plus elapsed time:
+
+  literal  every value inlined into the statement text, as call_procedure and
+           check_student_exists used to do, so each distinct B# is a new statement
+  binds    the current web_interface path: fixed statement text with bind variables
+
+Usage (from the repository root, Oracle backends only; needs SELECT on v$mystat/v$statname):
+    REG_DB_BACKEND=sqlplus  python benchmarks/bench_parse.py --calls 500
+    REG_DB_BACKEND=oracledb python benchmarks/bench_parse.py --calls 500
+
+Only read-only calls are made (student_exists and list_students_in_class), so nothing changes.
+"""
+import argparse
+import os
+import sys
+import time
+
+# One session, so v$mystat sees every call made by the benchmark.
+os.environ['REG_POOL_SIZE'] = '1'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import web_interface as wi
+
+STATS_SQL = (
+    "SELECT n.name, m.value FROM v$mystat m JOIN v$statname n ON m.statistic# = n.statistic# "
+    "WHERE n.name IN ('parse count (total)', 'parse count (hard)', 'execute count')"
+)
+EXISTS_SQL = 'SELECT COUNT(*) AS n FROM students WHERE "B#" = :b'
+
+
+def stats(backend) -> dict:
+    return {row['name']: int(row['value']) for row in backend.query(STATS_SQL)}
+
+
+def literal_round(backend, bnums, classids):
+    # The pre-bind code paths: values pasted into the SQL text.
+    for bnum in bnums:
+        backend.query(EXISTS_SQL.replace(':b', wi.sql_literal(bnum)))
+    for classid in classids:
+        if isinstance(backend, wi.OracleBackend):
+            with backend.pool.acquire() as conn:
+                conn.cursor().execute(f"begin reg_pkg.list_students_in_class({wi.sql_literal(classid)}); end;")
+        else:
+            wi.run_sqlplus(f"BEGIN\n  reg_pkg.list_students_in_class({wi.sql_literal(classid)});\nEND;\n/\n")
+
+
+def bind_round(backend, bnums, classids):
+    for bnum in bnums:
+        backend.student_exists(bnum)
+    for classid in classids:
+        backend.call('list_students_in_class', classid)
+
+
+def measure(label, backend, fn, bnums, classids):
+    before = stats(backend)
+    start = time.perf_counter()
+    fn(backend, bnums, classids)
+    elapsed = time.perf_counter() - start
+    after = stats(backend)
+    calls = len(bnums) + len(classids)
+    delta = {k: after[k] - before[k] for k in after}
+    print(f"{label:<8} calls={calls:<6} parse total={delta['parse count (total)']:<7} "
+          f"hard={delta['parse count (hard)']:<7} executions={delta['execute count']:<7} "
+          f"ms/call={elapsed * 1000 / calls:.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=500, help='calls of each kind per round')
+    opts = parser.parse_args(argv)
+
+    backend = wi.get_backend()
+    if isinstance(backend, wi.SqliteBackend):
+        sys.exit("Parse statistics come from v$mystat; use REG_DB_BACKEND=sqlplus or oracledb.")
+
+    # Distinct values, so every literal statement is new to the shared pool. A run tag keeps
+    # repeated runs from finding the previous run's literal statements still cached.
+    tag = format(int(time.time()) % 100000, '05d')
+    bnums = [f"Z{tag}{i:06d}" for i in range(opts.calls)]
+    classids = [f"z{tag}{i:05d}" for i in range(opts.calls)]
+
+    bind_round(backend, bnums[:5], classids[:5])   # warm-up: first parse of the bind statements
+    measure('literal', backend, literal_round, bnums, classids)
+    measure('binds', backend, bind_round, bnums, classids)
+    backend.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark: prediction latency and throughput, per request vs. micro-batched, for an eager
+model, its TorchScript artifact and the int8 dynamically quantized artifact.
+
+Concurrent clients each send one-row requests. Every execution mode runs twice:
+
+  direct   each request runs its own forward pass (concurrent passes contend for the CPU)
+  batched  requests go through inference.MicroBatcher, which answers everything that
+           arrived within --max-wait-ms with one forward pass
+
+With --url the same clients POST to a running server's /predict instead, end to end.
+
+Usage (from the repository root; needs torch and numpy):
+    python benchmarks/bench_predict.py --clients 32 --requests 4000
+    python benchmarks/bench_predict.py --model covid_model.pt
+    python benchmarks/bench_predict.py --url http://localhost:8000 --clients 32
+
+Without --model a randomly initialised RegressionDNN with --features inputs is exported and used.
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import torch
+
+import inference
+from hpsearch import RegressionDNN
+
+
+class EagerPredictor:
+    """
+    The same preprocessing and model as an artifact, run as ordinary Python modules.
+    """
+    def __init__(self, model, n_features):
+        self.module = inference.ServingModel(model, np.zeros(n_features), np.ones(n_features),
+                                             list(range(n_features))).eval()
+
+    def predict(self, rows):
+        with torch.no_grad():
+            return self.module(torch.from_numpy(rows)).numpy()
+
+
+def percentile(sorted_values, pct):
+    rank = max(1, min(len(sorted_values), round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+def run_clients(opts, call) -> tuple:
+    """
+    opts.clients threads, opts.requests calls in total; returns (requests/s, sorted latencies).
+    """
+    per_client = -(-opts.requests // opts.clients)
+    latencies = [[] for _ in range(opts.clients)]
+
+    def client(i):
+        rng = np.random.default_rng(i)
+        state = {}
+        for _ in range(per_client):
+            row = rng.standard_normal((1, opts.features), dtype=np.float32)
+            start = time.perf_counter()
+            call(row, state)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(opts.clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    times = sorted(t for per in latencies for t in per)
+    return len(times) / wall, times
+
+
+def report(label, rate, times):
+    print(f"{label:<22} req/s={rate:9.1f}  p50={percentile(times, 50) * 1000:7.2f}ms  "
+          f"p95={percentile(times, 95) * 1000:7.2f}ms  p99={percentile(times, 99) * 1000:7.2f}ms")
+
+
+def bench_http(opts):
+    parts = urlsplit(opts.url)
+
+    def call(row, state):
+        conn = state.get('conn')
+        if conn is None:
+            conn = state['conn'] = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        conn.request('POST', '/predict', json.dumps({'instances': row.tolist()}),
+                     {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"/predict answered {response.status}")
+    report('http /predict', *run_clients(opts, call))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', help='artifact from inference.export_model (default: a random model)')
+    parser.add_argument('--url', help='benchmark a running server\'s /predict instead')
+    parser.add_argument('--features', type=int, default=116, help='inputs of the random model')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=4000, help='requests per mode, one row each')
+    parser.add_argument('--max-rows', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=2)
+    parser.add_argument('--threads', type=int, help='torch intra-op threads (default: torch decides)')
+    opts = parser.parse_args(argv)
+
+    if opts.url:
+        bench_http(opts)
+        return
+    if opts.threads:
+        torch.set_num_threads(opts.threads)
+    predictors = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if opts.model:
+            predictors['torchscript'] = inference.Predictor(opts.model)
+            opts.features = len(predictors['torchscript'].columns)
+        else:
+            torch.manual_seed(0)
+            model = RegressionDNN(opts.features).eval()
+            columns = [f'f{i}' for i in range(opts.features)]
+            predictors['eager'] = EagerPredictor(model, opts.features)
+            for label, quantize in (('torchscript', False), ('torchscript-int8', True)):
+                path = os.path.join(tmp, f'{label}.pt')
+                inference.export_model(model, path, columns, np.zeros(opts.features), np.ones(opts.features),
+                                       quantize=quantize)
+                predictors[label] = inference.Predictor(path)
+        print(f"{opts.clients} clients, {opts.requests} one-row requests per mode, {opts.features} features, "
+              f"threads={torch.get_num_threads()}, max_wait={opts.max_wait_ms}ms")
+        for label, predictor in predictors.items():
+            predictor.predict(np.zeros((8, opts.features), dtype=np.float32))   # warm-up (TorchScript profiles first runs)
+            report(f"{label} direct", *run_clients(opts, lambda row, state: predictor.predict(row)))
+            batcher = inference.MicroBatcher(predictor, opts.max_rows, opts.max_wait_ms / 1000)
+            report(f"{label} batched", *run_clients(opts, lambda row, state: batcher.predict(row)))
+            batcher.close()
+
+
+if __name__ == '__main__':
+    main()
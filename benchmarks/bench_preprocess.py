@@ -0,0 +1,102 @@
+"""
+Benchmark: loading covid.train.csv / covid.test.csv through preprocess.load_covid vs. parsing
+them every time.
+
+  parse      pd.read_csv both files (float64) and standardize with the training statistics,
+             as the notebook did before the cache
+  cold       load_covid with an empty cache: parse as float32, standardize, save the .npy files
+  warm       load_covid again: hash both files and memory-map the saved arrays
+
+Usage (from the repository root; needs numpy and pandas):
+    python benchmarks/bench_preprocess.py
+    python benchmarks/bench_preprocess.py --train /content/covid.train.csv --test /content/covid.test.csv
+
+Without --train/--test, random files shaped like the real ones (2700 / 893 rows, 116 features) are written.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import preprocess
+
+
+def write_data(directory: str, opts) -> tuple:
+    rng = np.random.default_rng(opts.seed)
+    columns = [f'f{i}' for i in range(opts.features)]
+    paths = []
+    for name, rows, target in (('covid.train.csv', opts.rows, True), ('covid.test.csv', opts.test_rows, False)):
+        frame = pd.DataFrame(rng.normal(20, 5, (rows, opts.features)).round(6), columns=columns)
+        frame.insert(0, 'id', range(rows))
+        if target:
+            frame[preprocess.TARGET] = rng.normal(10, 3, rows).round(6)
+        path = os.path.join(directory, name)
+        frame.to_csv(path, index=False)
+        paths.append(path)
+    return tuple(paths)
+
+
+def parse(train_path: str, test_path: str):
+    train, test = pd.read_csv(train_path), pd.read_csv(test_path)
+    columns = [c for c in train.columns if c not in ('id', preprocess.TARGET)]
+    X_train, X_test = train[columns].to_numpy(), test[columns].to_numpy()
+    mean, std = X_train.mean(axis=0), X_train.std(axis=0)
+    scale = np.where(std > 0, std, 1)
+    return (X_train - mean) / scale, (X_test - mean) / scale
+
+
+def timed(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--train', help='covid.train.csv (default: random data)')
+    parser.add_argument('--test', help='covid.test.csv')
+    parser.add_argument('--rows', type=int, default=2700)
+    parser.add_argument('--test-rows', type=int, default=893)
+    parser.add_argument('--features', type=int, default=116)
+    parser.add_argument('--repeat', type=int, default=10, help='runs per timing (median reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    opts = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix='covid-bench-')
+    try:
+        train_path, test_path = (opts.train, opts.test) if opts.train else write_data(tmp, opts)
+        cache_dir = os.path.join(tmp, 'cache')
+        size = (os.path.getsize(train_path) + os.path.getsize(test_path)) / 1e6
+        print(f"{os.path.basename(train_path)} + {os.path.basename(test_path)}: {size:.1f} MB")
+
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            preprocess.load_covid(train_path, test_path, cache_dir=cache_dir)
+
+        results = [('parse', timed(lambda: parse(train_path, test_path), opts.repeat)),
+                   ('cold', timed(cold, opts.repeat)),
+                   ('warm', timed(lambda: preprocess.load_covid(train_path, test_path, cache_dir=cache_dir),
+                                  opts.repeat))]
+        covid = preprocess.load_covid(train_path, test_path, cache_dir=cache_dir)
+        X_train, X_test = parse(train_path, test_path)
+        drift = max(np.abs(covid.X_train - X_train).max(), np.abs(covid.X_test - X_test).max())
+        for label, seconds in results:
+            print(f"{label:<6} {seconds * 1000:9.2f} ms  ({results[0][1] / seconds:5.1f}x parse)")
+        print(f"largest difference from the float64 parse: {drift:.1e}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Synthetic registration data for load tests: a SQLite reg_pkg database with students, courses,
+classes, prerequisites and graduate enrollments at a chosen scale.
+
+  --rows         g_enrollments rows to create (10k to 1M is the intended range)
+  --per-student  enrollments per student; students = rows / per-student
+  --seed         random seed, so the same arguments always build the same database
+
+Most classes are in the current term (reg_config), each filled to two thirds of its limit,
+so enroll and drop requests in a load test mostly reach the checks that do real work.
+Students are numbered B0000001, B0000002, ... and classes c000001, c000002, ...
+
+Usage (from the repository root):
+    python benchmarks/gen_data.py --db /tmp/load.db --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reg_pkg_sqlite
+
+DEPTS = ('CS', 'MATH', 'EE', 'PHYS', 'BIOL')
+GRADES = ((98, 'A'), (93, 'A-'), (88, 'B+'), (85, 'B'), (80, 'B-'), (77, 'C+'), (74, 'C'), (70, 'C-'), (65, 'D'), (50, 'F'))
+CURRENT_SHARE = 0.8   # share of classes in the current term; the rest are earlier terms
+BATCH = 50000         # rows per executemany
+
+# Triggers that would fire once per generated enrollment or student; they are dropped for the
+# load and recreated by reconnecting, with class_size and student_term_load computed in bulk.
+LOAD_TRIGGERS = ('trg_log_enrollment_insert', 'trg_update_class_size_insert', 'trg_student_term_load_insert')
+
+
+def student_id(i: int) -> str:
+    return f"B{i:07d}"
+
+
+def class_id(i: int) -> str:
+    return f"c{i:06d}"
+
+
+def batched(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(path: str, rows: int, per_student: int = 3, seed: int = 1) -> dict:
+    """
+    Build the database at path (which must not exist yet) and return the counts created.
+    """
+    rng = random.Random(seed)
+    n_students = max(1, rows // per_student)
+    n_classes = max(50, rows // 40)
+    n_courses = max(20, n_classes // 10)
+    conn = reg_pkg_sqlite.connect(path, 'LOADGEN')
+    year, semester = conn.execute('SELECT current_year, current_semester FROM reg_config').fetchone()
+    conn.execute('PRAGMA synchronous=OFF')
+    for name in LOAD_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    with conn:
+        conn.executemany('INSERT INTO score_grade VALUES (?, ?)', GRADES)
+        courses = [(DEPTS[i % len(DEPTS)], 100 + i, f"Course {i}") for i in range(n_courses)]
+        conn.executemany('INSERT INTO courses VALUES (?, ?, ?)', courses)
+        conn.executemany('INSERT OR IGNORE INTO course_credit VALUES (?, ?)',
+                         [(course, rng.choice((3, 4))) for _, course, _ in courses])
+        # A sparse prerequisite forest: each course after the first tenth may need one earlier course
+        conn.executemany('INSERT INTO prerequisites VALUES (?, ?, ?, ?)', [
+            (dept, course) + courses[rng.randrange(i)][:2]
+            for i, (dept, course, _) in enumerate(courses) if i >= n_courses // 10 and rng.random() < 0.3])
+
+        classes = []
+        for i in range(1, n_classes + 1):
+            dept, course, _ = courses[rng.randrange(n_courses)]
+            term = (year, semester) if rng.random() < CURRENT_SHARE else (year - 1, 'Fall')
+            classes.append((class_id(i), dept, course, i, term[0], term[1], 0, 0, f"R{i % 300:03d}"))
+        conn.executemany('INSERT INTO classes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', classes)
+
+        levels = ('master', 'PhD', 'master', 'senior')
+        for batch in batched((student_id(i), f"First{i}", f"Last{i}", rng.choice(levels),
+                              round(rng.uniform(2.0, 4.0), 2), f"s{i}@example.edu", '1999-01-01')
+                             for i in range(1, n_students + 1)):
+            conn.executemany('INSERT INTO students VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+
+        def enrollments():
+            for s in range(1, n_students + 1):
+                for c in rng.sample(range(1, n_classes + 1), min(per_student, n_classes)):
+                    yield student_id(s), class_id(c), rng.choice(GRADES)[0] if rng.random() < 0.5 else None
+        for batch in batched(enrollments()):
+            conn.executemany('INSERT INTO g_enrollments VALUES (?, ?, ?)', batch)
+
+        conn.execute('UPDATE classes SET class_size = g.n FROM '
+                     '(SELECT classid, COUNT(*) AS n FROM g_enrollments GROUP BY classid) AS g '
+                     'WHERE g.classid = classes.classid')
+        conn.execute('UPDATE classes SET "LIMIT" = MAX(10, class_size * 3 / 2)')
+        conn.execute('DELETE FROM student_term_load')
+        conn.execute('INSERT INTO student_term_load '
+                     'SELECT g."G_B#", c.year, c.semester, COUNT(*) '
+                     'FROM g_enrollments g JOIN classes c ON g.classid = c.classid '
+                     'GROUP BY g."G_B#", c.year, c.semester')
+    conn.execute('ANALYZE')
+    conn.close()
+    # Reconnecting recreates the dropped triggers from the schema
+    reg_pkg_sqlite.connect(path).close()
+    return {'students': n_students, 'classes': n_classes, 'courses': n_courses,
+            'enrollments': n_students * min(per_student, n_classes)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', required=True, help='SQLite file to create')
+    parser.add_argument('--rows', type=int, default=10000, help='g_enrollments rows')
+    parser.add_argument('--per-student', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--force', action='store_true', help='replace the file if it exists')
+    opts = parser.parse_args(argv)
+
+    if os.path.exists(opts.db):
+        if not opts.force:
+            sys.exit(f"{opts.db} exists; pass --force to replace it.")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(opts.db + suffix):
+                os.remove(opts.db + suffix)
+    start = time.perf_counter()
+    counts = generate(opts.db, opts.rows, opts.per_student, opts.seed)
+    print(', '.join(f"{k}={v}" for k, v in counts.items()) + f"  in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Load test: concurrent users against the web tier, with latency percentiles, throughput and
+server memory, and saved baselines to compare later runs against.
+
+Each worker thread keeps one HTTP/1.1 connection and sends requests drawn from --mix:
+
+  students  GET  /students, the first page or a page after a random B#
+  class     POST /class      a random classid
+  enroll    POST /enroll     a random student into a random class
+  drop      POST /drop       a random student from a random class
+  delete    POST /delete     students taken from the top of the B# range, each deleted once
+
+By default the server is started here on a copy of --db (so every run starts from the same
+data) with the sqlite backend; REG_* settings in the environment are passed on to it. With
+--url an already running server is used instead, and RSS is only reported if --pid is given.
+
+Usage (from the repository root):
+    python benchmarks/gen_data.py --db /tmp/load.db --rows 100000
+    python benchmarks/load_test.py --db /tmp/load.db --concurrency 16 --duration 30 --save sqlite-100k
+    python benchmarks/load_test.py --db /tmp/load.db --concurrency 16 --duration 30 --compare sqlite-100k
+
+Saved baselines are JSON files in benchmarks/baselines/. --compare exits with status 1 when
+p95 latency or throughput is worse than the baseline by more than --tolerance.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baselines')
+DEFAULT_MIX = 'students=40,class=25,enroll=15,drop=15,delete=5'
+OPS = ('students', 'class', 'enroll', 'drop', 'delete')
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(','):
+        op, _, weight = part.partition('=')
+        op = op.strip()
+        if op not in OPS:
+            raise ValueError(f"unknown request type {op!r}; choose from {', '.join(OPS)}")
+        mix[op] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+def read_rss(pid: int) -> dict:
+    """
+    Current and peak resident set size in MB, from /proc (Linux only; empty elsewhere).
+    """
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return {}
+    return {key: int(fields[name].split()[0]) / 1024
+            for key, name in (('rss_mb', 'VmRSS'), ('peak_rss_mb', 'VmHWM')) if name in fields}
+
+
+class Dataset:
+    """
+    The id ranges gen_data.py created, read from the database before the run.
+    """
+    def __init__(self, path: str):
+        conn = sqlite3.connect(path)
+        self.students = conn.execute('SELECT COUNT(*) FROM students').fetchone()[0]
+        self.classes = conn.execute('SELECT COUNT(*) FROM classes').fetchone()[0]
+        self.enrollments = conn.execute('SELECT COUNT(*) FROM g_enrollments').fetchone()[0]
+        conn.close()
+        if not self.students or not self.classes:
+            raise ValueError(f"{path} has no students or classes; create it with gen_data.py")
+        # Deletes walk down from the highest B#, so each request removes a different student
+        self._next_delete = itertools.count(self.students, -1)
+
+    def student(self, rng: random.Random) -> str:
+        return f"B{rng.randint(1, self.students):07d}"
+
+    def classid(self, rng: random.Random) -> str:
+        return f"c{rng.randint(1, self.classes):06d}"
+
+    def deleted_student(self) -> str:
+        return f"B{max(1, next(self._next_delete)):07d}"
+
+
+def build_request(op: str, data: Dataset, rng: random.Random) -> tuple:
+    """
+    (method, path, form body or None) for one request of the given type.
+    """
+    if op == 'students':
+        if rng.random() < 0.5:
+            return 'GET', '/students', None
+        return 'GET', '/students?' + urlencode({'after': data.student(rng)}), None
+    if op == 'class':
+        return 'POST', '/class', {'classid': data.classid(rng)}
+    if op in ('enroll', 'drop'):
+        return 'POST', f'/{op}', {'bnum': data.student(rng), 'classid': data.classid(rng)}
+    return 'POST', '/delete', {'bnum': data.deleted_student()}
+
+
+class Worker(threading.Thread):
+    def __init__(self, index: int, host: str, port: int, data: Dataset, mix: dict, seed: int,
+                 deadline: float, max_requests: int, warmup_until: float):
+        super().__init__(name=f'load-{index}', daemon=True)
+        self.host, self.port = host, port
+        self.data = data
+        self.ops, self.weights = list(mix), list(mix.values())
+        self.rng = random.Random(seed * 1000 + index)
+        self.deadline = deadline
+        self.max_requests = max_requests
+        self.warmup_until = warmup_until
+        self.samples = []   # (op, seconds, ok)
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        sent = 0
+        while time.perf_counter() < self.deadline and (not self.max_requests or sent < self.max_requests):
+            op = self.rng.choices(self.ops, self.weights)[0]
+            method, path, form = build_request(op, self.data, self.rng)
+            body = urlencode(form).encode() if form else None
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'} if form else {}
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            elapsed = time.perf_counter() - start
+            if start >= self.warmup_until:
+                self.samples.append((op, elapsed, ok))
+                sent += 1
+        conn.close()
+
+
+def summarize(samples: list, wall: float) -> dict:
+    results = {'requests': len(samples), 'errors': sum(not ok for _, _, ok in samples),
+               'seconds': round(wall, 3), 'throughput_rps': round(len(samples) / wall, 1) if wall else 0.0,
+               'ops': {}}
+    for op in [None] + sorted({op for op, _, _ in samples}):
+        times = sorted(t for o, t, _ in samples if op is None or o == op)
+        stats = {'n': len(times), 'errors': sum(not ok for o, _, ok in samples if op is None or o == op)}
+        for pct in (50, 95, 99):
+            stats[f'p{pct}_ms'] = round(percentile(times, pct) * 1000, 2)
+        stats['max_ms'] = round(times[-1] * 1000, 2) if times else 0.0
+        if op is None:
+            results.update(stats)
+        else:
+            results['ops'][op] = stats
+    return results
+
+
+def print_results(results: dict):
+    print(f"{'route':<10} {'n':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(results['ops'].items()) + [('all', results)]
+    for op, s in rows:
+        print(f"{op:<10} {s['n']:>8} {s['errors']:>7} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} "
+              f"{s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}")
+    line = f"throughput {results['throughput_rps']:.1f} req/s over {results['seconds']:.1f}s"
+    if 'peak_rss_mb' in results:
+        line += f"   server RSS {results['rss_mb']:.1f} MB (peak {results['peak_rss_mb']:.1f} MB)"
+    print(line)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Print the change against a saved baseline; False if p95 or throughput regressed.
+    """
+    base = baseline['results']
+    ok = True
+    print(f"\nagainst baseline {baseline['name']} ({baseline['created']}), tolerance {tolerance:.0%}:")
+    checks = [(f"{op} p95 ms", s['p95_ms'], base['ops'][op]['p95_ms'], True)
+              for op, s in results['ops'].items() if op in base['ops']]
+    checks.append(('all p95 ms', results['p95_ms'], base['p95_ms'], True))
+    checks.append(('throughput req/s', results['throughput_rps'], base['throughput_rps'], False))
+    if 'peak_rss_mb' in results and 'peak_rss_mb' in base:
+        checks.append(('peak RSS MB', results['peak_rss_mb'], base['peak_rss_mb'], True))
+    for label, now, then, lower_is_better in checks:
+        change = (now - then) / then if then else 0.0
+        worse = change > tolerance if lower_is_better else change < -tolerance
+        ok = ok and not worse
+        print(f"  {label:<20} {then:>10.2f} -> {now:>10.2f}  {change:+7.1%}{'  REGRESSION' if worse else ''}")
+    return ok
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, REG_DB_BACKEND='sqlite', REG_SQLITE_PATH=db_path)
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, 'web_interface.py'), 'web',
+                             '--port', str(port), '--workers', str(workers)],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start listening within 30s")
+
+
+def run(opts, data: Dataset) -> dict:
+    mix = parse_mix(opts.mix)
+    server = None
+    workdir = None
+    if opts.url:
+        parts = urlsplit(opts.url)
+        host, port, pid = parts.hostname, parts.port or 80, opts.pid
+    else:
+        workdir = tempfile.mkdtemp(prefix='reg-load-')
+        db_copy = os.path.join(workdir, 'load.db')
+        shutil.copyfile(opts.db, db_copy)
+        host, port = '127.0.0.1', free_port()
+        server = start_server(db_copy, port, opts.server_workers)
+        pid = server.pid
+    try:
+        start = time.perf_counter()
+        warmup_until = start + opts.warmup
+        deadline = warmup_until + opts.duration if not opts.requests else float('inf')
+        per_worker = -(-opts.requests // opts.concurrency) if opts.requests else 0
+        workers = [Worker(i, host, port, data, mix, opts.seed, deadline, per_worker, warmup_until)
+                   for i in range(opts.concurrency)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        wall = time.perf_counter() - max(start, warmup_until)
+        results = summarize([s for w in workers for s in w.samples], wall)
+        if pid:
+            results.update(read_rss(pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', required=True, help='database made by gen_data.py (also used for id ranges with --url)')
+    parser.add_argument('--url', help='test this running server instead of starting one')
+    parser.add_argument('--pid', type=int, help='server process id for RSS when using --url')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'request weights (default {DEFAULT_MIX})')
+    parser.add_argument('--concurrency', type=int, default=8, help='simulated users (one connection each)')
+    parser.add_argument('--duration', type=float, default=20, help='seconds measured after the warm-up')
+    parser.add_argument('--requests', type=int, default=0, help='stop after this many requests instead')
+    parser.add_argument('--warmup', type=float, default=2, help='seconds of unrecorded requests first')
+    parser.add_argument('--server-workers', type=int, default=16, help='worker threads of the started server')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', metavar='NAME', help='save the results as baseline NAME')
+    parser.add_argument('--compare', metavar='NAME', help='compare with baseline NAME')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed regression, as a fraction')
+    opts = parser.parse_args(argv)
+
+    data = Dataset(opts.db)
+    results = run(opts, data)
+    print_results(results)
+
+    config = {k: getattr(opts, k) for k in ('mix', 'concurrency', 'duration', 'requests', 'warmup',
+                                            'server_workers', 'seed')}
+    config['db'] = os.path.basename(opts.db)
+    config['dataset'] = {'enrollments': data.enrollments, 'students': data.students, 'classes': data.classes}
+    if opts.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f'{opts.save}.json')
+        host = {'cpus': os.cpu_count(), 'python': platform.python_version(), 'platform': platform.platform()}
+        with open(path, 'w') as f:
+            json.dump({'name': opts.save, 'created': datetime.now().isoformat(timespec='seconds'),
+                       'config': config, 'host': host, 'results': results}, f, indent=2)
+        print(f"saved baseline {path}")
+    if opts.compare:
+        with open(os.path.join(BASELINE_DIR, f'{opts.compare}.json')) as f:
+            baseline = json.load(f)
+        if baseline['config'] != config:
+            print(f"note: baseline config differs: {baseline['config']}")
+        if not compare(results, baseline, opts.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+In-memory mini-batching for the training loops of ML_Project1.ipynb.
+
+The notebook's data is a few thousand rows that fit on the device many times over, so a
+DataLoader spends most of each epoch in Python: a sampler yielding indices, one
+__getitem__ per row and a collate per batch. TensorBatcher instead moves the tensors to
+the device once, reorders them with a single permutation per epoch and yields slices.
+train_epoch() keeps the running loss on the device as well, so there is one host sync per
+epoch instead of a loss.item() per step.
+
+    train_loader = TensorBatcher(X_train_tensor, y_train_tensor, batch_size=32, shuffle=True, device=device)
+    for epoch in range(num_epochs):
+        avg_loss = train_epoch(model, train_loader, loss_function, optimizer)
+
+benchmarks/bench_batching.py compares it with the DataLoader loop in epochs per second.
+"""
+import torch
+
+
+class TensorBatcher:
+    """
+    Drop-in replacement for DataLoader(TensorDataset(*tensors), batch_size, shuffle) over
+    tensors that fit in memory: same batches per epoch, same len(), same tuple per batch.
+    """
+    def __init__(self, *tensors, batch_size: int = 32, shuffle: bool = True, drop_last: bool = False,
+                 device=None, generator: torch.Generator = None):
+        if not tensors or any(len(t) != len(tensors[0]) for t in tensors):
+            raise ValueError("TensorBatcher needs tensors with the same number of rows")
+        self.tensors = tuple(t.to(device) if device is not None else t for t in tensors)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.generator = generator
+
+    def __len__(self) -> int:
+        n = len(self.tensors[0])
+        return n // self.batch_size if self.drop_last else -(-n // self.batch_size)
+
+    def __iter__(self):
+        tensors = self.tensors
+        if self.shuffle:
+            # Drawn on the CPU, where the generator lives, then one gather per tensor per epoch
+            order = torch.randperm(len(tensors[0]), generator=self.generator).to(tensors[0].device)
+            tensors = tuple(t[order] for t in tensors)
+        stop = len(self) * self.batch_size
+        for start in range(0, stop, self.batch_size):
+            yield tuple(t[start:start + self.batch_size] for t in tensors)
+
+
+def train_epoch(model, batches, loss_function, optimizer) -> float:
+    """
+    One epoch over batches of (X, y); returns the mean of the batch losses, like the
+    notebook's total_loss / len(train_loader), read back from the device once at the end.
+    """
+    model.train()
+    total_loss = None
+    n = 0
+    for batch_X, batch_y in batches:
+        outputs = model(batch_X)
+        loss = loss_function(outputs, batch_y)
+
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+
+        total_loss = loss.detach() if total_loss is None else total_loss + loss.detach()
+        n += 1
+    return (total_loss / n).item() if n else 0.0
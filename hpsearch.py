@@ -0,0 +1,244 @@
+"""
+Parallel hyperparameter search for the RegressionDNN of ML_Project1.ipynb.
+
+Each hyperparameter combination is a trial. Trials train in a pool of worker processes,
+each limited to a fixed number of torch threads so that the workers share the CPU rather
+than oversubscribe it. With eta > 1 the search is successive halving: every trial trains
+up to the first rung's epoch budget, the best 1/eta of them carry on to the next rung, and
+so on up to num_epochs, so poor combinations stop after a few epochs. patience stops a
+trial early once its epoch loss has not improved for that many epochs.
+
+Per-epoch losses are sent back while the trials run and are collected in the notebook's
+history format, {'lr_0.01_dropout_0.2_decay_1e-05': [epoch 1 loss, epoch 2 loss, ...]}.
+A pruned trial's list ends where it was stopped.
+
+    from hpsearch import grid, search
+    history, best_hyperparameters, best_loss = search(
+        X_train_scaled_df.values, y_train.values,
+        grid(lr=learning_rates, dropout_rate=dropout_rates, weight_decay=weight_decays),
+        num_epochs=100, eta=3)
+"""
+import io
+import itertools
+import multiprocessing as mp
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from fastbatch import TensorBatcher, train_epoch
+
+
+class RegressionDNN(nn.Module):
+    """
+    The network from the notebook's hyperparameter tuning cell. It lives in this module
+    because worker processes import it; a class defined in a notebook cell cannot be sent to them.
+    """
+    def __init__(self, input_size, dropout_rate=0.0):
+        super(RegressionDNN, self).__init__()
+        self.layer_1 = nn.Linear(input_size, 64)
+        self.relu = nn.ReLU()
+        self.dropout = nn.Dropout(dropout_rate)
+        self.layer_2 = nn.Linear(64, 32)
+        self.output_layer = nn.Linear(32, 1)
+
+    def forward(self, x):
+        x = self.layer_1(x)
+        x = self.relu(x)
+        x = self.dropout(x)
+        x = self.layer_2(x)
+        x = self.relu(x)
+        x = self.output_layer(x)
+        return x
+
+
+def grid(**axes) -> list:
+    """
+    Every combination of the given value lists as a dict, in nested-loop order (first axis outermost).
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def trial_label(params: dict) -> str:
+    """
+    The notebook's history key for a combination.
+    """
+    return f"lr_{params['lr']}_dropout_{params.get('dropout_rate', 0.0)}_decay_{params.get('weight_decay', 0.0)}"
+
+
+def rung_budgets(num_epochs: int, eta: int, min_epochs: int) -> list:
+    """
+    Cumulative epoch budgets of the successive-halving rungs, the last one being num_epochs.
+    """
+    budgets = [num_epochs]
+    if eta > 1:
+        while budgets[0] / eta >= min_epochs:
+            budgets.insert(0, round(budgets[0] / eta))
+    return budgets
+
+
+def _dump(obj) -> bytes:
+    # Checkpoints cross process boundaries as plain bytes, not as shared-memory tensors
+    buffer = io.BytesIO()
+    torch.save(obj, buffer)
+    return buffer.getvalue()
+
+
+def _load(data: bytes):
+    return torch.load(io.BytesIO(data), weights_only=False)
+
+
+# ----- Worker side: set once per worker process by _init_worker -----
+_data = None       # (X, y, X_eval, y_eval) tensors
+_progress = None   # queue of (label, epoch, loss) for the parent
+
+
+def _init_worker(X, y, X_eval, y_eval, threads, progress):
+    global _data, _progress
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass   # already set in this process
+    tensors = [torch.as_tensor(a, dtype=torch.float32) for a in (X, y, X_eval, y_eval)]
+    tensors[1] = tensors[1].reshape(-1, 1)
+    tensors[3] = tensors[3].reshape(-1, 1)
+    _data = tuple(tensors)
+    _progress = progress
+
+
+def _train(label: str, params: dict, start_epoch: int, end_epoch: int, checkpoint, batch_size: int,
+           seed: int, patience: int):
+    """
+    Train one trial from start_epoch up to end_epoch, resuming from checkpoint (None: a new
+    model). Returns (label, start_epoch, eval loss, epoch losses, stopped early, checkpoint).
+    """
+    X, y, X_eval, y_eval = _data
+    generator = torch.Generator()
+    if checkpoint is None:
+        torch.manual_seed(seed)   # weight init and dropout masks
+        generator.manual_seed(seed)
+    model = RegressionDNN(X.shape[1], dropout_rate=params.get('dropout_rate', 0.0))
+    optimizer = optim.Adam(model.parameters(), lr=params['lr'], weight_decay=params.get('weight_decay', 0.0))
+    best, stale = float('inf'), 0
+    if checkpoint is not None:
+        state = _load(checkpoint)
+        model.load_state_dict(state['model'])
+        optimizer.load_state_dict(state['optimizer'])
+        torch.set_rng_state(state['rng'])
+        generator.set_state(state['generator'])
+        best, stale = state['best'], state['stale']
+    loss_function = nn.MSELoss()
+    train_loader = TensorBatcher(X, y, batch_size=batch_size, shuffle=True, generator=generator)
+
+    losses = []
+    stopped = False
+    for epoch in range(start_epoch, end_epoch):
+        avg_loss = train_epoch(model, train_loader, loss_function, optimizer)
+        losses.append(avg_loss)
+        _progress.put((label, epoch, avg_loss))
+        if avg_loss < best:
+            best, stale = avg_loss, 0
+        else:
+            stale += 1
+        if patience and stale >= patience:
+            stopped = True
+            break
+
+    model.eval()
+    with torch.no_grad():
+        eval_loss = loss_function(model(X_eval), y_eval).item()
+    checkpoint = _dump({'model': model.state_dict(), 'optimizer': optimizer.state_dict(),
+                        'rng': torch.get_rng_state(), 'generator': generator.get_state(),
+                        'best': best, 'stale': stale})
+    return label, start_epoch, eval_loss, losses, stopped, checkpoint
+
+
+# ----- Parent side -----
+def search(X, y, candidates: list, num_epochs: int = 100, batch_size: int = 32, eta: int = 3,
+           min_epochs: int = 5, patience: int = None, X_val=None, y_val=None, workers: int = None,
+           threads_per_worker: int = None, seed: int = 0, on_epoch=None, verbose: bool = True):
+    """
+    Train every candidate (a dict with lr and optionally dropout_rate and weight_decay) and
+    return (history, best_hyperparameters, best_loss).
+
+    best_loss is the MSE of a trained model in eval mode on (X_val, y_val), or on the
+    training data as in the notebook's grid. With eta > 1, trials are ranked by it at each
+    rung and only the best 1/eta continue; eta=1 trains every trial for num_epochs.
+    on_epoch(label, epoch, loss) is called in this process as each epoch's loss arrives,
+    and history is updated at the same time.
+    """
+    labels = [trial_label(p) for p in candidates]
+    if len(set(labels)) != len(labels):
+        raise ValueError("candidates contains the same combination twice")
+    params = dict(zip(labels, candidates))
+    seeds = {label: seed + i for i, label in enumerate(labels)}
+    cpus = os.cpu_count() or 1
+    workers = workers or min(len(candidates), cpus)
+    threads = threads_per_worker or max(1, cpus // workers)
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    X_eval, y_eval = (X, y) if X_val is None else (np.asarray(X_val, dtype=np.float32),
+                                                   np.asarray(y_val, dtype=np.float32))
+
+    history = {label: [] for label in labels}
+    scores, checkpoints, stopped = {}, {}, set()
+    alive = list(labels)
+
+    # spawn, not fork: forking a process that has already started torch's threads can hang
+    ctx = mp.get_context('spawn')
+    progress = ctx.Queue()
+
+    def record(label, epoch, loss):
+        # Each loss arrives twice, from the queue and in the trial's result; the first one counts
+        if epoch == len(history[label]):
+            history[label].append(loss)
+            if on_epoch is not None:
+                on_epoch(label, epoch, loss)
+
+    def rank(label):
+        score = scores[label]
+        return float('inf') if score != score else score   # a diverged (NaN) trial ranks last
+
+    def drain():
+        while True:
+            try:
+                record(*progress.get_nowait())
+            except queue.Empty:
+                return
+
+    budgets = rung_budgets(num_epochs, eta, min_epochs)
+    if verbose:
+        print(f"{len(labels)} trials on {workers} workers x {threads} threads; epoch budgets per rung: {budgets}")
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(X, y, X_eval, y_eval, threads, progress)) as pool:
+        for rung, budget in enumerate(budgets):
+            pending = {pool.submit(_train, label, params[label], len(history[label]), budget,
+                                   checkpoints.get(label), batch_size, seeds[label], patience)
+                       for label in alive if label not in stopped}
+            while pending:
+                done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                drain()
+                for future in done:
+                    label, start, eval_loss, losses, early, checkpoints[label] = future.result()
+                    for epoch, loss in enumerate(losses, start):
+                        record(label, epoch, loss)
+                    scores[label] = eval_loss
+                    if early:
+                        stopped.add(label)
+                    if verbose:
+                        note = ' (stopped early)' if early else ''
+                        print(f"  {label}: {len(history[label])} epochs, loss {eval_loss:.4f}{note}")
+            if rung < len(budgets) - 1:
+                ranked = sorted(alive, key=rank)
+                alive = ranked[:max(1, len(ranked) // eta)]
+                if verbose:
+                    print(f"Rung {rung + 1} ({budget} epochs): {len(alive)} of {len(ranked)} trials continue")
+
+    best = min(alive, key=rank)
+    return history, dict(params[best]), scores[best]
@@ -0,0 +1,170 @@
+"""
+Serving the notebook's trained RegressionDNN: a self-contained TorchScript artifact and a
+micro-batching predictor, used by the /predict endpoint of web_interface.py.
+
+export_model() wraps the model with the scaler statistics (and, for a model trained on
+selected features, the choice of columns) so the artifact takes raw feature rows in CSV
+column order. It is saved as TorchScript, optionally with dynamically quantized int8
+Linear layers for CPU execution, and carries its column names as meta.json.
+
+    # in the notebook, after training
+    from inference import export_model
+    export_model(model, 'covid_model.pt', covid.columns, covid.mean, covid.scale,
+                 features=combined_selected_features)
+
+    REG_MODEL_PATH=covid_model.pt python web_interface.py web
+
+MicroBatcher collects the rows of concurrent requests for up to max_wait seconds and
+answers them all with one forward pass. benchmarks/bench_predict.py measures it.
+"""
+import copy
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+
+class ServingModel(nn.Module):
+    """
+    Standardize raw rows, keep the model's input columns, run the model: (n, columns) -> (n,).
+    """
+    def __init__(self, model: nn.Module, mean, scale, feature_index):
+        super().__init__()
+        self.register_buffer('mean', torch.as_tensor(np.asarray(mean), dtype=torch.float32))
+        self.register_buffer('scale', torch.as_tensor(np.asarray(scale), dtype=torch.float32))
+        self.register_buffer('feature_index', torch.as_tensor(feature_index, dtype=torch.long))
+        self.model = model
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = (x - self.mean) / self.scale
+        return self.model(x.index_select(1, self.feature_index)).squeeze(1)
+
+
+def export_model(model: nn.Module, path: str, columns, mean, scale, features=None, quantize: bool = False):
+    """
+    Save model with its preprocessing as a TorchScript file. columns, mean and scale
+    describe the raw rows (see preprocess.CovidData); features are the columns the model
+    was trained on, in order (default: all of them). quantize stores int8 Linear weights.
+    """
+    columns = list(columns)
+    features = list(features) if features is not None else columns
+    missing = [f for f in features if f not in columns]
+    if missing:
+        raise ValueError(f"features not among the columns: {missing}")
+    serving = ServingModel(copy.deepcopy(model).cpu(), mean, scale, [columns.index(f) for f in features]).eval()
+    if quantize:
+        serving = torch.ao.quantization.quantize_dynamic(serving, {nn.Linear}, dtype=torch.qint8)
+    scripted = torch.jit.script(serving)
+    meta = {'columns': columns, 'features': features, 'quantized': quantize, 'torch': torch.__version__}
+    torch.jit.save(scripted, path, _extra_files={'meta.json': json.dumps(meta)})
+    return meta
+
+
+class Predictor:
+    """
+    A loaded artifact. predict() takes a float32 array of raw rows and returns one value per row.
+    """
+    def __init__(self, path: str, threads: int = None):
+        if threads:
+            torch.set_num_threads(threads)
+        extra = {'meta.json': ''}
+        self.module = torch.jit.load(path, map_location='cpu', _extra_files=extra)
+        self.module.eval()
+        self.meta = json.loads(extra['meta.json'])
+        self.columns = self.meta['columns']
+
+    def rows(self, instances) -> np.ndarray:
+        """
+        JSON instances as a float32 array: each one a list of values in column order or an
+        object keyed by column name.
+        """
+        if not isinstance(instances, list) or not instances:
+            raise ValueError('instances must be a non-empty list')
+        out = np.empty((len(instances), len(self.columns)), dtype=np.float32)
+        for i, item in enumerate(instances):
+            if isinstance(item, dict):
+                missing = [c for c in self.columns if c not in item]
+                if missing:
+                    raise ValueError(f"instance {i} lacks {len(missing)} columns, e.g. {missing[0]}")
+                item = [item[c] for c in self.columns]
+            if not isinstance(item, list) or len(item) != len(self.columns):
+                raise ValueError(f"instance {i} must have {len(self.columns)} values")
+            try:
+                out[i] = item
+            except (TypeError, ValueError):
+                raise ValueError(f"instance {i} has a value that is not a number")
+        return out
+
+    def predict(self, rows: np.ndarray) -> np.ndarray:
+        with torch.no_grad():
+            return self.module(torch.from_numpy(rows)).numpy()
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a Predictor: predict() queues its rows, and one
+    thread runs whatever has arrived within max_wait seconds (up to max_rows rows) as a
+    single forward pass. on_batch(rows, seconds) is called after each pass.
+    """
+    def __init__(self, predictor: Predictor, max_rows: int = 256, max_wait: float = 0.002, on_batch=None):
+        self.predictor = predictor
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='predict-batcher', daemon=True)
+        self._thread.start()
+
+    def predict(self, rows: np.ndarray, timeout: float = None) -> np.ndarray:
+        future = Future()
+        self._queue.put((rows, future))
+        return future.result(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch, n = [item], len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while n < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                n += len(item[0])
+            self._forward(batch, n)
+            if stop:
+                return
+
+    def _forward(self, batch: list, n: int):
+        start = time.perf_counter()
+        try:
+            out = self.predictor.predict(batch[0][0] if len(batch) == 1 else np.concatenate([r for r, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        offset = 0
+        for rows, future in batch:
+            future.set_result(out[offset:offset + len(rows)])
+            offset += len(rows)
+        if self.on_batch is not None:
+            self.on_batch(n, time.perf_counter() - start)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
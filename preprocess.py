@@ -0,0 +1,119 @@
+"""
+Cached preprocessing for covid.train.csv / covid.test.csv (ML_Project1.ipynb).
+
+The first call parses both CSVs straight into float32, standardizes the features with the
+training set's mean and standard deviation (what StandardScaler computes) and saves every
+array as an .npy file in a cache directory named after the SHA-256 of the two files. Later
+calls with the same files only hash them and memory-map the saved arrays, so a rerun starts
+in milliseconds and pages in only the data it touches; editing either file changes the key
+and rebuilds the cache.
+
+    from preprocess import load_covid
+    covid = load_covid('/content/covid.train.csv', '/content/covid.test.csv')
+    X_train_tensor = torch.from_numpy(covid.X_train)   # no copy
+    y_train_tensor = torch.from_numpy(covid.y_train).reshape(-1, 1)
+
+The arrays are opened copy-on-write: they can be modified (torch.from_numpy needs that),
+but changes stay in memory and never reach the cache files.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1   # bump when the cached arrays change meaning
+CACHE_DIR = os.environ.get('COVID_CACHE_DIR')   # default: .covid_cache next to the training file
+TARGET = 'tested_positive.2'
+ARRAYS = ('train_ids', 'X_train_raw', 'y_train', 'test_ids', 'X_test_raw', 'mean', 'scale', 'X_train', 'X_test')
+
+
+class CovidData(NamedTuple):
+    columns: list            # feature names, in array column order
+    train_ids: np.ndarray
+    X_train_raw: np.ndarray  # float32 features as read
+    y_train: np.ndarray      # float32 target
+    test_ids: np.ndarray
+    X_test_raw: np.ndarray
+    mean: np.ndarray         # per-feature training mean (StandardScaler.mean_)
+    scale: np.ndarray        # per-feature training std, 1 where it is 0 (StandardScaler.scale_)
+    X_train: np.ndarray      # standardized float32 features
+    X_test: np.ndarray
+
+    def frames(self):
+        """
+        (train_df, test_df) as the CSVs read them, with id, the features and (train only) the target.
+        """
+        train = pd.DataFrame(self.X_train_raw, columns=self.columns)
+        train.insert(0, 'id', self.train_ids)
+        train[TARGET] = self.y_train
+        test = pd.DataFrame(self.X_test_raw, columns=self.columns)
+        test.insert(0, 'id', self.test_ids)
+        return train, test
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_float32(path: str) -> pd.DataFrame:
+    # Parsed as float32 column by column; no float64 frame of the whole file is built
+    return pd.read_csv(path, dtype=np.float32)
+
+
+def _build(train_path: str, test_path: str) -> tuple:
+    train = _read_float32(train_path)
+    test = _read_float32(test_path)
+    columns = [c for c in train.columns if c not in ('id', TARGET)]
+    if list(test.columns) != ['id'] + columns:
+        raise ValueError(f"{test_path} does not have the training file's feature columns")
+    X_train_raw = np.ascontiguousarray(train[columns].to_numpy(np.float32))
+    X_test_raw = np.ascontiguousarray(test[columns].to_numpy(np.float32))
+    # Statistics accumulated in float64 for accuracy, stored and applied in float32
+    mean = X_train_raw.mean(axis=0, dtype=np.float64)
+    std = X_train_raw.std(axis=0, dtype=np.float64)
+    scale = np.where(std > 0, std, 1.0)
+    mean, scale = mean.astype(np.float32), scale.astype(np.float32)
+    X_train = (X_train_raw - mean) / scale
+    X_test = (X_test_raw - mean) / scale
+    arrays = {
+        'train_ids': train['id'].to_numpy(np.int64), 'X_train_raw': X_train_raw,
+        'y_train': train[TARGET].to_numpy(np.float32),
+        'test_ids': test['id'].to_numpy(np.int64), 'X_test_raw': X_test_raw,
+        'mean': mean, 'scale': scale, 'X_train': X_train, 'X_test': X_test,
+    }
+    return columns, arrays
+
+
+def load_covid(train_path: str, test_path: str, cache_dir: str = None) -> CovidData:
+    """
+    The preprocessed train/test data, from the cache if it holds these exact files.
+    """
+    cache_dir = cache_dir or CACHE_DIR or os.path.join(os.path.dirname(os.path.abspath(train_path)), '.covid_cache')
+    key = hashlib.sha256(f"{FORMAT_VERSION}:{file_digest(train_path)}:{file_digest(test_path)}".encode()).hexdigest()[:24]
+    entry = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry):
+        columns, arrays = _build(train_path, test_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written under a temporary name and renamed, so a half-written entry is never read
+        tmp = tempfile.mkdtemp(prefix='.build-', dir=cache_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), array)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'columns': columns, 'train': os.path.abspath(train_path),
+                       'test': os.path.abspath(test_path)}, f)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)   # another run saved the same entry first
+    with open(os.path.join(entry, 'meta.json')) as f:
+        columns = json.load(f)['columns']
+    return CovidData(columns, *(np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='c') for name in ARRAYS))
@@ -6,6 +6,16 @@
 
 SET DEFINE OFF;
 
+-- Request types for process_enrollment_batch (schema-level so SQL*Plus and drivers can build them)
+CREATE OR REPLACE TYPE enrollment_req_t AS OBJECT (
+    op      VARCHAR2(6),    -- 'enroll' or 'drop'
+    b#      VARCHAR2(20),
+    classid VARCHAR2(20)
+);
+/
+CREATE OR REPLACE TYPE enrollment_req_tab AS TABLE OF enrollment_req_t;
+/
+
 -- PACKAGE HEADER
 
 CREATE OR REPLACE PACKAGE reg_pkg IS
@@ -17,7 +27,30 @@ CREATE OR REPLACE PACKAGE reg_pkg IS
     PROCEDURE show_score_grade;
     PROCEDURE show_g_enrollments;
     PROCEDURE show_prerequisites;
-    PROCEDURE show_logs;
+    -- Logs with op_time >= p_from and < p_to ('YYYY-MM-DD HH24:MI:SS'), archive included.
+    -- Without a range only the recent months (c_recent_log_months) still in logs are read.
+    PROCEDURE show_logs(p_from IN VARCHAR2 DEFAULT NULL, p_to IN VARCHAR2 DEFAULT NULL);
+
+    -- Paginated variants using keyset (seek) cursors. Each prints at most p_limit rows
+    -- and, when more rows follow, a final 'NEXT: <cursor>' line to pass back as p_after/p_before.
+    -- show_logs_page optionally keeps to op_time >= p_from and < p_to ('YYYY-MM-DD HH24:MI:SS').
+    PROCEDURE show_students_page(p_after IN students.b#%TYPE, p_limit IN NUMBER);
+    PROCEDURE show_g_enrollments_page(p_after_b# IN g_enrollments.g_b#%TYPE,
+                                      p_after_classid IN g_enrollments.classid%TYPE,
+                                      p_limit IN NUMBER);
+    PROCEDURE show_logs_page(p_before IN logs.log#%TYPE, p_limit IN NUMBER,
+                             p_from IN VARCHAR2 DEFAULT NULL, p_to IN VARCHAR2 DEFAULT NULL);
+
+    -- Dashboard figures, one 'label: value' line each: the current term and the table counts
+    PROCEDURE show_summary;
+
+    -- Asynchronous audit log: move up to p_max_rows (NULL: all) queued rows into logs and commit.
+    -- Run by the LOG_QUEUE_DRAIN job (sequence_triggers.sql) when the triggers queue their rows.
+    PROCEDURE flush_log_queue(p_max_rows IN NUMBER DEFAULT 5000);
+
+    -- Retention: move every logs partition wholly older than the last p_keep_months months
+    -- into logs_archive and drop it. Run daily by the LOGS_ARCHIVE job (sequence_triggers.sql).
+    PROCEDURE archive_logs(p_keep_months IN NUMBER DEFAULT 6);
 
     -- Procedure 3 & 4: Query procedures
     PROCEDURE list_students_in_class(p_classid IN classes.classid%TYPE);
@@ -27,6 +60,12 @@ CREATE OR REPLACE PACKAGE reg_pkg IS
     PROCEDURE enroll_grad_student(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE);
     PROCEDURE drop_grad_student(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE);
     PROCEDURE delete_student(p_b# IN students.b#%TYPE);
+
+    -- The term enroll/drop treat as current (reg_config); takes effect for every session at once
+    PROCEDURE set_current_term(p_year IN classes.year%TYPE, p_semester IN classes.semester%TYPE);
+
+    -- Batch enroll/drop for registration-day bursts: one session, one output line per request
+    PROCEDURE process_enrollment_batch(p_requests IN enrollment_req_tab, p_commit_every IN NUMBER DEFAULT 0);
 END reg_pkg;
 /
 
@@ -36,6 +75,9 @@ END reg_pkg;
 
 CREATE OR REPLACE PACKAGE BODY reg_pkg IS
 
+    -- show_logs without a range: the current month and the one before, at most two partitions of logs
+    c_recent_log_months CONSTANT PLS_INTEGER := 2;
+
     -- Procedure 2: Display all table contents (8 procedures)
     PROCEDURE show_students IS
     BEGIN
@@ -86,12 +128,239 @@ CREATE OR REPLACE PACKAGE BODY reg_pkg IS
         END LOOP;
     END;
 
-    PROCEDURE show_logs IS
+    PROCEDURE show_logs(p_from IN VARCHAR2 DEFAULT NULL, p_to IN VARCHAR2 DEFAULT NULL) IS
+        v_from DATE := TO_DATE(p_from, 'YYYY-MM-DD HH24:MI:SS');
+        v_to DATE := TO_DATE(p_to, 'YYYY-MM-DD HH24:MI:SS');
+        v_logs SYS_REFCURSOR;
+        rec logs%ROWTYPE;
+    BEGIN
+        -- Both branches bound op_time, so only the partitions in range are read
+        IF v_from IS NULL AND v_to IS NULL THEN
+            OPEN v_logs FOR
+                SELECT * FROM logs
+                WHERE op_time >= ADD_MONTHS(TRUNC(SYSDATE, 'MM'), 1 - c_recent_log_months)
+                ORDER BY log# DESC;
+        ELSE
+            OPEN v_logs FOR
+                SELECT * FROM logs_history
+                WHERE op_time >= NVL(v_from, DATE '0001-01-01') AND op_time < NVL(v_to, DATE '9999-12-31')
+                ORDER BY log# DESC;
+        END IF;
+        LOOP
+            FETCH v_logs INTO rec;
+            EXIT WHEN v_logs%NOTFOUND;
+            DBMS_OUTPUT.PUT_LINE('[' || rec.log# || '] ' || rec.user_name || ' ' || rec.operation ||
+                                 ' on ' || rec.table_name || ' → ' || rec.tuple_keyvalue);
+        END LOOP;
+        CLOSE v_logs;
+    END;
+
+    -- Paginated listings: seek past the last key of the previous page instead of OFFSET,
+    -- so every page is one index range scan of at most p_limit + 1 rows.
+    -- The first page is its own statement: 'p_after IS NULL OR b# > p_after' is an OR the
+    -- optimizer cannot use as an index access predicate.
+    PROCEDURE show_students_page(p_after IN students.b#%TYPE, p_limit IN NUMBER) IS
+        v_n NUMBER := 0;
+        v_last students.b#%TYPE;
+        v_rows SYS_REFCURSOR;
+        v_b# students.b#%TYPE;
+        v_first students.first_name%TYPE;
+        v_last_name students.last_name%TYPE;
+    BEGIN
+        IF p_after IS NULL THEN
+            OPEN v_rows FOR
+                SELECT b#, first_name, last_name FROM students
+                ORDER BY b#
+                FETCH FIRST p_limit + 1 ROWS ONLY;
+        ELSE
+            OPEN v_rows FOR
+                SELECT b#, first_name, last_name FROM students
+                WHERE b# > p_after
+                ORDER BY b#
+                FETCH FIRST p_limit + 1 ROWS ONLY;
+        END IF;
+        LOOP
+            FETCH v_rows INTO v_b#, v_first, v_last_name;
+            EXIT WHEN v_rows%NOTFOUND;
+            v_n := v_n + 1;
+            IF v_n > p_limit THEN
+                DBMS_OUTPUT.PUT_LINE('NEXT: ' || v_last);
+                EXIT;
+            END IF;
+            DBMS_OUTPUT.PUT_LINE(v_b# || ' ' || v_first || ' ' || v_last_name);
+            v_last := v_b#;
+        END LOOP;
+        CLOSE v_rows;
+    END;
+
+    PROCEDURE show_g_enrollments_page(p_after_b# IN g_enrollments.g_b#%TYPE,
+                                      p_after_classid IN g_enrollments.classid%TYPE,
+                                      p_limit IN NUMBER) IS
+        v_n NUMBER := 0;
+        v_last_b# g_enrollments.g_b#%TYPE;
+        v_last_classid g_enrollments.classid%TYPE;
+        v_rows SYS_REFCURSOR;
+        v_g_b# g_enrollments.g_b#%TYPE;
+        v_classid g_enrollments.classid%TYPE;
+        v_score g_enrollments.score%TYPE;
+    BEGIN
+        IF p_after_b# IS NULL THEN
+            OPEN v_rows FOR
+                SELECT g_b#, classid, score FROM g_enrollments
+                ORDER BY g_b#, classid
+                FETCH FIRST p_limit + 1 ROWS ONLY;
+        ELSE
+            -- g_b# >= p_after_b# is the range start on the (g_b#, classid) key; the OR only filters
+            OPEN v_rows FOR
+                SELECT g_b#, classid, score FROM g_enrollments
+                WHERE g_b# >= p_after_b#
+                  AND (g_b# > p_after_b# OR classid > p_after_classid)
+                ORDER BY g_b#, classid
+                FETCH FIRST p_limit + 1 ROWS ONLY;
+        END IF;
+        LOOP
+            FETCH v_rows INTO v_g_b#, v_classid, v_score;
+            EXIT WHEN v_rows%NOTFOUND;
+            v_n := v_n + 1;
+            IF v_n > p_limit THEN
+                DBMS_OUTPUT.PUT_LINE('NEXT: ' || v_last_b# || ',' || v_last_classid);
+                EXIT;
+            END IF;
+            DBMS_OUTPUT.PUT_LINE(v_g_b# || ' - ' || v_classid || ' - ' || NVL(TO_CHAR(v_score), 'N/A'));
+            v_last_b# := v_g_b#;
+            v_last_classid := v_classid;
+        END LOOP;
+        CLOSE v_rows;
+    END;
+
+    PROCEDURE show_logs_page(p_before IN logs.log#%TYPE, p_limit IN NUMBER,
+                             p_from IN VARCHAR2 DEFAULT NULL, p_to IN VARCHAR2 DEFAULT NULL) IS
+        v_n NUMBER := 0;
+        v_last logs.log#%TYPE;
+        v_from DATE := NVL(TO_DATE(p_from, 'YYYY-MM-DD HH24:MI:SS'), DATE '0001-01-01');
+        v_to DATE := NVL(TO_DATE(p_to, 'YYYY-MM-DD HH24:MI:SS'), DATE '9999-12-31');
+        v_logs SYS_REFCURSOR;
+        rec logs%ROWTYPE;
     BEGIN
-        FOR rec IN (SELECT * FROM logs ORDER BY log# DESC) LOOP
+        -- As in show_logs, an unset end of the range is a far-off date rather than an IS NULL OR,
+        -- so op_time stays a partition and index bound
+        IF p_before IS NULL THEN
+            OPEN v_logs FOR
+                SELECT * FROM logs
+                WHERE op_time >= v_from AND op_time < v_to
+                ORDER BY log# DESC
+                FETCH FIRST p_limit + 1 ROWS ONLY;
+        ELSE
+            OPEN v_logs FOR
+                SELECT * FROM logs
+                WHERE log# < p_before AND op_time >= v_from AND op_time < v_to
+                ORDER BY log# DESC
+                FETCH FIRST p_limit + 1 ROWS ONLY;
+        END IF;
+        LOOP
+            FETCH v_logs INTO rec;
+            EXIT WHEN v_logs%NOTFOUND;
+            v_n := v_n + 1;
+            IF v_n > p_limit THEN
+                DBMS_OUTPUT.PUT_LINE('NEXT: ' || v_last);
+                EXIT;
+            END IF;
             DBMS_OUTPUT.PUT_LINE('[' || rec.log# || '] ' || rec.user_name || ' ' || rec.operation ||
                                  ' on ' || rec.table_name || ' → ' || rec.tuple_keyvalue);
+            v_last := rec.log#;
         END LOOP;
+        CLOSE v_logs;
+    END;
+
+    PROCEDURE show_summary IS
+        v_year reg_config.current_year%TYPE;
+        v_semester reg_config.current_semester%TYPE;
+        v_classes NUMBER;
+        v_current NUMBER;
+        v_full NUMBER;
+        v_n NUMBER;
+    BEGIN
+        SELECT current_year, current_semester INTO v_year, v_semester FROM reg_config;
+        SELECT COUNT(*),
+               COUNT(CASE WHEN year = v_year AND semester = v_semester THEN 1 END),
+               COUNT(CASE WHEN year = v_year AND semester = v_semester AND class_size >= "LIMIT" THEN 1 END)
+        INTO v_classes, v_current, v_full
+        FROM classes;
+        DBMS_OUTPUT.PUT_LINE('Current term: ' || v_semester || ' ' || v_year);
+        SELECT COUNT(*) INTO v_n FROM students;
+        DBMS_OUTPUT.PUT_LINE('Students: ' || v_n);
+        SELECT COUNT(*) INTO v_n FROM courses;
+        DBMS_OUTPUT.PUT_LINE('Courses: ' || v_n);
+        DBMS_OUTPUT.PUT_LINE('Classes: ' || v_classes || ' (' || v_current || ' this term, ' || v_full || ' full)');
+        SELECT COUNT(*) INTO v_n FROM g_enrollments;
+        DBMS_OUTPUT.PUT_LINE('Enrollments: ' || v_n);
+    END;
+
+    PROCEDURE flush_log_queue(p_max_rows IN NUMBER DEFAULT 5000) IS
+        TYPE t_rowids IS TABLE OF ROWID;
+        v_rowids t_rowids;
+        -- SKIP LOCKED: a manual call running alongside the job drains different rows
+        CURSOR c_queue IS SELECT ROWID FROM log_queue ORDER BY enq_time FOR UPDATE SKIP LOCKED;
+    BEGIN
+        OPEN c_queue;
+        IF p_max_rows IS NULL THEN
+            FETCH c_queue BULK COLLECT INTO v_rowids;
+        ELSE
+            FETCH c_queue BULK COLLECT INTO v_rowids LIMIT p_max_rows;
+        END IF;
+        CLOSE c_queue;
+
+        FORALL i IN 1 .. v_rowids.COUNT
+            INSERT INTO logs(log#, user_name, op_time, table_name, operation, tuple_keyvalue)
+            SELECT log_seq.NEXTVAL, user_name, op_time, table_name, operation, tuple_keyvalue
+            FROM log_queue WHERE ROWID = v_rowids(i);
+
+        FORALL i IN 1 .. v_rowids.COUNT
+            DELETE FROM log_queue WHERE ROWID = v_rowids(i);
+
+        COMMIT;
+        DBMS_OUTPUT.PUT_LINE('Flushed ' || v_rowids.COUNT || ' log records.');
+    END;
+
+    PROCEDURE archive_logs(p_keep_months IN NUMBER DEFAULT 6) IS
+        TYPE t_names IS TABLE OF user_tab_partitions.partition_name%TYPE;
+        TYPE t_bounds IS TABLE OF VARCHAR2(4000);
+        v_names t_names := t_names();
+        v_bounds t_bounds := t_bounds();
+        v_cutoff DATE := ADD_MONTHS(TRUNC(SYSDATE, 'MM'), -p_keep_months);
+        v_high DATE;
+        v_rows NUMBER;
+        v_total NUMBER := 0;
+        e_last_range EXCEPTION;   -- the lowest partition of an interval table cannot be dropped
+        PRAGMA EXCEPTION_INIT(e_last_range, -14758);
+    BEGIN
+        -- high_value is a LONG holding a DATE literal; collect before any DDL runs
+        FOR p IN (SELECT partition_name, high_value FROM user_tab_partitions
+                  WHERE table_name = 'LOGS' ORDER BY partition_position) LOOP
+            v_names.EXTEND;
+            v_bounds.EXTEND;
+            v_names(v_names.COUNT) := p.partition_name;
+            v_bounds(v_bounds.COUNT) := p.high_value;
+        END LOOP;
+
+        FOR i IN 1 .. v_names.COUNT LOOP
+            EXECUTE IMMEDIATE 'SELECT ' || v_bounds(i) || ' FROM dual' INTO v_high;
+            EXIT WHEN v_high > v_cutoff;
+
+            EXECUTE IMMEDIATE 'INSERT /*+ APPEND */ INTO logs_archive SELECT * FROM logs PARTITION ('
+                              || v_names(i) || ')';
+            v_rows := SQL%ROWCOUNT;
+            COMMIT;
+            BEGIN
+                EXECUTE IMMEDIATE 'ALTER TABLE logs DROP PARTITION ' || v_names(i) || ' UPDATE GLOBAL INDEXES';
+            EXCEPTION
+                WHEN e_last_range THEN
+                    EXECUTE IMMEDIATE 'ALTER TABLE logs TRUNCATE PARTITION ' || v_names(i) || ' UPDATE GLOBAL INDEXES';
+            END;
+            v_total := v_total + v_rows;
+        END LOOP;
+        DBMS_OUTPUT.PUT_LINE('Archived ' || v_total || ' log records older than ' ||
+                             TO_CHAR(v_cutoff, 'YYYY-MM-DD') || '.');
     END;
 
     -- Procedure 3: List students in a given class
@@ -117,7 +386,7 @@ CREATE OR REPLACE PACKAGE BODY reg_pkg IS
 
    
     -- Procedure 4: List direct and indirect prerequisites
-    -- Recursive SQL using CONNECT BY
+    -- Read from prereq_closure (kept up to date by trg_prereq_closure), nearest first
     PROCEDURE list_prerequisites(p_dept IN courses.dept_code%TYPE, p_course IN courses.course#%TYPE) IS
         v_exists NUMBER;
     BEGIN
@@ -129,75 +398,111 @@ CREATE OR REPLACE PACKAGE BODY reg_pkg IS
 
         FOR rec IN (
             SELECT pre_dept_code || pre_course# AS prerequisite
-            FROM prerequisites
-            START WITH dept_code = p_dept AND course# = p_course
-            CONNECT BY PRIOR pre_dept_code = dept_code AND PRIOR pre_course# = course#
+            FROM prereq_closure
+            WHERE dept_code = p_dept AND course# = p_course
+            ORDER BY depth, pre_dept_code, pre_course#
         ) LOOP
             DBMS_OUTPUT.PUT_LINE(rec.prerequisite);
         END LOOP;
     END;
 
-   
+
+    FUNCTION is_current_term(p_year IN classes.year%TYPE, p_semester IN classes.semester%TYPE) RETURN BOOLEAN IS
+        v_exists NUMBER;
+    BEGIN
+        SELECT COUNT(*) INTO v_exists FROM reg_config
+        WHERE current_year = p_year AND current_semester = p_semester;
+        RETURN v_exists > 0;
+    END;
+
+    -- The student's class count for a term from student_term_load, with the row locked so
+    -- concurrent adds and drops for one student are checked one after another. The row is
+    -- created (at 0) on the student's first enrollment of the term.
+    FUNCTION lock_term_load(p_b# IN students.b#%TYPE, p_year IN classes.year%TYPE,
+                            p_semester IN classes.semester%TYPE) RETURN NUMBER IS
+        v_count student_term_load.n_classes%TYPE;
+    BEGIN
+        LOOP
+            BEGIN
+                SELECT n_classes INTO v_count FROM student_term_load
+                WHERE b# = p_b# AND year = p_year AND semester = p_semester
+                FOR UPDATE;
+                RETURN v_count;
+            EXCEPTION WHEN NO_DATA_FOUND THEN
+                BEGIN
+                    INSERT INTO student_term_load(b#, year, semester, n_classes)
+                    VALUES (p_b#, p_year, p_semester, 0);
+                    RETURN 0;
+                EXCEPTION WHEN DUP_VAL_ON_INDEX THEN
+                    NULL;   -- another session created it first: go round and lock theirs
+                END;
+            END;
+        END LOOP;
+    END;
+
     -- Procedure 5: Enroll graduate student into a class
     -- Validations: student, level, class existence, semester, limit, duplicate, 5-class max, prerequisite
-    PROCEDURE enroll_grad_student(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE) IS
+    -- One query per table: the class row is read once and locked FOR UPDATE so concurrent
+    -- enrollments into the same class queue up behind each other instead of overbooking it,
+    -- the semester load is one locked student_term_load row, and the direct prerequisites
+    -- are checked in a single anti-join. Only direct ones: prereq_closure also holds the
+    -- indirect prerequisites, which enrollment has never required.
+    FUNCTION try_enroll(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE) RETURN VARCHAR2 IS
         v_level students.st_level%TYPE;
-        v_year classes.year%TYPE;
-        v_semester classes.semester%TYPE;
+        v_class classes%ROWTYPE;
+        v_enrolled NUMBER;
         v_count NUMBER;
-        v_limit NUMBER;
-        v_size NUMBER;
-        v_exists NUMBER;
+        v_missing NUMBER;
     BEGIN
-        SELECT COUNT(*) INTO v_exists FROM students WHERE b# = p_b#;
-        IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('The B# is invalid.'); RETURN; END IF;
-
-        SELECT st_level INTO v_level FROM students WHERE b# = p_b#;
-        IF v_level NOT IN ('master', 'PhD') THEN DBMS_OUTPUT.PUT_LINE('This is not a graduate student.'); RETURN; END IF;
-
-        SELECT COUNT(*) INTO v_exists FROM classes WHERE classid = p_classid;
-        IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('The classid is invalid.'); RETURN; END IF;
-
-        SELECT year, semester INTO v_year, v_semester FROM classes WHERE classid = p_classid;
-        IF v_year != 2021 OR v_semester != 'Spring' THEN DBMS_OUTPUT.PUT_LINE('Cannot enroll into a class from a previous semester.'); RETURN; END IF;
-
-        SELECT limit, class_size INTO v_limit, v_size FROM classes WHERE classid = p_classid;
-        IF v_size >= v_limit THEN DBMS_OUTPUT.PUT_LINE('The class is already full.'); RETURN; END IF;
-
-        SELECT COUNT(*) INTO v_exists FROM g_enrollments WHERE g_b# = p_b# AND classid = p_classid;
-        IF v_exists > 0 THEN DBMS_OUTPUT.PUT_LINE('The student is already in the class.'); RETURN; END IF;
-
-        SELECT COUNT(*) INTO v_count
-        FROM g_enrollments g JOIN classes c ON g.classid = c.classid
-        WHERE g.g_b# = p_b# AND c.semester = 'Spring' AND c.year = 2021;
-        IF v_count >= 5 THEN DBMS_OUTPUT.PUT_LINE('Students cannot be enrolled in more than five classes in the same semester.'); RETURN; END IF;
-
-        FOR pre IN (
-            SELECT pre_dept_code, pre_course#
-            FROM prerequisites
-            WHERE dept_code || course# = (
-                SELECT dept_code || course# FROM classes WHERE classid = p_classid
-            )
-        ) LOOP
-            SELECT COUNT(*) INTO v_exists
-            FROM g_enrollments g
-            JOIN classes c ON g.classid = c.classid
-            JOIN score_grade sg ON g.score = sg.score
-            WHERE g.g_b# = p_b#
-              AND c.dept_code = pre.pre_dept_code
-              AND c.course# = pre.pre_course#
-              AND sg.lgrade <= 'C';
-            IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('Prerequisite not satisfied.'); RETURN; END IF;
-        END LOOP;
+        BEGIN
+            SELECT st_level INTO v_level FROM students WHERE b# = p_b#;
+        EXCEPTION WHEN NO_DATA_FOUND THEN
+            RETURN 'The B# is invalid.';
+        END;
+        IF v_level NOT IN ('master', 'PhD') THEN RETURN 'This is not a graduate student.'; END IF;
+
+        BEGIN
+            SELECT * INTO v_class FROM classes WHERE classid = p_classid FOR UPDATE;
+        EXCEPTION WHEN NO_DATA_FOUND THEN
+            RETURN 'The classid is invalid.';
+        END;
+        IF NOT is_current_term(v_class.year, v_class.semester) THEN RETURN 'Cannot enroll into a class from a previous semester.'; END IF;
+        IF v_class.class_size >= v_class.limit THEN RETURN 'The class is already full.'; END IF;
+
+        SELECT COUNT(*) INTO v_enrolled FROM g_enrollments WHERE g_b# = p_b# AND classid = p_classid;
+        IF v_enrolled > 0 THEN RETURN 'The student is already in the class.'; END IF;
+        v_count := lock_term_load(p_b#, v_class.year, v_class.semester);
+        IF v_count >= 5 THEN RETURN 'Students cannot be enrolled in more than five classes in the same semester.'; END IF;
+
+        SELECT COUNT(*) INTO v_missing
+        FROM prerequisites p
+        WHERE p.dept_code = v_class.dept_code
+          AND p.course# = v_class.course#
+          AND NOT EXISTS (
+              SELECT 1
+              FROM g_enrollments g
+              JOIN classes c ON g.classid = c.classid
+              JOIN score_grade sg ON g.score = sg.score
+              WHERE g.g_b# = p_b#
+                AND c.dept_code = p.pre_dept_code
+                AND c.course# = p.pre_course#
+                AND sg.lgrade <= 'C'
+          );
+        IF v_missing > 0 THEN RETURN 'Prerequisite not satisfied.'; END IF;
 
         INSERT INTO g_enrollments(g_b#, classid, score) VALUES (p_b#, p_classid, NULL);
-        DBMS_OUTPUT.PUT_LINE('Enrollment successful.');
+        RETURN 'Enrollment successful.';
+    END;
+
+    PROCEDURE enroll_grad_student(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE) IS
+    BEGIN
+        DBMS_OUTPUT.PUT_LINE(try_enroll(p_b#, p_classid));
     END;
 
 
     -- Procedure 6: Drop a graduate student from a class
     -- Validations: enrollment, semester, only-class check
-    PROCEDURE drop_grad_student(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE) IS
+    FUNCTION try_drop(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE) RETURN VARCHAR2 IS
         v_level students.st_level%TYPE;
         v_exists NUMBER;
         v_count NUMBER;
@@ -205,27 +510,35 @@ CREATE OR REPLACE PACKAGE BODY reg_pkg IS
         v_semester classes.semester%TYPE;
     BEGIN
         SELECT COUNT(*) INTO v_exists FROM students WHERE b# = p_b#;
-        IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('The B# is invalid.'); RETURN; END IF;
+        IF v_exists = 0 THEN RETURN 'The B# is invalid.'; END IF;
 
         SELECT st_level INTO v_level FROM students WHERE b# = p_b#;
-        IF v_level NOT IN ('master', 'PhD') THEN DBMS_OUTPUT.PUT_LINE('This is not a graduate student.'); RETURN; END IF;
+        IF v_level NOT IN ('master', 'PhD') THEN RETURN 'This is not a graduate student.'; END IF;
 
-        SELECT COUNT(*) INTO v_exists FROM classes WHERE classid = p_classid;
-        IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('The classid is invalid.'); RETURN; END IF;
+        -- Class row first, as in try_enroll, so enroll and drop always lock class then load row
+        BEGIN
+            SELECT year, semester INTO v_year, v_semester FROM classes WHERE classid = p_classid FOR UPDATE;
+        EXCEPTION WHEN NO_DATA_FOUND THEN
+            RETURN 'The classid is invalid.';
+        END;
 
         SELECT COUNT(*) INTO v_exists FROM g_enrollments WHERE g_b# = p_b# AND classid = p_classid;
-        IF v_exists = 0 THEN DBMS_OUTPUT.PUT_LINE('The student is not enrolled in the class.'); RETURN; END IF;
+        IF v_exists = 0 THEN RETURN 'The student is not enrolled in the class.'; END IF;
 
-        SELECT year, semester INTO v_year, v_semester FROM classes WHERE classid = p_classid;
-        IF v_year != 2021 OR v_semester != 'Spring' THEN DBMS_OUTPUT.PUT_LINE('Only enrollment in the current semester can be dropped.'); RETURN; END IF;
+        IF NOT is_current_term(v_year, v_semester) THEN RETURN 'Only enrollment in the current semester can be dropped.'; END IF;
 
-        SELECT COUNT(*) INTO v_count
-        FROM g_enrollments g JOIN classes c ON g.classid = c.classid
-        WHERE g.g_b# = p_b# AND c.year = 2021 AND c.semester = 'Spring';
-        IF v_count = 1 THEN DBMS_OUTPUT.PUT_LINE('This is the only class for this student in Spring 2021 and cannot be dropped.'); RETURN; END IF;
+        v_count := lock_term_load(p_b#, v_year, v_semester);
+        IF v_count = 1 THEN
+            RETURN 'This is the only class for this student in ' || v_semester || ' ' || v_year || ' and cannot be dropped.';
+        END IF;
 
         DELETE FROM g_enrollments WHERE g_b# = p_b# AND classid = p_classid;
-        DBMS_OUTPUT.PUT_LINE('Drop successful.');
+        RETURN 'Drop successful.';
+    END;
+
+    PROCEDURE drop_grad_student(p_b# IN students.b#%TYPE, p_classid IN classes.classid%TYPE) IS
+    BEGIN
+        DBMS_OUTPUT.PUT_LINE(try_drop(p_b#, p_classid));
     END;
 
     -- Procedure 7: Delete a student from the system
@@ -243,5 +556,41 @@ CREATE OR REPLACE PACKAGE BODY reg_pkg IS
         DBMS_OUTPUT.PUT_LINE('Student deleted successfully.');
     END;
 
+    PROCEDURE set_current_term(p_year IN classes.year%TYPE, p_semester IN classes.semester%TYPE) IS
+    BEGIN
+        UPDATE reg_config SET current_year = p_year, current_semester = p_semester;
+        DBMS_OUTPUT.PUT_LINE('Current term set to ' || p_semester || ' ' || p_year || '.');
+    END;
+
+    -- Batch enrollment: runs every request in this one session and prints one
+    -- 'row|op|b#|classid|message' line per request, with the same messages as the single calls.
+    -- A request that raises is rolled back to its own savepoint and reported with SQLERRM;
+    -- the rest of the batch carries on. p_commit_every > 0 commits after every that many
+    -- requests; 0 leaves the whole batch to the caller's commit.
+    PROCEDURE process_enrollment_batch(p_requests IN enrollment_req_tab, p_commit_every IN NUMBER DEFAULT 0) IS
+        v_msg VARCHAR2(400);
+    BEGIN
+        FOR i IN 1 .. p_requests.COUNT LOOP
+            SAVEPOINT batch_row;
+            BEGIN
+                IF LOWER(p_requests(i).op) = 'enroll' THEN
+                    v_msg := try_enroll(p_requests(i).b#, p_requests(i).classid);
+                ELSIF LOWER(p_requests(i).op) = 'drop' THEN
+                    v_msg := try_drop(p_requests(i).b#, p_requests(i).classid);
+                ELSE
+                    v_msg := 'Unknown operation.';
+                END IF;
+            EXCEPTION WHEN OTHERS THEN
+                ROLLBACK TO batch_row;
+                v_msg := SQLERRM;
+            END;
+            DBMS_OUTPUT.PUT_LINE(i || '|' || p_requests(i).op || '|' || p_requests(i).b# || '|' ||
+                                 p_requests(i).classid || '|' || v_msg);
+            IF p_commit_every > 0 AND MOD(i, p_commit_every) = 0 THEN
+                COMMIT;
+            END IF;
+        END LOOP;
+    END;
+
 END reg_pkg;
 /
@@ -0,0 +1,635 @@
+"""
+SQLite stand-in for the Oracle reg_pkg package.
+
+Mirrors the tables in the project schema, the triggers in sequence_triggers.sql and the
+procedures in "reg_pkg (2).sql" closely enough to run and load-test the web tier locally.
+Procedures return their DBMS_OUTPUT lines, with the same messages as the PL/SQL versions.
+"""
+import getpass
+import sqlite3
+
+# Current term of a new database; afterwards it lives in reg_config (set_current_term)
+CURRENT_YEAR = 2021
+CURRENT_SEMESTER = 'Spring'
+RECENT_LOG_MONTHS = 2   # show_logs without a range: this month and the one before (c_recent_log_months)
+
+# Oracle identifiers containing '#' must be quoted in SQLite; quoting them in upper case
+# keeps the same SQL text valid on Oracle as well.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS students (
+    "B#"        TEXT PRIMARY KEY,
+    first_name  TEXT NOT NULL,
+    last_name   TEXT NOT NULL,
+    st_level    TEXT NOT NULL,
+    gpa         REAL,
+    email       TEXT UNIQUE,
+    bdate       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS courses (
+    dept_code   TEXT NOT NULL,
+    "COURSE#"   INTEGER NOT NULL,
+    title       TEXT NOT NULL,
+    PRIMARY KEY (dept_code, "COURSE#")
+);
+
+CREATE TABLE IF NOT EXISTS course_credit (
+    "COURSE#"   INTEGER PRIMARY KEY,
+    credits     INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS classes (
+    classid     TEXT PRIMARY KEY,
+    dept_code   TEXT NOT NULL,
+    "COURSE#"   INTEGER NOT NULL,
+    "SECT#"     INTEGER,
+    year        INTEGER,
+    semester    TEXT,
+    "LIMIT"     INTEGER,
+    class_size  INTEGER NOT NULL DEFAULT 0,
+    room        TEXT
+);
+
+CREATE TABLE IF NOT EXISTS score_grade (
+    score       REAL PRIMARY KEY,
+    lgrade      TEXT
+);
+
+CREATE TABLE IF NOT EXISTS g_enrollments (
+    "G_B#"      TEXT NOT NULL,
+    classid     TEXT NOT NULL,
+    score       REAL,
+    PRIMARY KEY ("G_B#", classid)
+);
+
+CREATE TABLE IF NOT EXISTS prerequisites (
+    dept_code       TEXT NOT NULL,
+    "COURSE#"       INTEGER NOT NULL,
+    pre_dept_code   TEXT NOT NULL,
+    "PRE_COURSE#"   INTEGER NOT NULL,
+    PRIMARY KEY (dept_code, "COURSE#", pre_dept_code, "PRE_COURSE#")
+);
+
+CREATE TABLE IF NOT EXISTS logs (
+    "LOG#"          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_name       TEXT NOT NULL,
+    op_time         TEXT NOT NULL,
+    table_name      TEXT NOT NULL,
+    operation       TEXT NOT NULL,
+    tuple_keyvalue  TEXT
+);
+
+-- log_seq START WITH 1000
+INSERT INTO sqlite_sequence(name, seq)
+SELECT 'logs', 999 WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'logs');
+
+-- Time-range log reads (show_logs_page p_from/p_to)
+CREATE INDEX IF NOT EXISTS logs_op_time_ix ON logs(op_time, "LOG#");
+
+-- Logs moved out of logs by archive_logs. SQLite has no partitions or table compression; the
+-- op_time indexes give the same bounded range reads the monthly partitions do on Oracle.
+CREATE TABLE IF NOT EXISTS logs_archive (
+    "LOG#"          INTEGER PRIMARY KEY,
+    user_name       TEXT NOT NULL,
+    op_time         TEXT NOT NULL,
+    table_name      TEXT NOT NULL,
+    operation       TEXT NOT NULL,
+    tuple_keyvalue  TEXT
+);
+
+CREATE INDEX IF NOT EXISTS logs_archive_op_time_ix ON logs_archive(op_time, "LOG#");
+
+CREATE VIEW IF NOT EXISTS logs_history AS
+SELECT "LOG#", user_name, op_time, table_name, operation, tuple_keyvalue FROM logs
+UNION ALL
+SELECT "LOG#", user_name, op_time, table_name, operation, tuple_keyvalue FROM logs_archive;
+
+-- Audit rows waiting for flush_log_queue when the log triggers run asynchronously
+CREATE TABLE IF NOT EXISTS log_queue (
+    user_name       TEXT NOT NULL,
+    op_time         TEXT NOT NULL,
+    table_name      TEXT NOT NULL,
+    operation       TEXT NOT NULL,
+    tuple_keyvalue  TEXT
+);
+
+-- SQLite only has FOR EACH ROW triggers, so these and the log triggers (_LOG_TRIGGERS) reproduce
+-- the effects of the compound triggers (trg_g_enrollments_dml, trg_students_delete) one row at a time.
+CREATE TRIGGER IF NOT EXISTS trg_update_class_size_insert
+AFTER INSERT ON g_enrollments
+BEGIN
+    UPDATE classes SET class_size = class_size + 1 WHERE classid = NEW.classid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_update_class_size_delete
+AFTER DELETE ON g_enrollments
+BEGIN
+    UPDATE classes SET class_size = class_size - 1 WHERE classid = OLD.classid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cascade_delete_enrollments
+AFTER DELETE ON students
+BEGIN
+    DELETE FROM g_enrollments WHERE "G_B#" = OLD."B#";
+END;
+
+-- Prerequisite closure (sequence_triggers.sql section 4). UNION keeps one row per
+-- (course, prerequisite, depth), and no shortest chain is longer than the number of
+-- distinct prerequisite courses, which is what stops the walk on circular prerequisites.
+CREATE TABLE IF NOT EXISTS prereq_closure (
+    dept_code       TEXT NOT NULL,
+    "COURSE#"       INTEGER NOT NULL,
+    pre_dept_code   TEXT NOT NULL,
+    "PRE_COURSE#"   INTEGER NOT NULL,
+    depth           INTEGER NOT NULL,
+    PRIMARY KEY (dept_code, "COURSE#", pre_dept_code, "PRE_COURSE#")
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS prereq_closure_pre_ix ON prereq_closure(pre_dept_code, "PRE_COURSE#");
+
+CREATE VIEW IF NOT EXISTS prereq_closure_v AS
+WITH RECURSIVE walk(dept_code, course, pre_dept_code, pre_course, depth) AS (
+    SELECT dept_code, "COURSE#", pre_dept_code, "PRE_COURSE#", 1 FROM prerequisites
+    UNION
+    SELECT w.dept_code, w.course, p.pre_dept_code, p."PRE_COURSE#", w.depth + 1
+    FROM walk w JOIN prerequisites p ON p.dept_code = w.pre_dept_code AND p."COURSE#" = w.pre_course
+    WHERE w.depth < (SELECT COUNT(DISTINCT pre_dept_code || '|' || "PRE_COURSE#") FROM prerequisites)
+)
+SELECT dept_code, course AS "COURSE#", pre_dept_code, pre_course AS "PRE_COURSE#", MIN(depth) AS depth
+FROM walk
+WHERE NOT (pre_dept_code = dept_code AND pre_course = course)
+GROUP BY dept_code, course, pre_dept_code, pre_course;
+
+-- Databases created before the closure table existed get it filled on first connect
+INSERT INTO prereq_closure
+SELECT * FROM prereq_closure_v WHERE NOT EXISTS (SELECT 1 FROM prereq_closure);
+'''
+
+# The audit half of trg_g_enrollments_dml / trg_students_delete. The triggers write to logs,
+# or to log_queue when the database is opened with async_log (see set_log_mode()).
+_LOG_TRIGGERS = (
+    ('trg_log_enrollment_insert', 'INSERT ON g_enrollments',
+     """'G_ENROLLMENTS', 'insert', NEW."G_B#" || ',' || NEW.classid"""),
+    ('trg_log_enrollment_delete', 'DELETE ON g_enrollments',
+     """'G_ENROLLMENTS', 'delete', OLD."G_B#" || ',' || OLD.classid"""),
+    ('trg_log_delete_student', 'DELETE ON students', """'STUDENTS', 'delete', OLD."B#\""""),
+)
+
+
+def _log_triggers(target: str) -> str:
+    return ''.join(f'''
+CREATE TRIGGER IF NOT EXISTS {name}
+AFTER {event}
+BEGIN
+    INSERT INTO {target}(user_name, op_time, table_name, operation, tuple_keyvalue)
+    VALUES (user(), datetime('now'), {values});
+END;
+''' for name, event, values in _LOG_TRIGGERS)
+
+
+SCHEMA += _log_triggers('logs')
+
+# trg_prereq_closure, one row at a time: recompute the changed course and every course whose
+# closure runs through it. Rows are updated and added before stale ones are deleted, so the
+# dependents are still findable through their old closure rows when the DELETE runs. (No
+# INSERT OR REPLACE: an outer statement's conflict clause would override it.)
+_PREREQ_ROOTS = '''(({t}.dept_code = {row}.dept_code AND {t}."COURSE#" = {row}."COURSE#")
+           OR ({t}.dept_code, {t}."COURSE#") IN (SELECT dept_code, "COURSE#" FROM prereq_closure
+                                               WHERE pre_dept_code = {row}.dept_code AND "PRE_COURSE#" = {row}."COURSE#"))'''
+_PREREQ_CLOSURE_REFRESH = '''
+    UPDATE prereq_closure
+    SET depth = v.depth
+    FROM prereq_closure_v AS v
+    WHERE {roots_pc}
+      AND v.dept_code = prereq_closure.dept_code AND v."COURSE#" = prereq_closure."COURSE#"
+      AND v.pre_dept_code = prereq_closure.pre_dept_code AND v."PRE_COURSE#" = prereq_closure."PRE_COURSE#"
+      AND v.depth != prereq_closure.depth;
+    INSERT INTO prereq_closure
+    SELECT * FROM prereq_closure_v AS v
+    WHERE {roots_v}
+      AND NOT EXISTS (SELECT 1 FROM prereq_closure pc
+                      WHERE pc.dept_code = v.dept_code AND pc."COURSE#" = v."COURSE#"
+                        AND pc.pre_dept_code = v.pre_dept_code AND pc."PRE_COURSE#" = v."PRE_COURSE#");
+    DELETE FROM prereq_closure
+    WHERE {roots_pc}
+      AND (dept_code, "COURSE#", pre_dept_code, "PRE_COURSE#", depth) NOT IN (SELECT * FROM prereq_closure_v);
+'''
+SCHEMA += ''.join(
+    f'''
+CREATE TRIGGER IF NOT EXISTS trg_prereq_closure_{event.lower()}
+AFTER {event} ON prerequisites
+BEGIN{''.join(_PREREQ_CLOSURE_REFRESH.format(roots_pc=_PREREQ_ROOTS.format(t='prereq_closure', row=row),
+                                              roots_v=_PREREQ_ROOTS.format(t='v', row=row)) for row in rows)}END;
+''' for event, rows in (('INSERT', ('NEW',)), ('UPDATE', ('OLD', 'NEW')), ('DELETE', ('OLD',))))
+
+# reg_config and student_term_load (sequence_triggers.sql). The load triggers update the
+# existing counter and add a missing one in two steps, as the closure triggers do.
+SCHEMA += f'''
+CREATE TABLE IF NOT EXISTS reg_config (
+    id                INTEGER PRIMARY KEY CHECK (id = 1),
+    current_year      INTEGER NOT NULL,
+    current_semester  TEXT NOT NULL
+);
+
+INSERT OR IGNORE INTO reg_config(id, current_year, current_semester) VALUES (1, {CURRENT_YEAR}, '{CURRENT_SEMESTER}');
+
+CREATE TABLE IF NOT EXISTS student_term_load (
+    "B#"        TEXT NOT NULL,
+    year        INTEGER NOT NULL,
+    semester    TEXT NOT NULL,
+    n_classes   INTEGER NOT NULL,
+    PRIMARY KEY ("B#", year, semester)
+) WITHOUT ROWID;
+
+-- Databases created before the counter table existed get it filled on first connect
+INSERT INTO student_term_load
+SELECT g."G_B#", c.year, c.semester, COUNT(*)
+FROM g_enrollments g JOIN classes c ON g.classid = c.classid
+WHERE NOT EXISTS (SELECT 1 FROM student_term_load)
+GROUP BY g."G_B#", c.year, c.semester;
+
+CREATE TRIGGER IF NOT EXISTS trg_student_term_load_insert
+AFTER INSERT ON g_enrollments
+BEGIN
+    UPDATE student_term_load
+    SET n_classes = n_classes + 1
+    WHERE "B#" = NEW."G_B#"
+      AND (year, semester) = (SELECT year, semester FROM classes WHERE classid = NEW.classid);
+    INSERT INTO student_term_load("B#", year, semester, n_classes)
+    SELECT NEW."G_B#", c.year, c.semester, 1 FROM classes c
+    WHERE c.classid = NEW.classid
+      AND NOT EXISTS (SELECT 1 FROM student_term_load l
+                      WHERE l."B#" = NEW."G_B#" AND l.year = c.year AND l.semester = c.semester);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_student_term_load_delete
+AFTER DELETE ON g_enrollments
+BEGIN
+    UPDATE student_term_load
+    SET n_classes = n_classes - 1
+    WHERE "B#" = OLD."G_B#"
+      AND (year, semester) = (SELECT year, semester FROM classes WHERE classid = OLD.classid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_student_term_load_student_delete
+AFTER DELETE ON students
+BEGIN
+    DELETE FROM student_term_load WHERE "B#" = OLD."B#";
+END;
+'''
+
+# Procedures callable through RegPkg.call(), i.e. the public part of the package header.
+PROCEDURES = (
+    'show_students', 'show_courses', 'show_classes', 'show_course_credit',
+    'show_score_grade', 'show_g_enrollments', 'show_prerequisites', 'show_logs',
+    'show_students_page', 'show_g_enrollments_page', 'show_logs_page', 'show_summary',
+    'list_students_in_class', 'list_prerequisites',
+    'enroll_grad_student', 'drop_grad_student', 'delete_student',
+    'process_enrollment_batch', 'flush_log_queue', 'archive_logs', 'set_current_term',
+)
+
+
+def connect(path: str, user_name: str = None, async_log: bool = None) -> sqlite3.Connection:
+    """
+    Open (and if needed create) a reg_pkg database at the given path.
+    async_log switches the log triggers between logs and log_queue; None leaves them as they are.
+    """
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.create_function('user', 0, lambda: user_name or getpass.getuser().upper())
+    # Oracle's TO_DATE for the 'YYYY-MM-DD HH24:MI:SS' strings the shared SQL binds; SQLite
+    # stores op_time in that same text form, so the string itself compares correctly.
+    conn.create_function('to_date', 2, lambda value, fmt: value, deterministic=True)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    if async_log is not None:
+        set_log_mode(conn, async_log)
+    return conn
+
+
+def set_log_mode(conn: sqlite3.Connection, async_log: bool):
+    """
+    Point the log triggers at log_queue (async_log) or straight at logs.
+    """
+    target = 'log_queue' if async_log else 'logs'
+    current = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                           (_LOG_TRIGGERS[0][0],)).fetchone()
+    if current and f'INSERT INTO {target}(' in current[0]:
+        return
+    with conn:
+        for name, _, _ in _LOG_TRIGGERS:
+            conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        for statement in _log_triggers(target).split('END;')[:-1]:
+            conn.execute(statement + 'END;')
+        if not async_log:
+            # Rows queued before switching back go over now, as in sequence_triggers.sql section 6
+            conn.execute('INSERT INTO logs(user_name, op_time, table_name, operation, tuple_keyvalue) '
+                         'SELECT user_name, op_time, table_name, operation, tuple_keyvalue FROM log_queue '
+                         'ORDER BY rowid')
+            conn.execute('DELETE FROM log_queue')
+
+
+def _log_where(before, p_from, p_to) -> str:
+    """
+    WHERE clause for the :b / :f / :t log filters that are set. Unset ones are left out rather
+    than written ':b IS NULL OR ...', which SQLite cannot use to search an index.
+    """
+    conditions = [cond for value, cond in ((before, '"LOG#" < :b'), (p_from, 'op_time >= :f'),
+                                           (p_to, 'op_time < :t')) if value not in (None, '')]
+    return ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+
+def _s(value) -> str:
+    """
+    Render a value the way Oracle's implicit TO_CHAR does inside a || concatenation.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class RegPkg:
+    """
+    Python implementation of reg_pkg on top of one SQLite connection.
+    """
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.output = []
+
+    def put_line(self, text: str):
+        self.output.append(text)
+
+    def call(self, proc_name: str, *args) -> list:
+        """
+        Run one procedure in its own transaction and return its DBMS_OUTPUT lines.
+        """
+        if proc_name not in PROCEDURES:
+            raise ValueError(f"reg_pkg has no procedure {proc_name}")
+        self.output = []
+        try:
+            with self.conn:
+                getattr(self, proc_name)(*args)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            # The web tier and CLI treat 'ORA-' in the output as the error marker.
+            self.output.append(f"ORA-20000: {e}")
+        return self.output
+
+    def scalar(self, sql: str, params=()):
+        row = self.conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    # Procedure 2: Display all table contents (8 procedures)
+    def show_students(self):
+        for b, first, last in self.conn.execute('SELECT "B#", first_name, last_name FROM students'):
+            self.put_line(f"{_s(b)} {_s(first)} {_s(last)}")
+
+    def show_courses(self):
+        for dept, course, title in self.conn.execute('SELECT dept_code, "COURSE#", title FROM courses'):
+            self.put_line(f"{_s(dept)}{_s(course)}: {_s(title)}")
+
+    def show_classes(self):
+        for cid, course, sem, year in self.conn.execute('SELECT classid, "COURSE#", semester, year FROM classes'):
+            self.put_line(f"{_s(cid)} {_s(course)} {_s(sem)} {_s(year)}")
+
+    def show_course_credit(self):
+        for course, credits in self.conn.execute('SELECT "COURSE#", credits FROM course_credit'):
+            self.put_line(f"Course {_s(course)} - {_s(credits)} credits")
+
+    def show_score_grade(self):
+        for score, lgrade in self.conn.execute('SELECT score, lgrade FROM score_grade'):
+            self.put_line(f"{_s(score)}: {_s(lgrade)}")
+
+    def show_g_enrollments(self):
+        for b, cid, score in self.conn.execute('SELECT "G_B#", classid, score FROM g_enrollments'):
+            self.put_line(f"{_s(b)} - {_s(cid)} - {'N/A' if score is None else _s(score)}")
+
+    def show_prerequisites(self):
+        for row in self.conn.execute(
+                'SELECT dept_code, "COURSE#", pre_dept_code, "PRE_COURSE#" FROM prerequisites'):
+            self.put_line(f"{_s(row[0])}{_s(row[1])} ← {_s(row[2])}{_s(row[3])}")
+
+    def show_logs(self, p_from=None, p_to=None):
+        if not p_from and not p_to:
+            rows = self.conn.execute(
+                'SELECT "LOG#", user_name, operation, table_name, tuple_keyvalue FROM logs '
+                "WHERE op_time >= date('now', 'start of month', ?) ORDER BY \"LOG#\" DESC",
+                (f'{1 - RECENT_LOG_MONTHS} months',))
+        else:
+            rows = self.conn.execute(
+                'SELECT "LOG#", user_name, operation, table_name, tuple_keyvalue FROM logs_history'
+                + _log_where(None, p_from, p_to) + ' ORDER BY "LOG#" DESC',
+                {'f': p_from, 't': p_to})
+        for log, user, op, table, key in rows:
+            self.put_line(f"[{_s(log)}] {_s(user)} {_s(op)} on {_s(table)} → {_s(key)}")
+
+    # Paginated listings with keyset cursors; a trailing 'NEXT: <cursor>' line marks more rows.
+    def show_students_page(self, p_after, p_limit):
+        p_limit = int(p_limit)
+        # First page and later pages are separate statements: '? IS NULL OR "B#" > ?' scans the table
+        if p_after:
+            rows = self.conn.execute('SELECT "B#", first_name, last_name FROM students WHERE "B#" > ? '
+                                     'ORDER BY "B#" LIMIT ?', (p_after, p_limit + 1)).fetchall()
+        else:
+            rows = self.conn.execute('SELECT "B#", first_name, last_name FROM students ORDER BY "B#" LIMIT ?',
+                                     (p_limit + 1,)).fetchall()
+        for b, first, last in rows[:p_limit]:
+            self.put_line(f"{_s(b)} {_s(first)} {_s(last)}")
+        if len(rows) > p_limit:
+            self.put_line(f"NEXT: {_s(rows[p_limit - 1][0])}")
+
+    def show_g_enrollments_page(self, p_after_b, p_after_classid, p_limit):
+        p_limit = int(p_limit)
+        if p_after_b:
+            # The leading "G_B#" >= ? gives the seek a range on the primary key
+            rows = self.conn.execute(
+                'SELECT "G_B#", classid, score FROM g_enrollments '
+                'WHERE "G_B#" >= :b AND ("G_B#" > :b OR classid > :c) ORDER BY "G_B#", classid LIMIT :n',
+                {'b': p_after_b, 'c': p_after_classid, 'n': p_limit + 1}).fetchall()
+        else:
+            rows = self.conn.execute('SELECT "G_B#", classid, score FROM g_enrollments '
+                                     'ORDER BY "G_B#", classid LIMIT ?', (p_limit + 1,)).fetchall()
+        for b, cid, score in rows[:p_limit]:
+            self.put_line(f"{_s(b)} - {_s(cid)} - {'N/A' if score is None else _s(score)}")
+        if len(rows) > p_limit:
+            last = rows[p_limit - 1]
+            self.put_line(f"NEXT: {_s(last[0])},{_s(last[1])}")
+
+    def show_logs_page(self, p_before, p_limit, p_from=None, p_to=None):
+        p_limit = int(p_limit)
+        before = int(p_before) if p_before not in (None, '') else None
+        rows = self.conn.execute(
+            'SELECT "LOG#", user_name, operation, table_name, tuple_keyvalue FROM logs'
+            + _log_where(before, p_from, p_to) + ' ORDER BY "LOG#" DESC LIMIT :n',
+            {'b': before, 'f': p_from, 't': p_to, 'n': p_limit + 1}).fetchall()
+        for log, user, op, table, key in rows[:p_limit]:
+            self.put_line(f"[{_s(log)}] {_s(user)} {_s(op)} on {_s(table)} → {_s(key)}")
+        if len(rows) > p_limit:
+            self.put_line(f"NEXT: {_s(rows[p_limit - 1][0])}")
+
+    # Dashboard figures, one 'label: value' line each
+    def show_summary(self):
+        year, semester = self.conn.execute('SELECT current_year, current_semester FROM reg_config').fetchone()
+        classes, current, full = self.conn.execute(
+            'SELECT COUNT(*), COUNT(CASE WHEN year = ? AND semester = ? THEN 1 END), '
+            'COUNT(CASE WHEN year = ? AND semester = ? AND class_size >= "LIMIT" THEN 1 END) FROM classes',
+            (year, semester, year, semester)).fetchone()
+        self.put_line(f"Current term: {_s(semester)} {_s(year)}")
+        self.put_line(f"Students: {_s(self.scalar('SELECT COUNT(*) FROM students'))}")
+        self.put_line(f"Courses: {_s(self.scalar('SELECT COUNT(*) FROM courses'))}")
+        self.put_line(f"Classes: {_s(classes)} ({_s(current)} this term, {_s(full)} full)")
+        self.put_line(f"Enrollments: {_s(self.scalar('SELECT COUNT(*) FROM g_enrollments'))}")
+
+    # Procedure 3: List students in a given class
+    def list_students_in_class(self, p_classid):
+        if not self.scalar('SELECT COUNT(*) FROM classes WHERE classid = ?', (p_classid,)):
+            self.put_line('The classid is invalid.')
+            return
+        for b, first, last in self.conn.execute(
+                'SELECT s."B#", s.first_name, s.last_name '
+                'FROM students s JOIN g_enrollments g ON s."B#" = g."G_B#" WHERE g.classid = ?',
+                (p_classid,)):
+            self.put_line(f"{_s(b)} {_s(first)} {_s(last)}")
+
+    # Procedure 4: List direct and indirect prerequisites (CONNECT BY as a recursive CTE)
+    def list_prerequisites(self, p_dept, p_course):
+        if not self.scalar('SELECT COUNT(*) FROM courses WHERE dept_code = ? AND "COURSE#" = ?',
+                           (p_dept, p_course)):
+            self.put_line('dept_code || course# does not exist.')
+            return
+        for (pre,) in self.conn.execute(
+                'SELECT pre_dept_code || "PRE_COURSE#" FROM prereq_closure '
+                'WHERE dept_code = ? AND "COURSE#" = ? ORDER BY depth, pre_dept_code, "PRE_COURSE#"',
+                (p_dept, p_course)):
+            self.put_line(pre)
+
+    def is_current_term(self, year, semester) -> bool:
+        return bool(self.scalar('SELECT COUNT(*) FROM reg_config WHERE current_year = ? AND current_semester = ?',
+                                (year, semester)))
+
+    def term_load(self, p_b, year, semester) -> int:
+        # SQLite writers are serialized already, so no row lock as in lock_term_load
+        return self.scalar('SELECT n_classes FROM student_term_load WHERE "B#" = ? AND year = ? AND semester = ?',
+                           (p_b, year, semester)) or 0
+
+    # Procedure 5: Enroll graduate student into a class
+    def try_enroll(self, p_b, p_classid) -> str:
+        # BEGIN IMMEDIATE takes the write lock up front, standing in for the PL/SQL
+        # version's SELECT ... FOR UPDATE on the class row.
+        if not self.conn.in_transaction:
+            self.conn.execute('BEGIN IMMEDIATE')
+        student = self.conn.execute('SELECT st_level FROM students WHERE "B#" = ?', (p_b,)).fetchone()
+        if student is None:
+            return 'The B# is invalid.'
+        if student[0] not in ('master', 'PhD'):
+            return 'This is not a graduate student.'
+        cls = self.conn.execute(
+            'SELECT dept_code, "COURSE#", year, semester, "LIMIT", class_size FROM classes WHERE classid = ?',
+            (p_classid,)).fetchone()
+        if cls is None:
+            return 'The classid is invalid.'
+        dept, course, year, semester, limit, size = cls
+        if not self.is_current_term(year, semester):
+            return 'Cannot enroll into a class from a previous semester.'
+        if size >= limit:
+            return 'The class is already full.'
+        if self.scalar('SELECT COUNT(*) FROM g_enrollments WHERE "G_B#" = ? AND classid = ?', (p_b, p_classid)):
+            return 'The student is already in the class.'
+        if self.term_load(p_b, year, semester) >= 5:
+            return 'Students cannot be enrolled in more than five classes in the same semester.'
+        missing = self.scalar(
+            'SELECT COUNT(*) FROM prerequisites p '   # direct prerequisites only, as in reg_pkg
+            'WHERE p.dept_code = ? AND p."COURSE#" = ? AND NOT EXISTS ('
+            '    SELECT 1 FROM g_enrollments g '
+            '    JOIN classes c ON g.classid = c.classid '
+            '    JOIN score_grade sg ON g.score = sg.score '
+            '    WHERE g."G_B#" = ? AND c.dept_code = p.pre_dept_code AND c."COURSE#" = p."PRE_COURSE#" '
+            "      AND sg.lgrade <= 'C')",
+            (dept, course, p_b))
+        if missing:
+            return 'Prerequisite not satisfied.'
+        self.conn.execute('INSERT INTO g_enrollments("G_B#", classid, score) VALUES (?, ?, NULL)', (p_b, p_classid))
+        return 'Enrollment successful.'
+
+    def enroll_grad_student(self, p_b, p_classid):
+        self.put_line(self.try_enroll(p_b, p_classid))
+
+    # Procedure 6: Drop a graduate student from a class
+    def try_drop(self, p_b, p_classid) -> str:
+        if not self.scalar('SELECT COUNT(*) FROM students WHERE "B#" = ?', (p_b,)):
+            return 'The B# is invalid.'
+        level = self.scalar('SELECT st_level FROM students WHERE "B#" = ?', (p_b,))
+        if level not in ('master', 'PhD'):
+            return 'This is not a graduate student.'
+        if not self.scalar('SELECT COUNT(*) FROM classes WHERE classid = ?', (p_classid,)):
+            return 'The classid is invalid.'
+        if not self.scalar('SELECT COUNT(*) FROM g_enrollments WHERE "G_B#" = ? AND classid = ?', (p_b, p_classid)):
+            return 'The student is not enrolled in the class.'
+        year, semester = self.conn.execute(
+            'SELECT year, semester FROM classes WHERE classid = ?', (p_classid,)).fetchone()
+        if not self.is_current_term(year, semester):
+            return 'Only enrollment in the current semester can be dropped.'
+        if self.term_load(p_b, year, semester) == 1:
+            return f'This is the only class for this student in {_s(semester)} {_s(year)} and cannot be dropped.'
+        self.conn.execute('DELETE FROM g_enrollments WHERE "G_B#" = ? AND classid = ?', (p_b, p_classid))
+        return 'Drop successful.'
+
+    def drop_grad_student(self, p_b, p_classid):
+        self.put_line(self.try_drop(p_b, p_classid))
+
+    # Procedure 7: Delete a student from the system (triggers cascade and log)
+    def delete_student(self, p_b):
+        if not self.scalar('SELECT COUNT(*) FROM students WHERE "B#" = ?', (p_b,)):
+            self.put_line('The B# is invalid.')
+            return
+        self.conn.execute('DELETE FROM students WHERE "B#" = ?', (p_b,))
+        self.put_line('Student deleted successfully.')
+
+    # Batch enrollment: one 'row|op|b#|classid|message' line per request. A request that
+    # raises is rolled back to its own savepoint; commit_every > 0 commits every that many rows.
+    def process_enrollment_batch(self, requests, commit_every=0):
+        commit_every = int(commit_every or 0)
+        for i, (op, b, classid) in enumerate(requests, 1):
+            if not self.conn.in_transaction:
+                self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.execute('SAVEPOINT batch_row')
+            try:
+                if str(op).lower() == 'enroll':
+                    msg = self.try_enroll(b, classid)
+                elif str(op).lower() == 'drop':
+                    msg = self.try_drop(b, classid)
+                else:
+                    msg = 'Unknown operation.'
+            except sqlite3.Error as e:
+                self.conn.execute('ROLLBACK TO batch_row')
+                msg = f"ORA-20000: {e}"
+            self.conn.execute('RELEASE batch_row')
+            self.put_line(f"{i}|{_s(op)}|{_s(b)}|{_s(classid)}|{msg}")
+            if commit_every > 0 and i % commit_every == 0:
+                self.conn.commit()
+
+    def set_current_term(self, p_year, p_semester):
+        self.conn.execute('UPDATE reg_config SET current_year = ?, current_semester = ?', (int(p_year), p_semester))
+        self.put_line(f"Current term set to {_s(p_semester)} {_s(p_year)}.")
+
+    # Move up to p_max_rows (None: all) queued audit rows into logs, oldest first
+    def flush_log_queue(self, p_max_rows=5000):
+        last = self.scalar('SELECT MAX(rowid) FROM (SELECT rowid FROM log_queue ORDER BY rowid LIMIT ?)',
+                           (-1 if p_max_rows in (None, '') else int(p_max_rows),))
+        moved = 0
+        if last is not None:
+            moved = self.conn.execute(
+                'INSERT INTO logs(user_name, op_time, table_name, operation, tuple_keyvalue) '
+                'SELECT user_name, op_time, table_name, operation, tuple_keyvalue FROM log_queue '
+                'WHERE rowid <= ? ORDER BY rowid', (last,)).rowcount
+            self.conn.execute('DELETE FROM log_queue WHERE rowid <= ?', (last,))
+        self.put_line(f"Flushed {moved} log records.")
+
+    # Retention: move logs older than the last p_keep_months whole months into logs_archive
+    def archive_logs(self, p_keep_months=6):
+        cutoff = self.scalar("SELECT date('now', 'start of month', ?)", (f'-{int(p_keep_months)} months',))
+        moved = self.conn.execute('INSERT INTO logs_archive SELECT * FROM logs WHERE op_time < ?',
+                                  (cutoff,)).rowcount
+        self.conn.execute('DELETE FROM logs WHERE op_time < ?', (cutoff,))
+        self.put_line(f"Archived {moved} log records older than {cutoff}.")
@@ -1,77 +1,414 @@
 
+-- Settings (SQL*Plus substitution variables; edit before loading):
+--   log_seq_cache  log_seq numbers each instance preallocates. log# is only an ordering key, so
+--                  a large cache is safe; the unused part of the cache becomes a gap on restart.
+--   async_log      TRUE makes the triggers queue audit rows in log_queue instead of inserting
+--                  into logs; the LOG_QUEUE_DRAIN job (section 6) moves them over in batches.
+--   log_keep_months  whole months of logs kept in the logs table; the LOGS_ARCHIVE job
+--                  (section 7) moves older partitions to the compressed logs_archive table.
+SET DEFINE ON
+SET VERIFY OFF
+DEFINE log_seq_cache = 1000
+DEFINE async_log = FALSE
+DEFINE log_keep_months = 6
+ALTER SESSION SET PLSQL_CCFLAGS = 'async_log:&async_log';
+
 -- 1. Sequence for logs
 CREATE SEQUENCE log_seq
 START WITH 1000
-INCREMENT BY 1;
+INCREMENT BY 1
+CACHE &log_seq_cache;
 
+-- Schemas created before the cache setting keep their sequence; bring its cache up to date
+ALTER SEQUENCE log_seq CACHE &log_seq_cache;
 
--- 2. Trigger: Log INSERT/DELETE on G_Enrollments
-CREATE OR REPLACE TRIGGER trg_log_enrollment
-AFTER INSERT OR DELETE ON g_enrollments
-FOR EACH ROW
-DECLARE
-    log_action VARCHAR2(6);
-BEGIN
-    IF INSERTING THEN
-        log_action := 'insert';
-    ELSIF DELETING THEN
-        log_action := 'delete';
-    END IF;
+-- Time-range log reads (reg_pkg.show_logs_page p_from/p_to)
+CREATE INDEX logs_op_time_ix ON logs(op_time, log#);
+
+-- Audit rows waiting for reg_pkg.flush_log_queue. No sequence and no indexes, so queueing a
+-- row is the cheapest insert the transaction can make; log# is assigned when it is drained.
+CREATE TABLE log_queue AS
+SELECT user_name, op_time, table_name, operation, tuple_keyvalue, SYSTIMESTAMP AS enq_time
+FROM logs WHERE 1 = 0;
+
+ALTER TABLE log_queue MODIFY (enq_time DEFAULT SYSTIMESTAMP);
+
+-- The current term for enroll/drop; change it with reg_pkg.set_current_term
+CREATE TABLE reg_config (
+    id                NUMBER(1) DEFAULT 1 CONSTRAINT reg_config_pk PRIMARY KEY CONSTRAINT reg_config_one_row CHECK (id = 1),
+    current_year      NUMBER(4) NOT NULL,
+    current_semester  VARCHAR2(10) NOT NULL
+);
 
-    INSERT INTO logs(log#, user_name, op_time, table_name, operation, tuple_keyvalue)
-    VALUES (
-        log_seq.NEXTVAL,
-        USER,
-        SYSDATE,
-        'G_ENROLLMENTS',
-        log_action,
-        :OLD.g_B# || ',' || :OLD.classid
-    );
+INSERT INTO reg_config(id, current_year, current_semester)
+SELECT 1, 2021, 'Spring' FROM dual WHERE NOT EXISTS (SELECT 1 FROM reg_config);
+COMMIT;
+
+-- Enrollments per (student, term), kept by trg_g_enrollments_dml. reg_pkg reads and locks one
+-- row here for the five-class limit and the last-class check instead of joining g_enrollments
+-- to classes. Column types come from g_enrollments and classes; the initial load is the join.
+CREATE TABLE student_term_load (
+    b#, year, semester, n_classes,
+    CONSTRAINT student_term_load_pk PRIMARY KEY (b#, year, semester)
+) ORGANIZATION INDEX
+AS SELECT g.g_b#, c.year, c.semester, COUNT(*)
+FROM g_enrollments g JOIN classes c ON g.classid = c.classid
+GROUP BY g.g_b#, c.year, c.semester;
+
+
+-- The triggers below are statement-level (compound): the row phase only collects keys, and
+-- the logs rows, class_size updates and cascade delete are applied once per statement.
+-- Drop the FOR EACH ROW versions they replace when upgrading an existing schema.
+BEGIN
+    FOR t IN (
+        SELECT trigger_name FROM user_triggers
+        WHERE trigger_name IN ('TRG_LOG_ENROLLMENT', 'TRG_LOG_DELETE_STUDENT',
+                               'TRG_UPDATE_CLASS_SIZE', 'TRG_CASCADE_DELETE_ENROLLMENTS')
+    ) LOOP
+        EXECUTE IMMEDIATE 'DROP TRIGGER ' || t.trigger_name;
+    END LOOP;
 END;
 /
 
--- 3. Trigger: Log DELETE on Students
-CREATE OR REPLACE TRIGGER trg_log_delete_student
-AFTER DELETE ON students
-FOR EACH ROW
+
+-- 2. Trigger: Log INSERT/DELETE on G_Enrollments and keep classes.class_size and
+-- student_term_load in step
+-- Net class_size changes are summed per classid and applied in classid order, so a bulk
+-- statement touches each class row once and always locks classes in the same order.
+CREATE OR REPLACE TRIGGER trg_g_enrollments_dml
+FOR INSERT OR DELETE ON g_enrollments
+COMPOUND TRIGGER
+    -- Flush collected rows every c_flush_rows to bound session memory on very large statements
+    c_flush_rows CONSTANT PLS_INTEGER := 1000;
+
+    TYPE t_ops IS TABLE OF logs.operation%TYPE INDEX BY PLS_INTEGER;
+    TYPE t_keys IS TABLE OF logs.tuple_keyvalue%TYPE INDEX BY PLS_INTEGER;
+    TYPE t_deltas IS TABLE OF PLS_INTEGER INDEX BY classes.classid%TYPE;
+    TYPE t_classids IS TABLE OF classes.classid%TYPE INDEX BY PLS_INTEGER;
+    TYPE t_sizes IS TABLE OF PLS_INTEGER INDEX BY PLS_INTEGER;
+    TYPE t_bnums IS TABLE OF g_enrollments.g_b#%TYPE INDEX BY PLS_INTEGER;
+
+    v_ops t_ops;
+    v_keys t_keys;
+    v_deltas t_deltas;
+    -- One entry per changed enrollment row, for student_term_load
+    v_row_bnums t_bnums;
+    v_row_classids t_classids;
+    v_row_signs t_sizes;
+
+    PROCEDURE flush IS
+        v_classids t_classids;
+        v_sizes t_sizes;
+        v_classid classes.classid%TYPE;
+    BEGIN
+        -- INDEX BY VARCHAR2 iterates in key order
+        v_classid := v_deltas.FIRST;
+        WHILE v_classid IS NOT NULL LOOP
+            IF v_deltas(v_classid) != 0 THEN
+                v_classids(v_classids.COUNT + 1) := v_classid;
+                v_sizes(v_sizes.COUNT + 1) := v_deltas(v_classid);
+            END IF;
+            v_classid := v_deltas.NEXT(v_classid);
+        END LOOP;
+
+        FORALL i IN 1 .. v_classids.COUNT
+            UPDATE classes
+            SET class_size = class_size + v_sizes(i)
+            WHERE classid = v_classids(i);
+
+        FORALL i IN 1 .. v_row_bnums.COUNT
+            MERGE INTO student_term_load l
+            USING (SELECT year, semester FROM classes WHERE classid = v_row_classids(i)) c
+            ON (l.b# = v_row_bnums(i) AND l.year = c.year AND l.semester = c.semester)
+            WHEN MATCHED THEN UPDATE SET l.n_classes = l.n_classes + v_row_signs(i)
+            WHEN NOT MATCHED THEN INSERT (b#, year, semester, n_classes)
+                VALUES (v_row_bnums(i), c.year, c.semester, v_row_signs(i));
+
+        $IF $$async_log $THEN
+        FORALL i IN 1 .. v_keys.COUNT
+            INSERT INTO log_queue(user_name, op_time, table_name, operation, tuple_keyvalue)
+            VALUES (USER, SYSDATE, 'G_ENROLLMENTS', v_ops(i), v_keys(i));
+        $ELSE
+        FORALL i IN 1 .. v_keys.COUNT
+            INSERT INTO logs(log#, user_name, op_time, table_name, operation, tuple_keyvalue)
+            VALUES (log_seq.NEXTVAL, USER, SYSDATE, 'G_ENROLLMENTS', v_ops(i), v_keys(i));
+        $END
+
+        v_ops.DELETE;
+        v_keys.DELETE;
+        v_deltas.DELETE;
+        v_row_bnums.DELETE;
+        v_row_classids.DELETE;
+        v_row_signs.DELETE;
+    END flush;
+
+    PROCEDURE collect(p_op IN VARCHAR2, p_b# IN VARCHAR2, p_classid IN VARCHAR2, p_delta IN PLS_INTEGER) IS
+    BEGIN
+        v_ops(v_ops.COUNT + 1) := p_op;
+        v_keys(v_keys.COUNT + 1) := p_b# || ',' || p_classid;
+        v_row_bnums(v_row_bnums.COUNT + 1) := p_b#;
+        v_row_classids(v_row_classids.COUNT + 1) := p_classid;
+        v_row_signs(v_row_signs.COUNT + 1) := p_delta;
+        IF v_deltas.EXISTS(p_classid) THEN
+            v_deltas(p_classid) := v_deltas(p_classid) + p_delta;
+        ELSE
+            v_deltas(p_classid) := p_delta;
+        END IF;
+        IF v_keys.COUNT >= c_flush_rows THEN
+            flush;
+        END IF;
+    END collect;
+
+    AFTER EACH ROW IS
+    BEGIN
+        IF INSERTING THEN
+            collect('insert', :NEW.g_B#, :NEW.classid, 1);
+        ELSE
+            collect('delete', :OLD.g_B#, :OLD.classid, -1);
+        END IF;
+    END AFTER EACH ROW;
+
+    AFTER STATEMENT IS
+    BEGIN
+        flush;
+    END AFTER STATEMENT;
+END trg_g_enrollments_dml;
+/
+
+-- 3. Trigger: Log DELETE on Students and cascade delete their g_enrollments (manual trigger version)
+-- The cascade is a single DELETE per statement, so trg_g_enrollments_dml fires once for it
+-- rather than once per deleted student.
+CREATE OR REPLACE TRIGGER trg_students_delete
+FOR DELETE ON students
+COMPOUND TRIGGER
+    -- Must stay within the 32767-element limit of sys.odcivarchar2list
+    c_flush_rows CONSTANT PLS_INTEGER := 1000;
+
+    v_bnums sys.odcivarchar2list := sys.odcivarchar2list();
+
+    PROCEDURE flush IS
+    BEGIN
+        IF v_bnums.COUNT = 0 THEN
+            RETURN;
+        END IF;
+
+        DELETE FROM g_enrollments
+        WHERE g_B# IN (SELECT COLUMN_VALUE FROM TABLE(v_bnums));
+
+        -- The cascade has brought their counters to zero; drop the rows
+        DELETE FROM student_term_load
+        WHERE b# IN (SELECT COLUMN_VALUE FROM TABLE(v_bnums));
+
+        $IF $$async_log $THEN
+        FORALL i IN 1 .. v_bnums.COUNT
+            INSERT INTO log_queue(user_name, op_time, table_name, operation, tuple_keyvalue)
+            VALUES (USER, SYSDATE, 'STUDENTS', 'delete', v_bnums(i));
+        $ELSE
+        FORALL i IN 1 .. v_bnums.COUNT
+            INSERT INTO logs(log#, user_name, op_time, table_name, operation, tuple_keyvalue)
+            VALUES (log_seq.NEXTVAL, USER, SYSDATE, 'STUDENTS', 'delete', v_bnums(i));
+        $END
+
+        v_bnums.DELETE;
+    END flush;
+
+    AFTER EACH ROW IS
+    BEGIN
+        v_bnums.EXTEND;
+        v_bnums(v_bnums.COUNT) := :OLD.B#;
+        IF v_bnums.COUNT >= c_flush_rows THEN
+            flush;
+        END IF;
+    END AFTER EACH ROW;
+
+    AFTER STATEMENT IS
+    BEGIN
+        flush;
+    END AFTER STATEMENT;
+END trg_students_delete;
+/
+
+-- 4. Prerequisite closure: every direct and indirect prerequisite of a course, with the
+-- length of the shortest chain to it. reg_pkg.list_prerequisites and the enrollment
+-- prerequisite check read it with one primary-key range lookup instead of walking the graph.
+
+-- The closure computed from scratch. CYCLE stops the walk on circular prerequisites
+-- (CONNECT BY raised ORA-01436 on them), and a course is never its own prerequisite.
+CREATE OR REPLACE VIEW prereq_closure_v AS
+WITH walk (dept_code, course#, pre_dept_code, pre_course#, depth) AS (
+    SELECT dept_code, course#, pre_dept_code, pre_course#, 1
+    FROM prerequisites
+    UNION ALL
+    SELECT w.dept_code, w.course#, p.pre_dept_code, p.pre_course#, w.depth + 1
+    FROM walk w
+    JOIN prerequisites p ON p.dept_code = w.pre_dept_code AND p.course# = w.pre_course#
+) CYCLE pre_dept_code, pre_course# SET is_cycle TO 'Y' DEFAULT 'N'
+SELECT dept_code, course#, pre_dept_code, pre_course#, MIN(depth) AS depth
+FROM walk
+WHERE NOT (pre_dept_code = dept_code AND pre_course# = course#)
+GROUP BY dept_code, course#, pre_dept_code, pre_course#;
+
+-- Column types come from prerequisites; the initial load is the view itself.
+CREATE TABLE prereq_closure (
+    dept_code, course#, pre_dept_code, pre_course#, depth,
+    CONSTRAINT prereq_closure_pk PRIMARY KEY (dept_code, course#, pre_dept_code, pre_course#)
+) ORGANIZATION INDEX
+AS SELECT dept_code, course#, pre_dept_code, pre_course#, depth FROM prereq_closure_v;
+
+-- Finds the courses whose closure runs through a changed course
+CREATE INDEX prereq_closure_pre_ix ON prereq_closure(pre_dept_code, pre_course#);
+
+-- 5. Trigger: Keep prereq_closure in step with prerequisites
+-- Only the changed courses and the courses that depend on them are recomputed, once per
+-- statement. Dependents are looked up before anything is rewritten, since rewriting a
+-- closure can drop the very rows that identify its dependents.
+CREATE OR REPLACE TRIGGER trg_prereq_closure
+FOR INSERT OR UPDATE OR DELETE ON prerequisites
+COMPOUND TRIGGER
+    TYPE t_course IS RECORD (dept_code prerequisites.dept_code%TYPE, course# prerequisites.course#%TYPE);
+    TYPE t_courses IS TABLE OF t_course INDEX BY VARCHAR2(64);
+    TYPE t_course_list IS TABLE OF t_course;
+
+    v_changed t_courses;
+
+    PROCEDURE note(p_dept IN VARCHAR2, p_course IN NUMBER, p_courses IN OUT NOCOPY t_courses) IS
+    BEGIN
+        IF p_dept IS NOT NULL THEN
+            p_courses(p_dept || '|' || p_course).dept_code := p_dept;
+            p_courses(p_dept || '|' || p_course).course# := p_course;
+        END IF;
+    END note;
+
+    AFTER EACH ROW IS
+    BEGIN
+        note(:OLD.dept_code, :OLD.course#, v_changed);
+        note(:NEW.dept_code, :NEW.course#, v_changed);
+    END AFTER EACH ROW;
+
+    AFTER STATEMENT IS
+        v_roots t_courses;
+        v_dependents t_course_list;
+        v_key VARCHAR2(64);
+        v_dept prerequisites.dept_code%TYPE;
+        v_course prerequisites.course#%TYPE;
+    BEGIN
+        v_key := v_changed.FIRST;
+        WHILE v_key IS NOT NULL LOOP
+            v_dept := v_changed(v_key).dept_code;
+            v_course := v_changed(v_key).course#;
+            note(v_dept, v_course, v_roots);
+            SELECT DISTINCT dept_code, course# BULK COLLECT INTO v_dependents
+            FROM prereq_closure
+            WHERE pre_dept_code = v_dept AND pre_course# = v_course;
+            FOR i IN 1 .. v_dependents.COUNT LOOP
+                note(v_dependents(i).dept_code, v_dependents(i).course#, v_roots);
+            END LOOP;
+            v_key := v_changed.NEXT(v_key);
+        END LOOP;
+
+        v_key := v_roots.FIRST;
+        WHILE v_key IS NOT NULL LOOP
+            v_dept := v_roots(v_key).dept_code;
+            v_course := v_roots(v_key).course#;
+
+            DELETE FROM prereq_closure
+            WHERE dept_code = v_dept AND course# = v_course;
+
+            INSERT INTO prereq_closure(dept_code, course#, pre_dept_code, pre_course#, depth)
+            SELECT dept_code, course#, pre_dept_code, pre_course#, depth
+            FROM prereq_closure_v
+            WHERE dept_code = v_dept AND course# = v_course;
+
+            v_key := v_roots.NEXT(v_key);
+        END LOOP;
+    END AFTER STATEMENT;
+END trg_prereq_closure;
+/
+
+
+-- 6. Job: drain log_queue into logs every few seconds while async_log is on. The job always
+-- exists so switching modes is a reload of this script; it is only enabled with async_log.
+-- Rows queued since the last run are not yet visible in show_logs / show_logs_page.
+DECLARE
+    v_queued NUMBER;
 BEGIN
-    INSERT INTO logs(log#, user_name, op_time, table_name, operation, tuple_keyvalue)
-    VALUES (
-        log_seq.NEXTVAL,
-        USER,
-        SYSDATE,
-        'STUDENTS',
-        'delete',
-        :OLD.B#
-    );
+    BEGIN
+        DBMS_SCHEDULER.CREATE_JOB(
+            job_name        => 'LOG_QUEUE_DRAIN',
+            job_type        => 'PLSQL_BLOCK',
+            job_action      => 'BEGIN reg_pkg.flush_log_queue(5000); END;',
+            repeat_interval => 'FREQ=SECONDLY; INTERVAL=5',
+            enabled         => FALSE);
+    EXCEPTION
+        WHEN OTHERS THEN
+            IF SQLCODE != -27477 THEN   -- already exists
+                RAISE;
+            END IF;
+    END;
+    IF &async_log THEN
+        DBMS_SCHEDULER.ENABLE('LOG_QUEUE_DRAIN');
+    ELSE
+        DBMS_SCHEDULER.DISABLE('LOG_QUEUE_DRAIN', force => TRUE);
+        -- Move over anything queued before switching back. Dynamic, because on a first install
+        -- reg_pkg is loaded after this script (and the queue is empty then).
+        SELECT COUNT(*) INTO v_queued FROM log_queue;
+        IF v_queued > 0 THEN
+            EXECUTE IMMEDIATE 'BEGIN reg_pkg.flush_log_queue(NULL); END;';
+        END IF;
+    END IF;
 END;
 /
 
--- 4. Trigger: Auto-update class size
-CREATE OR REPLACE TRIGGER trg_update_class_size
-AFTER INSERT OR DELETE ON g_enrollments
-FOR EACH ROW
+
+-- 7. Monthly partitions of logs, the compressed archive and the retention job.
+-- logs is interval-partitioned on op_time, one partition per month, and logs_op_time_ix becomes
+-- a local index, so a time-bounded read only touches the months it asks for. Existing tables
+-- are converted online (needs 12.2 or later); the log# primary key stays a global index.
+DECLARE
+    v_partitioned NUMBER;
 BEGIN
-    IF INSERTING THEN
-        UPDATE classes
-        SET class_size = class_size + 1
-        WHERE classid = :NEW.classid;
-    ELSIF DELETING THEN
-        UPDATE classes
-        SET class_size = class_size - 1
-        WHERE classid = :OLD.classid;
+    SELECT COUNT(*) INTO v_partitioned FROM user_part_tables WHERE table_name = 'LOGS';
+    IF v_partitioned = 0 THEN
+        EXECUTE IMMEDIATE q'[
+            ALTER TABLE logs MODIFY
+            PARTITION BY RANGE (op_time) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+            (PARTITION logs_before_2021 VALUES LESS THAN (DATE '2021-01-01'))
+            ONLINE UPDATE INDEXES (logs_op_time_ix LOCAL)]';
     END IF;
 END;
 /
 
+-- Same shape, basic table compression: the retention job fills it with direct-path inserts,
+-- which are the inserts basic compression applies to.
+CREATE TABLE logs_archive
+ROW STORE COMPRESS BASIC
+PARTITION BY RANGE (op_time) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+(PARTITION logs_before_2021 VALUES LESS THAN (DATE '2021-01-01'))
+AS SELECT * FROM logs WHERE 1 = 0;
+
+CREATE INDEX logs_archive_op_time_ix ON logs_archive(op_time, log#) LOCAL COMPRESS;
 
+-- Everything ever logged; reg_pkg.show_logs reads this when it is given a time range
+CREATE OR REPLACE VIEW logs_history AS
+SELECT log#, user_name, op_time, table_name, operation, tuple_keyvalue FROM logs
+UNION ALL
+SELECT log#, user_name, op_time, table_name, operation, tuple_keyvalue FROM logs_archive;
 
--- 5. Trigger: Cascade delete g_enrollments when a student is removed (manual trigger version)
-CREATE OR REPLACE TRIGGER trg_cascade_delete_enrollments
-AFTER DELETE ON students
-FOR EACH ROW
 BEGIN
-    DELETE FROM g_enrollments
-    WHERE g_B# = :OLD.B#;
+    BEGIN
+        DBMS_SCHEDULER.CREATE_JOB(
+            job_name        => 'LOGS_ARCHIVE',
+            job_type        => 'PLSQL_BLOCK',
+            job_action      => 'BEGIN reg_pkg.archive_logs(&log_keep_months); END;',
+            repeat_interval => 'FREQ=DAILY; BYHOUR=2; BYMINUTE=30',
+            enabled         => TRUE);
+    EXCEPTION
+        WHEN OTHERS THEN
+            IF SQLCODE != -27477 THEN   -- already exists: pick up a changed log_keep_months
+                RAISE;
+            END IF;
+            DBMS_SCHEDULER.SET_ATTRIBUTE('LOGS_ARCHIVE', 'job_action',
+                                         'BEGIN reg_pkg.archive_logs(&log_keep_months); END;');
+    END;
 END;
 /
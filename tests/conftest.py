@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAKE_SQLPLUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_sqlplus.py')
+
+
+@pytest.fixture
+def fake_sqlplus(monkeypatch):
+    """
+    Point SqlPlusSession at tests/fake_sqlplus.py instead of a real sqlplus.
+    """
+    import web_interface
+    monkeypatch.setattr(web_interface, 'SQLPLUS_BIN', FAKE_SQLPLUS)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Stand-in for `sqlplus -s user/pass@dsn`, enough for SqlPlusPool: it reads commands from
+stdin one line at a time, prints PROMPT text, ignores SET / VARIABLE / PL/SQL lines and
+stops at EXIT. Like sqlplus, until SET DEFINE OFF it treats &name as a substitution
+variable and reads its value from the next input line. A few EXEC commands script
+failures for the tests:
+
+    EXEC fake_record('tag')   append tag to the file named by $FAKE_SQLPLUS_RECORD
+    EXEC fake_sleep(seconds)  stay silent, as a slow statement would
+    EXEC fake_die             exit at once, as a crashed session would
+
+and a reg_pkg.fake_echo(:p1, ...) call prints its VARIABLE-bound arguments one per line,
+as a procedure writing them with DBMS_OUTPUT would.
+"""
+import os
+import re
+import sys
+import time
+
+COMMAND = re.compile(r"EXEC\s+fake_(\w+)(?:\((.*)\))?", re.IGNORECASE)
+SUBSTITUTION = re.compile(r"&(\w+)")
+VARIABLE = re.compile(r"VARIABLE\s+(\w+)\s+\S+\s*=\s*(.*)", re.IGNORECASE)
+ECHO = re.compile(r"reg_pkg\.fake_echo\((.*)\);", re.IGNORECASE)
+
+
+def substitute(m) -> str:
+    print(f"Enter value for {m.group(1).lower()}: ", end='', flush=True)
+    return sys.stdin.readline().rstrip('\n')
+
+
+def bind_value(text: str) -> str:
+    text = text.strip()
+    if text.startswith("'"):
+        return text[1:-1].replace("''", "'")
+    return text
+
+
+def main():
+    define = True
+    binds = {}
+    for line in sys.stdin:
+        text = line.strip()
+        upper = text.upper()
+        if define:
+            text = SUBSTITUTION.sub(substitute, text)
+        if upper.split() == ['SET', 'DEFINE', 'OFF']:
+            define = False
+        elif upper in ('EXIT', 'QUIT'):
+            return 0
+        if upper.startswith('PROMPT'):
+            print(text[len('PROMPT'):].strip(), flush=True)
+            continue
+        m = VARIABLE.fullmatch(text)
+        if m:
+            binds[m.group(1).lower()] = bind_value(m.group(2))
+            continue
+        m = ECHO.fullmatch(text)
+        if m:
+            for name in filter(None, (a.strip().lstrip(':').lower() for a in m.group(1).split(','))):
+                print(binds.get(name, ''), flush=True)
+            continue
+        m = COMMAND.fullmatch(text.rstrip(';'))
+        if m is None:
+            continue
+        name, arg = m.group(1).lower(), (m.group(2) or '').strip().strip("'")
+        if name == 'record':
+            with open(os.environ['FAKE_SQLPLUS_RECORD'], 'a') as f:
+                f.write(arg + '\n')
+        elif name == 'sleep':
+            time.sleep(float(arg))
+        elif name == 'die':
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+ResultCache: a load that an invalidation overtakes must not be stored.
+"""
+from web_interface import ResultCache
+
+
+def test_value_loaded_during_invalidate_is_not_stored():
+    cache = ResultCache(ttl=60)
+
+    def load():
+        cache.invalidate({'students'})   # a write commits while the read is in flight
+        return 'before the write'
+
+    assert cache.get_or_load(('show_students',), {'students'}, load) == 'before the write'
+    assert cache.lookup(('show_students',)) is None
+    assert cache.get_or_load(('show_students',), {'students'}, lambda: 'after') == 'after'
+    assert cache.lookup(('show_students',)) == 'after'
+
+
+def test_invalidating_other_tables_keeps_the_load():
+    cache = ResultCache(ttl=60)
+
+    def load():
+        cache.invalidate({'courses'})
+        return 'students'
+
+    cache.get_or_load(('show_students',), {'students'}, load)
+    assert cache.lookup(('show_students',)) == 'students'
+
+
+def test_store_with_stale_generation_is_dropped():
+    cache = ResultCache(ttl=60)
+    generation = cache.generation({'classes', 'courses'})
+    cache.invalidate({'classes'})
+    cache.store(('show_classes',), {'classes', 'courses'}, 'old', generation)
+    assert cache.lookup(('show_classes',)) is None
+    cache.store(('show_classes',), {'classes', 'courses'}, 'new', cache.generation({'classes', 'courses'}))
+    assert cache.lookup(('show_classes',)) == 'new'
@@ -0,0 +1,76 @@
+"""
+TensorBatcher yields DataLoader's batches, and train_epoch gives the loss curve of the
+notebook's loss.item()-per-step loop.
+"""
+import pytest
+
+torch = pytest.importorskip('torch')
+
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader, TensorDataset
+
+from fastbatch import TensorBatcher, train_epoch
+from hpsearch import RegressionDNN
+
+
+@pytest.fixture
+def tensors():
+    generator = torch.Generator().manual_seed(0)
+    X = torch.randn(100, 6, generator=generator)
+    y = X.sum(dim=1, keepdim=True)
+    return X, y
+
+
+def test_len_matches_dataloader(tensors):
+    X, y = tensors
+    for batch_size in (1, 7, 32, 100, 128):
+        for drop_last in (False, True):
+            expected = len(DataLoader(TensorDataset(X, y), batch_size=batch_size, drop_last=drop_last))
+            batcher = TensorBatcher(X, y, batch_size=batch_size, drop_last=drop_last)
+            assert len(batcher) == expected == len(list(batcher))
+
+
+def test_batches_follow_one_permutation_per_epoch(tensors):
+    X, y = tensors
+    batcher = TensorBatcher(X, y, batch_size=32, shuffle=True, generator=torch.Generator().manual_seed(5))
+    reference = torch.Generator().manual_seed(5)
+    for _ in range(2):
+        order = torch.randperm(len(X), generator=reference)
+        loader = DataLoader(TensorDataset(X, y), batch_size=32, sampler=order.tolist())
+        for (bx, by), (lx, ly) in zip(batcher, loader, strict=True):
+            assert torch.equal(bx, lx) and torch.equal(by, ly)
+
+
+def test_unequal_lengths_are_rejected(tensors):
+    X, y = tensors
+    with pytest.raises(ValueError):
+        TensorBatcher(X, y[:-1])
+
+
+def test_train_epoch_matches_the_item_per_step_loop(tensors):
+    X, y = tensors
+    curves = []
+    for once_per_epoch in (False, True):
+        torch.manual_seed(0)
+        model = RegressionDNN(X.shape[1])
+        optimizer = optim.Adam(model.parameters(), lr=0.01)
+        loss_function = nn.MSELoss()
+        batches = TensorBatcher(X, y, batch_size=16, generator=torch.Generator().manual_seed(1))
+        curve = []
+        for _ in range(5):
+            if once_per_epoch:
+                curve.append(train_epoch(model, batches, loss_function, optimizer))
+                continue
+            model.train()
+            total_loss = 0
+            for batch_X, batch_y in batches:
+                loss = loss_function(model(batch_X), batch_y)
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+                total_loss += loss.item()
+            curve.append(total_loss / len(batches))
+        curves.append(curve)
+    assert curves[1] == pytest.approx(curves[0], rel=1e-5)
+    assert curves[0][-1] < curves[0][0]
@@ -0,0 +1,58 @@
+"""
+hpsearch on a small CPU problem: rung budgets, successive-halving pruning and the history format.
+"""
+import pytest
+
+torch = pytest.importorskip('torch')
+np = pytest.importorskip('numpy')
+
+from hpsearch import grid, rung_budgets, search, trial_label
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((64, 4), dtype=np.float32)
+    y = X @ np.array([1.0, -2.0, 0.5, 3.0], dtype=np.float32)
+    return X, y
+
+
+def test_rung_budgets():
+    assert rung_budgets(100, 3, 5) == [11, 33, 100]
+    assert rung_budgets(8, 2, 2) == [2, 4, 8]
+    assert rung_budgets(100, 1, 5) == [100]
+    assert rung_budgets(10, 3, 5) == [10]
+
+
+def test_grid_and_labels():
+    candidates = grid(lr=[0.1, 0.01], dropout_rate=[0.0, 0.2])
+    assert candidates == [{'lr': 0.1, 'dropout_rate': 0.0}, {'lr': 0.1, 'dropout_rate': 0.2},
+                          {'lr': 0.01, 'dropout_rate': 0.0}, {'lr': 0.01, 'dropout_rate': 0.2}]
+    assert trial_label({'lr': 0.01, 'dropout_rate': 0.2, 'weight_decay': 1e-05}) == 'lr_0.01_dropout_0.2_decay_1e-05'
+
+
+def test_successive_halving_prunes_the_worst_half_per_rung(data):
+    X, y = data
+    seen = []
+    history, best, best_loss = search(X, y, grid(lr=[0.01, 0.003, 0.0003, 0.0]), num_epochs=8, batch_size=16,
+                                      eta=2, min_epochs=2, workers=2, threads_per_worker=1,
+                                      on_epoch=lambda *args: seen.append(args), verbose=False)
+    assert sorted(len(losses) for losses in history.values()) == [2, 2, 4, 8]
+    # lr 0 never learns, so it is pruned at the first rung; the winner trained all 8 epochs
+    assert len(history[trial_label({'lr': 0.0})]) == 2
+    assert len(history[trial_label(best)]) == 8
+    assert best['lr'] > 0 and np.isfinite(best_loss)
+    assert len(seen) == sum(len(losses) for losses in history.values())
+    assert all(seen.count(item) == 1 for item in seen)
+
+
+def test_resumed_rungs_match_an_uninterrupted_run(data):
+    X, y = data
+    candidates = [{'lr': 0.01}, {'lr': 0.0}]
+    halving, _, _ = search(X, y, candidates, num_epochs=6, batch_size=16, eta=2, min_epochs=3,
+                           workers=1, threads_per_worker=1, verbose=False)
+    straight, _, _ = search(X, y, candidates[:1], num_epochs=6, batch_size=16, eta=1,
+                            workers=1, threads_per_worker=1, verbose=False)
+    # Training resumed from the rung checkpoint gives the same losses as training in one go
+    label = trial_label(candidates[0])
+    assert halving[label] == pytest.approx(straight[label], rel=1e-5)
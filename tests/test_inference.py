@@ -0,0 +1,133 @@
+"""
+inference: TorchScript and int8 artifacts against the eager model, input parsing, and when
+MicroBatcher flushes a batch.
+"""
+import threading
+import time
+
+import pytest
+
+torch = pytest.importorskip('torch')
+np = pytest.importorskip('numpy')
+
+import inference
+from hpsearch import RegressionDNN
+
+COLUMNS = [f'f{i}' for i in range(6)]
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return RegressionDNN(3).eval()
+
+
+@pytest.fixture
+def stats():
+    rng = np.random.default_rng(0)
+    return rng.normal(5, 1, 6).astype(np.float32), rng.uniform(0.5, 2, 6).astype(np.float32)
+
+
+def eager(model, rows, mean, scale, features):
+    x = torch.from_numpy((rows - mean) / scale)[:, [COLUMNS.index(f) for f in features]]
+    with torch.no_grad():
+        return model(x).squeeze(1).numpy()
+
+
+@pytest.fixture
+def rows():
+    return np.random.default_rng(1).normal(5, 2, (64, 6)).astype(np.float32)
+
+
+def test_torchscript_matches_eager(tmp_path, model, stats, rows):
+    features = ['f4', 'f0', 'f2']
+    path = str(tmp_path / 'model.pt')
+    meta = inference.export_model(model, path, COLUMNS, *stats, features=features)
+    predictor = inference.Predictor(path)
+    assert predictor.meta == meta and predictor.columns == COLUMNS
+    np.testing.assert_allclose(predictor.predict(rows), eager(model, rows, *stats, features), rtol=1e-5, atol=1e-6)
+
+
+def test_int8_stays_close_to_eager(tmp_path, model, stats, rows):
+    path = str(tmp_path / 'model-int8.pt')
+    inference.export_model(model, path, COLUMNS, *stats, features=['f1', 'f3', 'f5'], quantize=True)
+    predictor = inference.Predictor(path)
+    assert predictor.meta['quantized']
+    expected = eager(model, rows, *stats, ['f1', 'f3', 'f5'])
+    # int8 weights: within a few percent of the output range, not bit-exact
+    assert np.abs(predictor.predict(rows) - expected).max() < 0.05 * np.ptp(expected) + 1e-3
+
+
+def test_unknown_features_are_rejected(tmp_path, model, stats):
+    with pytest.raises(ValueError):
+        inference.export_model(model, str(tmp_path / 'm.pt'), COLUMNS, *stats, features=['f0', 'nope', 'f1'])
+
+
+def test_rows_accepts_lists_and_objects(tmp_path, model, stats):
+    path = str(tmp_path / 'model.pt')
+    inference.export_model(model, path, COLUMNS, *stats, features=['f0', 'f1', 'f2'])
+    predictor = inference.Predictor(path)
+    rows = predictor.rows([[1, 2, 3, 4, 5, 6], {c: i for i, c in enumerate(COLUMNS)}])
+    assert rows.dtype == np.float32
+    np.testing.assert_array_equal(rows, [[1, 2, 3, 4, 5, 6], [0, 1, 2, 3, 4, 5]])
+    for bad in ([], [[1, 2]], [{'f0': 1}], [[1, 2, 3, 4, 5, 'x']], 'rows'):
+        with pytest.raises(ValueError):
+            predictor.rows(bad)
+
+
+class SumPredictor:
+    def predict(self, rows):
+        return rows.sum(axis=1)
+
+
+def test_lone_request_is_flushed_after_max_wait():
+    batches = []
+    batcher = inference.MicroBatcher(SumPredictor(), max_rows=100, max_wait=0.05,
+                                     on_batch=lambda n, seconds: batches.append(n))
+    try:
+        start = time.perf_counter()
+        out = batcher.predict(np.ones((2, 3), dtype=np.float32), timeout=5)
+        elapsed = time.perf_counter() - start
+    finally:
+        batcher.close()
+    np.testing.assert_array_equal(out, [3, 3])
+    assert 0.04 <= elapsed < 2
+    assert batches == [2]
+
+
+def test_full_batch_is_flushed_without_waiting():
+    batches = []
+    batcher = inference.MicroBatcher(SumPredictor(), max_rows=4, max_wait=30,
+                                     on_batch=lambda n, seconds: batches.append(n))
+    results = {}
+
+    def client(i):
+        results[i] = batcher.predict(np.full((1, 2), i, dtype=np.float32), timeout=10)
+
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        batcher.close()
+    # Far below max_wait: the batch ran as soon as it held max_rows rows
+    assert elapsed < 5
+    assert batches == [4]
+    assert {i: float(out[0]) for i, out in results.items()} == {0: 0.0, 1: 2.0, 2: 4.0, 3: 6.0}
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    class Broken:
+        def predict(self, rows):
+            raise RuntimeError('model failed')
+
+    batcher = inference.MicroBatcher(Broken(), max_rows=8, max_wait=0.01)
+    try:
+        with pytest.raises(RuntimeError, match='model failed'):
+            batcher.predict(np.zeros((1, 2), dtype=np.float32), timeout=5)
+    finally:
+        batcher.close()
@@ -0,0 +1,79 @@
+"""
+preprocess.load_covid: standardized arrays, cache hits, and a rebuild when a file changes.
+"""
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+import preprocess
+
+
+def write_csvs(directory, rows=40, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = [f'f{i}' for i in range(5)]
+    train = pd.DataFrame(rng.normal(10, 3, (rows, 5)), columns=columns)
+    train['f4'] = 1.0   # a constant column, scaled by 1 as StandardScaler does
+    train.insert(0, 'id', range(rows))
+    train[preprocess.TARGET] = rng.normal(size=rows)
+    test = pd.DataFrame(rng.normal(10, 3, (rows // 2, 5)), columns=columns)
+    test.insert(0, 'id', range(rows // 2))
+    train_path, test_path = os.path.join(directory, 'train.csv'), os.path.join(directory, 'test.csv')
+    train.to_csv(train_path, index=False)
+    test.to_csv(test_path, index=False)
+    return train_path, test_path
+
+
+def entries(cache_dir):
+    return sorted(e for e in os.listdir(cache_dir) if not e.startswith('.'))
+
+
+def test_standardizes_like_standard_scaler(tmp_path):
+    train_path, test_path = write_csvs(tmp_path)
+    covid = preprocess.load_covid(train_path, test_path, cache_dir=str(tmp_path / 'cache'))
+    raw = pd.read_csv(train_path)
+    X = raw[covid.columns].to_numpy(np.float64)
+    std = X.std(axis=0)
+    expected = (X - X.mean(axis=0)) / np.where(std > 0, std, 1)
+    assert covid.columns == ['f0', 'f1', 'f2', 'f3', 'f4']
+    assert covid.X_train.dtype == np.float32
+    np.testing.assert_allclose(covid.X_train, expected, atol=1e-5)
+    np.testing.assert_allclose(covid.y_train, raw[preprocess.TARGET], rtol=1e-6)
+    assert covid.scale[-1] == 1.0
+    train, test = covid.frames()
+    assert list(train.columns) == list(raw.columns)
+    assert list(test.columns) == ['id'] + covid.columns
+
+
+def test_second_load_maps_the_cached_arrays(tmp_path):
+    train_path, test_path = write_csvs(tmp_path)
+    cache_dir = str(tmp_path / 'cache')
+    first = preprocess.load_covid(train_path, test_path, cache_dir=cache_dir)
+    second = preprocess.load_covid(train_path, test_path, cache_dir=cache_dir)
+    assert len(entries(cache_dir)) == 1
+    assert isinstance(second.X_train, np.memmap)
+    np.testing.assert_array_equal(first.X_test, second.X_test)
+    # Copy-on-write: changing the mapped array does not reach the cache file
+    second.X_train[0, 0] = 1e6
+    third = preprocess.load_covid(train_path, test_path, cache_dir=cache_dir)
+    assert third.X_train[0, 0] == first.X_train[0, 0]
+
+
+def test_changed_file_is_a_cache_miss(tmp_path):
+    train_path, test_path = write_csvs(tmp_path)
+    cache_dir = str(tmp_path / 'cache')
+    before = preprocess.load_covid(train_path, test_path, cache_dir=cache_dir)
+    write_csvs(tmp_path, seed=1)   # same names and shape, different contents
+    after = preprocess.load_covid(train_path, test_path, cache_dir=cache_dir)
+    assert len(entries(cache_dir)) == 2
+    assert not np.array_equal(before.X_train_raw, after.X_train_raw)
+    np.testing.assert_allclose(after.X_train_raw, pd.read_csv(train_path)[after.columns], rtol=1e-6)
+
+
+def test_mismatched_test_columns_are_rejected(tmp_path):
+    train_path, test_path = write_csvs(tmp_path)
+    pd.read_csv(test_path).drop(columns='f2').to_csv(test_path, index=False)
+    with pytest.raises(ValueError):
+        preprocess.load_covid(train_path, test_path, cache_dir=str(tmp_path / 'cache'))
@@ -0,0 +1,111 @@
+"""
+SqlPlusPool against tests/fake_sqlplus.py: the PROMPT marker protocol, reconnecting after a
+dead session, the call timeout, that a block already sent is never sent again, and
+SqlPlusBackend.call_many splitting one script's output back into its calls.
+"""
+import pytest
+
+import web_interface
+from web_interface import SessionError, SqlPlusBackend, SqlPlusPool
+
+
+@pytest.fixture
+def record(tmp_path, monkeypatch, fake_sqlplus):
+    path = tmp_path / 'executed.txt'
+    monkeypatch.setenv('FAKE_SQLPLUS_RECORD', str(path))
+    return lambda: path.read_text().splitlines() if path.exists() else []
+
+
+@pytest.fixture
+def pool(record):
+    pool = SqlPlusPool(size=2, idle_timeout=0, call_timeout=1)
+    yield pool
+    pool.close()
+
+
+def test_marker_splits_output_between_blocks(pool):
+    assert pool.run("PROMPT first\nPROMPT second") == ['first', 'second']
+    assert pool.run("PROMPT third") == ['third']
+    assert pool.stats() == {'size': 2, 'open': 1, 'idle': 1}
+
+
+def test_iter_run_streams_lines(pool):
+    assert list(pool.iter_run("PROMPT a\nPROMPT b")) == ['a', 'b']
+    assert pool.stats()['idle'] == 1
+
+
+def test_dead_idle_session_is_replaced(pool):
+    pool.run("PROMPT warm")
+    dead = pool._idle[-1]
+    dead.proc.kill()
+    dead.proc.wait()
+    assert pool.run("PROMPT again") == ['again']
+    assert dead not in pool._idle
+    assert pool.stats()['open'] == 1
+
+
+def test_block_not_sent_to_a_dead_session_is_retried(pool, record):
+    session = pool.acquire()
+    session.proc.kill()
+    session.proc.wait()
+    with pytest.raises(SessionError) as e:
+        session.execute("EXEC fake_record('x')")
+    assert not e.value.sent
+    pool.release(session, broken=True)
+    # A session that died unnoticed in the pool: run() reconnects and sends the block once
+    pool._idle.append(session)
+    pool._open += 1
+    pool.health_interval = float('inf')
+    session.alive = lambda: True
+    assert pool.run("EXEC fake_record('y')\nPROMPT done") == ['done']
+    assert record() == ['y']
+
+
+def test_timeout_is_not_retried(pool, record):
+    with pytest.raises(SessionError) as e:
+        pool.run("EXEC fake_record('slow')\nEXEC fake_sleep(3)")
+    assert e.value.sent
+    assert record() == ['slow']
+    assert pool.stats()['open'] == 0   # the session with unread output is discarded
+
+
+def test_session_dying_after_the_block_ran_is_not_retried(pool, record):
+    with pytest.raises(SessionError) as e:
+        pool.run("EXEC fake_record('enroll')\nEXEC fake_die")
+    assert e.value.sent
+    assert record() == ['enroll']
+    assert pool.run("PROMPT next") == ['next']
+
+
+def test_ampersand_is_not_a_substitution_variable(pool):
+    assert pool.run("PROMPT R&D\nPROMPT ok") == ['R&D', 'ok']
+
+
+def test_call_many_hands_each_call_its_own_output(pool, monkeypatch):
+    monkeypatch.setattr(web_interface, '_pool', pool)
+    backend = SqlPlusBackend()
+    outputs = backend.call_many([('fake_echo', ('B0000001', 'c000001')), ('fake_echo', ()),
+                                 ('fake_echo', ("O'Brien",)), ('fake_echo', ('last',))])
+    assert outputs == ['B0000001\nc000001', '', "O'Brien", 'last']
+    assert backend.call('fake_echo', 'alone') == 'alone'
+    assert pool.stats()['open'] == 1   # all of it went over one session
+
+
+def test_call_many_fails_when_the_session_dies_midway(pool, monkeypatch):
+    monkeypatch.setattr(web_interface, '_pool', pool)
+    backend = SqlPlusBackend()
+    monkeypatch.setattr(backend, '_statement', lambda proc, argc: 'EXEC fake_die\n' if proc == 'die' else
+                        SqlPlusBackend._statement(backend, proc, argc))
+    with pytest.raises(SessionError) as e:
+        backend.call_many([('fake_echo', ('first',)), ('die', ()), ('fake_echo', ('never',))])
+    # Part of the script ran, so it must not be replayed
+    assert e.value.sent
+
+
+def test_stopping_a_stream_early_discards_the_session(pool):
+    lines = pool.iter_run("PROMPT a\nPROMPT b\nPROMPT c")
+    assert next(lines) == 'a'
+    lines.close()
+    # Its unread output would reach the next caller, so the session is not reused
+    assert pool.stats()['open'] == 0
+    assert pool.run("PROMPT fresh") == ['fresh']
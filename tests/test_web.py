@@ -0,0 +1,633 @@
+"""
+The web tier end to end: a PooledHTTPServer on an ephemeral port over a generated SQLite database.
+"""
+import gzip
+import http.client
+import json
+import sqlite3
+import statistics
+import threading
+import time
+from datetime import timedelta, timezone
+
+import pytest
+
+import web_interface
+from benchmarks import gen_data
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'reg.db')
+    gen_data.generate(path, rows=300)
+    return path
+
+
+@pytest.fixture
+def server(db, monkeypatch):
+    backend = web_interface.SqliteBackend(db)
+    monkeypatch.setattr(web_interface, '_backend', backend)
+    monkeypatch.setattr(web_interface, '_search_index', None)
+    web_interface.listing_cache.clear()
+    httpd = web_interface.PooledHTTPServer(('127.0.0.1', 0), web_interface.Handler, workers=2, queue_size=8)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+    if web_interface._search_index is not None:
+        web_interface._search_index.close()
+    web_interface.listing_cache.clear()
+
+
+def request(conn, method, path, body=None):
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'} if body is not None else {}
+    conn.request(method, path, body, headers)
+    response = conn.getresponse()
+    return response.status, response.read().decode()
+
+
+def test_keep_alive_responses_are_not_held_by_nagle(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    request(conn, 'GET', '/api/courses')
+    times = []
+    for _ in range(10):
+        start = time.perf_counter()
+        status, _ = request(conn, 'GET', '/api/courses')
+        times.append(time.perf_counter() - start)
+        assert status == 200
+    # A delayed-ACK stall is ~40 ms per response; the cached listing itself takes well under 1 ms
+    assert statistics.median(times) < 0.02
+
+
+@pytest.fixture
+def sqlplus_server(server, monkeypatch, fake_sqlplus):
+    monkeypatch.setattr(web_interface, '_backend', web_interface.SqlPlusBackend())
+    monkeypatch.setattr(web_interface, '_pool', web_interface.SqlPlusPool(size=1, idle_timeout=0, call_timeout=5))
+    yield server
+    web_interface._pool.close()
+
+
+def test_line_break_in_a_form_value_gets_an_error_page(sqlplus_server):
+    conn = http.client.HTTPConnection('127.0.0.1', sqlplus_server, timeout=10)
+    status, page = request(conn, 'POST', '/enroll', 'bnum=B0000001%0AEXIT&classid=c000001')
+    assert status == 200
+    assert 'cannot contain a line break' in page
+    status, body = request(conn, 'GET', '/api/students?after=B1%0AB2')
+    assert status == 400
+    assert 'line break' in body
+
+
+def test_predict_serves_an_exported_model(server, tmp_path, monkeypatch):
+    torch = pytest.importorskip('torch')
+    import inference
+    from hpsearch import RegressionDNN
+    torch.manual_seed(0)
+    path = str(tmp_path / 'model.pt')
+    inference.export_model(RegressionDNN(2).eval(), path, ['a', 'b', 'c'], [0, 0, 0], [1, 1, 1], features=['c', 'a'])
+    monkeypatch.setattr(web_interface, 'MODEL_PATH', path)
+    monkeypatch.setattr(web_interface, '_predictor', None)
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    try:
+        conn.request('POST', '/predict', json.dumps({'instances': [[1, 2, 3], {'a': 1, 'b': 2, 'c': 3}]}),
+                     {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        predictions = json.loads(response.read())['predictions']
+        assert response.status == 200
+        assert len(predictions) == 2 and predictions[0] == pytest.approx(predictions[1])
+        conn.request('POST', '/predict', json.dumps({'instances': [[1, 2]]}), {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 400
+    finally:
+        web_interface._predictor.close()
+
+
+
+def test_slow_prediction_times_out_with_504(server, monkeypatch):
+    np = pytest.importorskip('numpy')
+    pytest.importorskip('torch')
+    import inference
+
+    class Stuck:
+        def rows(self, instances):
+            return np.asarray(instances, dtype=np.float32)
+
+        def predict(self, rows):
+            release.wait(10)
+            return rows.sum(axis=1)
+
+    release = threading.Event()
+    batcher = inference.MicroBatcher(Stuck(), max_rows=8, max_wait=0)
+    monkeypatch.setattr(web_interface, '_predictor', batcher)
+    monkeypatch.setattr(web_interface, 'PREDICT_TIMEOUT', 0.2)
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    try:
+        conn.request('POST', '/predict', json.dumps({'instances': [[1, 2]]}), {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        assert response.status == 504 and 'error' in json.loads(response.read())
+    finally:
+        release.set()
+        batcher.close()
+
+
+def test_body_that_is_not_utf8_gets_a_400(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    for path in ('/predict', '/api/batch', '/enroll'):
+        conn.request('POST', path, b'{"instances": "\xff\xfe"}', {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        assert response.status == 400 and 'UTF-8' in json.loads(response.read())['error']
+    # The connection is still usable afterwards
+    assert request(conn, 'GET', '/api/courses')[0] == 200
+
+def test_rows_added_after_the_index_loaded_are_found(server, db):
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    status, _ = request(conn, 'GET', '/api/search?q=B0000001')
+    assert status == 200 and web_interface._search_index is not None
+    # Inserted behind the app's back: not logged, so the index only learns of them at the next reload
+    with sqlite3.connect(db) as direct:
+        direct.execute('INSERT INTO students ("B#", first_name, last_name, st_level, gpa, email) '
+                       "VALUES ('B9000001', 'Ada', 'Direct', 'master', 3.5, 'ada@example.edu')")
+        direct.execute('INSERT INTO classes (classid, dept_code, "COURSE#", "SECT#", year, semester, "LIMIT") '
+                       "VALUES ('c900001', 'CS', 999, 1, 2021, 'Spring', 10)")
+    assert not web_interface._search_index.has_student('B9000001')
+    status, body = request(conn, 'GET', '/api/classes/c900001/students')
+    assert status == 200, body
+    status, page = request(conn, 'POST', '/delete', 'bnum=B9000001')
+    assert 'has been successfully deleted' in page
+    status, page = request(conn, 'POST', '/delete', 'bnum=B9000001')
+    assert 'does not exist' in page
+    status, body = request(conn, 'GET', '/api/classes/c999999/students')
+    assert status == 404
+
+
+def test_batch_values_cannot_end_the_sqlplus_block(sqlplus_server, tmp_path, monkeypatch):
+    record = tmp_path / 'executed.txt'
+    monkeypatch.setenv('FAKE_SQLPLUS_RECORD', str(record))
+    conn = http.client.HTTPConnection('127.0.0.1', sqlplus_server, timeout=10)
+    payload = [{'op': 'enroll', 'bnum': "B1\n/\nEXEC fake_record('injected')", 'classid': 'c1'}]
+    conn.request('POST', '/api/batch', json.dumps(payload), {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    assert response.status == 400
+    assert 'control characters' in body['error']
+    for value in ('c1\x00', 'c1\r', 'c1\x1b'):
+        with pytest.raises(ValueError):
+            web_interface.parse_batch_json([{'op': 'drop', 'bnum': 'B1', 'classid': value}])
+    # The script builder refuses them too, should a request reach it some other way
+    with pytest.raises(ValueError):
+        web_interface.SqlPlusBackend().call_batch([('enroll', "B1\n/\nEXEC fake_record('injected')", 'c1')])
+    assert not record.exists()
+
+
+def query_plans(conn, statements):
+    return [' '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)) for sql, params in statements]
+
+
+def test_cursor_pages_seek_the_key_index(db):
+    backend = web_interface.SqliteBackend(db)
+    conn = backend.pkg().conn
+    statements = []
+    conn.set_trace_callback(statements.append)
+    _, after = web_interface.split_page(backend.call('show_students_page', '', 5))
+    backend.call('show_students_page', after, 5)
+    _, after = web_interface.split_page(backend.call('show_g_enrollments_page', '', '', 5))
+    backend.call('show_g_enrollments_page', *after.split(','), 5)
+    conn.set_trace_callback(None)
+    selects = [(sql, ()) for sql in statements if sql.startswith('SELECT')]
+    assert len(selects) == 4
+    for sql, plan in zip([s for s, _ in selects], query_plans(conn, selects)):
+        if '>' in sql:   # a cursor page: a range on the primary key, not a scan of the table
+            assert 'SEARCH' in plan and 'SCAN' not in plan, (sql, plan)
+    for name, cursor in (('students', {'after': 'B0000100'}),
+                         ('enrollments', {'after_b': 'B0000100', 'after_classid': 'c000001'})):
+        sql, binds = web_interface.api_sql(name, dict(cursor, page_rows=11), backend.limit_clause)
+        [plan] = query_plans(conn, [(sql, binds)])
+        assert 'SEARCH' in plan and 'SCAN' not in plan, (sql, plan)
+    backend.close()
+
+
+def test_cursor_pages_cover_every_row_once(server, db):
+    with sqlite3.connect(db) as direct:
+        students = [b for b, in direct.execute('SELECT "B#" FROM students ORDER BY "B#"')]
+        enrollments = [f'{b},{c}' for b, c in direct.execute('SELECT "G_B#", classid FROM g_enrollments '
+                                                             'ORDER BY "G_B#", classid')]
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    for path, expected, key in (('/api/students', students, lambda row: row['bnum']),
+                                ('/api/enrollments', enrollments, lambda row: f"{row['bnum']},{row['classid']}")):
+        seen, cursor = [], ''
+        while True:
+            status, body = request(conn, 'GET', f'{path}?limit=7&after={cursor}')
+            assert status == 200, body
+            page = json.loads(body)
+            seen += [key(row) for row in page['rows']]
+            if page['next'] is None:
+                break
+            assert page['next'] == seen[-1] and page['count'] == 7
+            cursor = page['next']
+        assert seen == expected
+    # The HTML listings go through the procedures and their trailing NEXT: line
+    seen, cursor = [], ['']
+    while True:
+        lines, next_cursor = web_interface.list_page('show_students_page', *cursor, limit=7)
+        seen += [line.split()[0] for line in lines]
+        if next_cursor is None:
+            break
+        cursor = [next_cursor]
+    assert seen == students
+    lines, next_cursor = web_interface.list_page('show_students_page', students[-1], limit=7)
+    assert lines == [] and next_cursor is None
+
+
+def add_logs(db, days):
+    with sqlite3.connect(db) as direct:
+        direct.executemany('INSERT INTO logs ("LOG#", user_name, op_time, table_name, operation, tuple_keyvalue) '
+                           "VALUES (?, 'TEST', ?, 'students', 'insert', ?)",
+                           [(n, f'2021-01-{n:02d} 12:00:00', f'B{n:07d}') for n in range(1, days + 1)])
+
+
+def test_log_pages_filter_by_time_and_seek(server, db):
+    add_logs(db, 28)
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    seen, before = [], ''
+    while True:
+        status, body = request(conn, 'GET', f'/api/logs?from=2021-01-05&to=2021-01-11&limit=4&before={before}')
+        assert status == 200, body
+        page = json.loads(body)
+        seen += [row['log_no'] for row in page['rows']]
+        if page['next'] is None:
+            break
+        before = page['next']
+    assert seen == [10, 9, 8, 7, 6, 5]
+    status, body = request(conn, 'GET', '/api/logs?to=2021-01-03')
+    assert [row['log_no'] for row in json.loads(body)['rows']] == [2, 1]
+    lines, next_cursor = web_interface.list_page('show_logs_page', 27, limit=3,
+                                                 filters=('2021-01-20 00:00:00', ''))
+    assert [line.split()[0] for line in lines] == ['[26]', '[25]', '[24]'] and next_cursor == '24'
+    lines, next_cursor = web_interface.list_page('show_logs_page', next_cursor, limit=3,
+                                                 filters=('2021-01-20 00:00:00', ''))
+    assert [line.split()[0] for line in lines] == ['[23]', '[22]', '[21]'] and next_cursor == '21'
+    lines, next_cursor = web_interface.list_page('show_logs_page', next_cursor, limit=3,
+                                                 filters=('2021-01-20 00:00:00', ''))
+    assert [line.split()[0] for line in lines] == ['[20]'] and next_cursor is None
+    status, body = request(conn, 'GET', '/api/logs?from=yesterday')
+    assert status == 400
+
+    conn = web_interface.get_backend().pkg().conn
+    for params in ({'before': 20}, {'before': 20, 'from_time': '2021-01-05 00:00:00'},
+                   {'from_time': '2021-01-05 00:00:00', 'to_time': '2021-01-11 00:00:00'}):
+        sql, binds = web_interface.api_sql('logs', dict({'before': None, 'from_time': None, 'to_time': None},
+                                                        **params, page_rows=5), 'LIMIT :page_rows')
+        [plan] = query_plans(conn, [(sql, binds)])
+        assert 'SEARCH' in plan and 'SCAN' not in plan, (sql, plan)
+
+
+def test_idle_keep_alive_connections_yield_to_queued_ones(server):
+    # The fixture's server has 2 workers; both are holding idle kept-alive connections
+    idle = [http.client.HTTPConnection('127.0.0.1', server, timeout=30) for _ in range(2)]
+    for conn in idle:
+        assert request(conn, 'GET', '/api/courses')[0] == 200
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=30)
+    status, _ = request(conn, 'GET', '/api/courses')
+    # Not KEEPALIVE_TIMEOUT (15 s): an idle connection gave its worker up within a poll or two
+    assert status == 200 and time.perf_counter() - start < 1
+    # One idle connection was closed; a client retries on a new one, as it would after any idle close
+    closed = 0
+    for conn in idle:
+        try:
+            status, _ = request(conn, 'GET', '/api/courses')
+        except (http.client.RemoteDisconnected, ConnectionError):
+            closed += 1
+            conn.close()
+            status, _ = request(conn, 'GET', '/api/courses')
+        assert status == 200
+    assert closed == 1
+    # With no one waiting, a connection stays open between requests
+    sock = conn.sock
+    assert request(conn, 'GET', '/api/courses')[0] == 200 and conn.sock is sock
+
+
+def test_old_logs_are_archived_and_hidden_from_the_recent_window(server, db):
+    with sqlite3.connect(db) as direct:
+        stamps = [direct.execute("SELECT datetime('now', ?)", (age,)).fetchone()[0]
+                  for age in ('-400 days', '-300 days', '-1 minutes')]
+        direct.executemany('INSERT INTO logs ("LOG#", user_name, op_time, table_name, operation, tuple_keyvalue) '
+                           "VALUES (?, 'TEST', ?, 'students', 'insert', ?)",
+                           [(n, stamp, f'B{n:07d}') for n, stamp in enumerate(stamps, 1)])
+        window = direct.execute("SELECT datetime('now', 'start of month', ?)",
+                                (f'{1 - web_interface.reg_pkg_sqlite.RECENT_LOG_MONTHS} months',)).fetchone()[0]
+    # Same clock as op_time: UTC, whatever the server's local time zone
+    assert web_interface.recent_log_cutoff() == window
+    output = web_interface.call_procedure('archive_logs', 6)
+    assert output.startswith('Archived 2 log records')
+    with sqlite3.connect(db) as direct:
+        assert [n for n, in direct.execute('SELECT "LOG#" FROM logs')] == [3]
+        assert [n for n, in direct.execute('SELECT "LOG#" FROM logs_archive ORDER BY 1')] == [1, 2]
+    assert [line.split()[0] for line in web_interface.call_procedure('show_logs').splitlines()] == ['[3]']
+    ranged = web_interface.call_procedure('show_logs', '2000-01-01 00:00:00', '')
+    assert [line.split()[0] for line in ranged.splitlines()] == ['[3]', '[2]', '[1]']
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    status, body = request(conn, 'GET', '/api/logs?all=1')
+    assert status == 200 and [row['log_no'] for row in json.loads(body)['rows']] == [3]
+
+
+def test_recent_log_window_follows_utc_months(monkeypatch):
+    class Clock(web_interface.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # 23:30 UTC on 31 March is already 1 April in UTC+14
+            instant = web_interface.datetime(2021, 3, 31, 23, 30, tzinfo=timezone.utc)
+            return instant.astimezone(tz) if tz else instant.astimezone(timezone(timedelta(hours=14))).replace(tzinfo=None)
+
+    monkeypatch.setattr(web_interface, 'datetime', Clock)
+    monkeypatch.setattr(web_interface.reg_pkg_sqlite, 'RECENT_LOG_MONTHS', 2)
+    assert web_interface.recent_log_cutoff() == '2021-02-01 00:00:00'
+
+
+def test_enrollment_requires_direct_prerequisites_only(server, db):
+    # XX300 needs XX200, which needs XX100
+    with web_interface.reg_pkg_sqlite.connect(db, 'TEST') as direct:
+        direct.executemany('INSERT INTO courses (dept_code, "COURSE#", title) VALUES (?, ?, ?)',
+                           [('XX', 100, 'Basics'), ('XX', 200, 'More'), ('XX', 300, 'Most')])
+        direct.executemany('INSERT INTO prerequisites (dept_code, "COURSE#", pre_dept_code, "PRE_COURSE#") '
+                           'VALUES (?, ?, ?, ?)', [('XX', 300, 'XX', 200), ('XX', 200, 'XX', 100)])
+        direct.executemany('INSERT INTO classes (classid, dept_code, "COURSE#", "SECT#", year, semester, "LIMIT") '
+                           "VALUES (?, 'XX', ?, 1, ?, ?, 10)",
+                           [('x000200', 200, 2020, 'Fall'), ('x000300', 300, 2021, 'Spring')])
+        direct.executemany('INSERT INTO students ("B#", first_name, last_name, st_level, gpa, email) '
+                           "VALUES (?, 'Grad', 'Student', 'master', 3.0, ?)",
+                           [('B9100001', 'g1@example.edu'), ('B9100002', 'g2@example.edu')])
+        direct.execute("INSERT INTO g_enrollments (\"G_B#\", classid, score) VALUES ('B9100001', 'x000200', 98)")
+        assert direct.execute("SELECT depth FROM prereq_closure WHERE \"COURSE#\" = 300 AND \"PRE_COURSE#\" = 100"
+                              ).fetchone() == (2,)
+    # XX100 was never taken, but it is only an indirect prerequisite of XX300
+    assert web_interface.call_procedure('enroll_grad_student', 'B9100001', 'x000300') == 'Enrollment successful.'
+    assert web_interface.call_procedure('enroll_grad_student', 'B9100002', 'x000300') == 'Prerequisite not satisfied.'
+
+
+def test_metrics_render_in_prometheus_text_format(server):
+    registry = web_interface.Metrics(buckets=(0.1, 1))
+    registry.inc('reg_http_requests_total', route='/students', method='GET', status='200')
+    registry.inc('reg_http_requests_total', 2, route='/students', method='GET', status='200')
+    registry.inc('reg_db_errors_total', proc='say "hi"\n', code='ORA-20000')
+    for seconds in (0.05, 0.5, 3):
+        registry.observe('reg_db_call_seconds', seconds, proc='show_students')
+    registry.add_collector(lambda: [('reg_cache_entries', {}, 7)])
+    lines = registry.render().splitlines()
+    assert '# TYPE reg_db_call_seconds histogram' in lines
+    assert 'reg_http_requests_total{method="GET",route="/students",status="200"} 3' in lines
+    assert 'reg_db_errors_total{code="ORA-20000",proc="say \\"hi\\"\\n"} 1' in lines
+    # Buckets are cumulative, and +Inf equals the count
+    assert [line for line in lines if line.startswith('reg_db_call_seconds')] == [
+        'reg_db_call_seconds_bucket{proc="show_students",le="0.1"} 1',
+        'reg_db_call_seconds_bucket{proc="show_students",le="1"} 2',
+        'reg_db_call_seconds_bucket{proc="show_students",le="+Inf"} 3',
+        'reg_db_call_seconds_sum{proc="show_students"} 3.550000',
+        'reg_db_call_seconds_count{proc="show_students"} 3']
+    assert 'reg_cache_entries 7' in lines
+
+    def served(body, route):
+        prefix = f'reg_http_requests_total{{method="GET",route="{route}",status="200"}} '
+        return sum(float(line[len(prefix):]) for line in body.splitlines() if line.startswith(prefix))
+
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    status, before = request(conn, 'GET', '/metrics')
+    assert status == 200
+    request(conn, 'GET', '/api/classes/c000001/students')
+    request(conn, 'GET', '/api/classes/c000002/students')
+    _, after = request(conn, 'GET', '/metrics')
+    # Paths with ids are folded into one route label
+    assert served(after, '/api/classes/{classid}/students') - served(before, '/api/classes/{classid}/students') == 2
+    assert '# HELP reg_http_request_seconds' in after
+
+
+def fetch(conn, path, headers=None):
+    conn.request('GET', path, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_json_listing_revalidates_with_its_etag(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    response, body = fetch(conn, '/api/students?limit=5')
+    etag, first = response.getheader('ETag'), json.loads(body)['rows'][0]['bnum']
+    assert response.status == 200 and response.getheader('Cache-Control') == 'no-cache'
+    response, body = fetch(conn, '/api/students?limit=5', {'If-None-Match': etag})
+    assert response.status == 304 and body == b'' and response.getheader('ETag') == etag
+    response, _ = fetch(conn, '/api/students?limit=5', {'If-None-Match': '"someone-else", ' + etag})
+    assert response.status == 304
+    # A write to students invalidates the cached listing, so the old tag no longer matches
+    status, page = request(conn, 'POST', '/delete', f'bnum={first}')
+    assert 'has been successfully deleted' in page
+    response, body = fetch(conn, '/api/students?limit=5', {'If-None-Match': etag})
+    assert response.status == 200 and response.getheader('ETag') != etag
+    assert first not in [row['bnum'] for row in json.loads(body)['rows']]
+    response, body = fetch(conn, '/api/classes/c999999/students')
+    assert response.status == 404 and 'error' in json.loads(body)
+
+
+def test_gzip_is_negotiated_and_each_coding_has_its_own_etag(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    response, plain = fetch(conn, '/api/students?limit=50')
+    identity_tag = response.getheader('ETag')
+    assert response.getheader('Content-Encoding') is None and len(plain) >= web_interface.GZIP_MIN_BYTES
+    response, body = fetch(conn, '/api/students?limit=50', {'Accept-Encoding': 'br;q=1, gzip;q=0.5'})
+    assert response.getheader('Content-Encoding') == 'gzip' and response.getheader('Vary') == 'Accept-Encoding'
+    assert gzip.decompress(body) == plain and int(response.getheader('Content-Length')) == len(body)
+    gzip_tag = response.getheader('ETag')
+    assert gzip_tag == identity_tag[:-1] + '-gzip"'
+    # Either tag (and its weak form, as proxies rewrite it) revalidates either representation
+    for sent in (gzip_tag, identity_tag, 'W/' + gzip_tag):
+        response, body = fetch(conn, '/api/students?limit=50', {'Accept-Encoding': 'gzip', 'If-None-Match': sent})
+        assert response.status == 304 and body == b'' and response.getheader('ETag') == gzip_tag
+    response, body = fetch(conn, '/api/students?limit=50', {'Accept-Encoding': 'gzip;q=0, identity'})
+    assert response.getheader('Content-Encoding') is None and body == plain
+    # Below GZIP_MIN_BYTES compression is not worth it
+    response, body = fetch(conn, '/api/students?limit=1', {'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') is None and json.loads(body)['count'] == 1
+    # A streamed listing is gzipped as one stream across its chunks
+    response, body = fetch(conn, '/api/enrollments?all=1', {'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip' and response.getheader('Transfer-Encoding') == 'chunked'
+    _, plain = fetch(conn, '/api/enrollments?all=1')
+    assert gzip.decompress(body) == plain
+
+
+def test_static_pages_answer_conditional_gets(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    response, _ = fetch(conn, '/enroll')
+    etag, last_modified = response.getheader('ETag'), response.getheader('Last-Modified')
+    assert response.getheader('Cache-Control').startswith('public, max-age=')
+    response, body = fetch(conn, '/enroll', {'If-Modified-Since': last_modified})
+    assert response.status == 304 and body == b''
+    response, _ = fetch(conn, '/enroll', {'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+    assert response.status == 200
+    # If-None-Match wins when both are sent
+    response, _ = fetch(conn, '/enroll', {'If-None-Match': '"other"', 'If-Modified-Since': last_modified})
+    assert response.status == 200
+    response, _ = fetch(conn, '/enroll', {'If-None-Match': etag, 'If-Modified-Since': 'garbage'})
+    assert response.status == 304
+
+
+def test_static_pages_keep_precompressed_variants(server):
+    page = web_interface.StaticPage(b'<html>' + b'menu item ' * 200 + b'</html>')
+    assert gzip.decompress(page.variants['gzip']) == page.variants['identity']
+    assert 'br' in page.variants or web_interface.brotli is None
+    assert page.negotiate('') == 'identity'
+    assert page.negotiate('gzip;q=0') == 'identity'
+    assert page.negotiate('gzip, deflate') == 'gzip'
+    assert page.negotiate('*') == min(page.variants, key=lambda coding: len(page.variants[coding]))
+    assert page.etag == web_interface.StaticPage(page.variants['identity']).etag
+    home = web_interface.STATIC_PAGES['/']
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    response, body = fetch(conn, '/', {'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip' and body == home.variants['gzip']
+    response, body = fetch(conn, '/')
+    assert body == home.variants['identity'] and response.getheader('ETag') == home.etag
+
+
+def test_pages_escape_what_they_render(server):
+    listing = web_interface.render_list_page('Class <x>', ['<script>alert(1)</script>'], '<p>footer</p>').decode()
+    assert '&lt;script&gt;alert(1)&lt;/script&gt;' in listing and '<script>' not in listing
+    assert 'Class &lt;x&gt;' in listing and '<p>footer</p>' in listing
+    message = web_interface.render_message_page('Oops', 'line one\n<b>two</b>').decode()
+    assert 'line one<br>&lt;b&gt;two&lt;/b&gt;' in message
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    status, page = request(conn, 'POST', '/class', 'classid=%3Cimg%20src%3Dx%3E')
+    assert status == 200 and '<img src=x>' not in page and '&lt;img src=x&gt;' in page
+
+
+def test_show_all_listings_are_streamed_in_chunks(server, db, monkeypatch):
+    monkeypatch.setattr(web_interface, 'STREAM_CHUNK_BYTES', 256)
+    with sqlite3.connect(db) as direct:
+        enrollments = direct.execute('SELECT COUNT(*) FROM g_enrollments').fetchone()[0]
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    response, body = fetch(conn, '/api/enrollments?all=1')
+    assert response.getheader('Transfer-Encoding') == 'chunked' and response.getheader('Content-Length') is None
+    document = json.loads(body)
+    assert document['count'] == len(document['rows']) == enrollments
+    response, body = fetch(conn, '/enrollments?all=1')
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+    assert body.decode().count('</li>') == enrollments and body.rstrip().endswith(b'</html>')
+    # The same connection is still good after the terminating chunk
+    assert request(conn, 'GET', '/api/courses')[0] == 200
+    # HTTP/1.0 has no chunked encoding: the body is buffered and sent with a Content-Length
+    import socket
+    with socket.create_connection(('127.0.0.1', server), timeout=10) as sock:
+        sock.sendall(b'GET /api/enrollments?all=1 HTTP/1.0\r\n\r\n')
+        raw = b''
+        while chunk := sock.recv(65536):
+            raw += chunk
+    head, _, payload = raw.partition(b'\r\n\r\n')
+    assert b'chunked' not in head and f'Content-Length: {len(payload)}'.encode() in head
+    assert json.loads(payload) == document
+
+
+def test_backend_is_chosen_by_name_and_speaks_reg_pkg(db, monkeypatch):
+    monkeypatch.setattr(web_interface, '_backend', None)
+    monkeypatch.setattr(web_interface, 'DB_BACKEND', 'sqlite')
+    monkeypatch.setattr(web_interface, 'SQLITE_PATH', db)
+    backend = web_interface.get_backend()
+    try:
+        assert isinstance(backend, web_interface.SqliteBackend) and web_interface.get_backend() is backend
+        rows = backend.query('SELECT "B#", first_name FROM students WHERE "B#" = :b', {'b': 'B0000001'})
+        assert rows == [{'b#': 'B0000001', 'first_name': 'First1'}]
+        assert backend.student_exists('B0000001') and not backend.student_exists('B9999999')
+        assert backend.call('list_students_in_class', 'c999999') == 'The classid is invalid.'
+        # Database errors come back as ORA- output, as from Oracle
+        assert backend.call('enroll_grad_student', 'B0000001').startswith('ORA-20000')
+        with pytest.raises(ValueError):
+            backend.call('no_such_procedure')
+        assert backend.call_many([('list_students_in_class', ('c999999',)), ('show_summary', ())])[1] \
+            .startswith('Current term: Spring 2021')
+        # Each thread gets its own connection
+        results = []
+        thread = threading.Thread(target=lambda: results.append(backend.student_exists('B0000001')))
+        thread.start()
+        thread.join()
+        assert results == [True] and len(backend._conns) == 2
+    finally:
+        backend.close()
+    monkeypatch.setattr(web_interface, '_backend', None)
+    monkeypatch.setattr(web_interface, 'DB_BACKEND', 'mysql')
+    with pytest.raises(RuntimeError, match='REG_DB_BACKEND'):
+        web_interface.get_backend()
+    if web_interface.oracledb is None:
+        monkeypatch.setattr(web_interface, 'DB_BACKEND', 'oracledb')
+        with pytest.raises(RuntimeError, match='python-oracledb'):
+            web_interface.get_backend()
+
+
+def test_enrollment_triggers_keep_class_size_and_the_audit_log(db):
+    conn = web_interface.reg_pkg_sqlite.connect(db, 'AUDITOR')
+    sizes = 'SELECT classid, class_size FROM classes ORDER BY classid'
+    counts = ('SELECT c.classid, COUNT(g.classid) FROM classes c LEFT JOIN g_enrollments g ON g.classid = c.classid '
+              'GROUP BY c.classid ORDER BY c.classid')
+    with conn:
+        conn.execute('UPDATE classes SET class_size = (SELECT COUNT(*) FROM g_enrollments g '
+                     'WHERE g.classid = classes.classid)')
+        conn.execute('DELETE FROM logs')
+        victims = [b for b, in conn.execute('SELECT DISTINCT "G_B#" FROM g_enrollments ORDER BY 1 LIMIT 3')]
+        enrolled = conn.execute('SELECT "G_B#", classid FROM g_enrollments WHERE "G_B#" IN (?, ?, ?)',
+                                victims).fetchall()
+        # One statement deleting several students, as the compound trigger's benchmark does
+        conn.execute('DELETE FROM students WHERE "B#" IN (?, ?, ?)', victims)
+    assert conn.execute(sizes).fetchall() == conn.execute(counts).fetchall()
+    assert not conn.execute('SELECT COUNT(*) FROM g_enrollments WHERE "G_B#" IN (?, ?, ?)', victims).fetchone()[0]
+    logged = conn.execute('SELECT user_name, table_name, operation, tuple_keyvalue FROM logs').fetchall()
+    assert sorted(logged) == sorted([('AUDITOR', 'G_ENROLLMENTS', 'delete', f'{b},{c}') for b, c in enrolled] +
+                                    [('AUDITOR', 'STUDENTS', 'delete', b) for b in victims])
+    student = conn.execute('SELECT "B#" FROM students ORDER BY 1 LIMIT 1').fetchone()[0]
+    classid = conn.execute('SELECT classid FROM classes WHERE classid NOT IN '
+                           '(SELECT classid FROM g_enrollments WHERE "G_B#" = ?) ORDER BY 1 LIMIT 1',
+                           (student,)).fetchone()[0]
+    with conn:
+        conn.execute('DELETE FROM logs')
+        conn.execute('INSERT INTO g_enrollments ("G_B#", classid) VALUES (?, ?)', (student, classid))
+    # The insert log carries the new row's key
+    assert conn.execute('SELECT operation, tuple_keyvalue FROM logs').fetchall() == [('insert', f'{student},{classid}')]
+    assert conn.execute(sizes).fetchall() == conn.execute(counts).fetchall()
+    conn.close()
+
+
+def test_term_load_counter_and_configurable_term(server, db):
+    with web_interface.reg_pkg_sqlite.connect(db, 'TEST') as direct:
+        direct.execute('INSERT INTO students ("B#", first_name, last_name, st_level, gpa, email) '
+                       "VALUES ('B9200001', 'Load', 'Test', 'PhD', 3.9, 'load@example.edu')")
+        # Six open classes this term with no prerequisites, and one next term
+        direct.executemany('INSERT INTO courses (dept_code, "COURSE#", title) VALUES (?, ?, ?)',
+                           [('LD', n, f'Load {n}') for n in range(1, 8)])
+        direct.executemany('INSERT INTO classes (classid, dept_code, "COURSE#", "SECT#", year, semester, "LIMIT") '
+                           "VALUES (?, 'LD', ?, 1, ?, ?, 10)",
+                           [(f'l00000{n}', n, 2021, 'Spring') for n in range(1, 7)] + [('l000007', 7, 2021, 'Fall')])
+
+    def load(year=2021, semester='Spring'):
+        with sqlite3.connect(db) as direct:
+            row = direct.execute('SELECT n_classes FROM student_term_load WHERE "B#" = ? AND year = ? AND semester = ?',
+                                 ('B9200001', year, semester)).fetchone()
+        return row and row[0]
+
+    for n in range(1, 6):
+        assert web_interface.call_procedure('enroll_grad_student', 'B9200001', f'l00000{n}') == 'Enrollment successful.'
+    assert load() == 5
+    assert web_interface.call_procedure('enroll_grad_student', 'B9200001', 'l000006') == \
+        'Students cannot be enrolled in more than five classes in the same semester.'
+    assert web_interface.call_procedure('drop_grad_student', 'B9200001', 'l000001') == 'Drop successful.'
+    assert load() == 4
+    assert web_interface.call_procedure('enroll_grad_student', 'B9200001', 'l000006') == 'Enrollment successful.'
+    # Classes of another term are closed until it becomes the current one
+    assert web_interface.call_procedure('enroll_grad_student', 'B9200001', 'l000007') == \
+        'Cannot enroll into a class from a previous semester.'
+    before = web_interface.call_procedure('show_summary')
+    assert web_interface.call_procedure('set_current_term', 2021, 'Fall') == 'Current term set to Fall 2021.'
+    # The cached dashboard figures were invalidated by the reg_config write
+    assert 'Current term: Fall 2021' in web_interface.call_procedure('show_summary') != before
+    assert web_interface.call_procedure('enroll_grad_student', 'B9200001', 'l000007') == 'Enrollment successful.'
+    assert (load(), load(2021, 'Fall')) == (5, 1)
+    assert web_interface.call_procedure('drop_grad_student', 'B9200001', 'l000002') == \
+        'Only enrollment in the current semester can be dropped.'
+    # The counter also guards the last class of a term
+    assert web_interface.call_procedure('drop_grad_student', 'B9200001', 'l000007') == \
+        'This is the only class for this student in Fall 2021 and cannot be dropped.'
+    web_interface.call_procedure('delete_student', 'B9200001')
+    assert load() is None and load(2021, 'Fall') is None
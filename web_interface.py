@@ -1,78 +1,1927 @@
+import argparse
+import atexit
+import bisect
+import csv
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import selectors
 import subprocess
 import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from functools import wraps
+from html import escape
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, unquote, urlencode
+
+import reg_pkg_sqlite
+
+try:
+    import oracledb
+except ImportError:  # only needed for REG_DB_BACKEND=oracledb
+    oracledb = None
+
+try:
+    import brotli
+except ImportError:  # optional: static pages are then offered as gzip and identity only
+    brotli = None
 
 # ===== Database Connection Settings =====
 DB_USER = "YourID"
 DB_PASS = "Password"
 DB_DSN  = "acad111"  # TNS alias for Oracle on HarveyV
+DB_BACKEND = os.environ.get('REG_DB_BACKEND', 'sqlplus')   # sqlplus | oracledb | sqlite
+SQLITE_PATH = os.environ.get('REG_SQLITE_PATH', 'reg.db')
+STMT_CACHE_SIZE = int(os.environ.get('REG_STMT_CACHE_SIZE', '40'))   # oracledb statements cached per connection
+# SQLite only: queue audit rows and drain them in the background. On Oracle this is the
+# async_log setting of sequence_triggers.sql, drained by the LOG_QUEUE_DRAIN job.
+ASYNC_LOG = os.environ.get('REG_ASYNC_LOG', '0') == '1'
+LOG_FLUSH_SECONDS = float(os.environ.get('REG_LOG_FLUSH_SECONDS', '2'))
+LOG_FLUSH_ROWS = int(os.environ.get('REG_LOG_FLUSH_ROWS', '5000'))   # most rows moved per flush
 
-# ===== Core SQL*Plus Integration =====
-def run_sqlplus(sql_block: str) -> str:
+# ===== SQL*Plus Session Pool Settings =====
+SQLPLUS_BIN = os.environ.get('SQLPLUS_BIN', 'sqlplus')                     # resolved on PATH
+POOL_SIZE = int(os.environ.get('REG_POOL_SIZE', '4'))                       # max live sessions
+POOL_IDLE_TIMEOUT = float(os.environ.get('REG_POOL_IDLE_TIMEOUT', '300'))   # seconds before an idle session is closed
+POOL_HEALTH_INTERVAL = float(os.environ.get('REG_POOL_HEALTH_INTERVAL', '30'))  # ping sessions idle longer than this
+POOL_ACQUIRE_TIMEOUT = float(os.environ.get('REG_POOL_ACQUIRE_TIMEOUT', '30'))
+POOL_CALL_TIMEOUT = float(os.environ.get('REG_POOL_CALL_TIMEOUT', '60'))
+
+# ===== Listing Cache Settings =====
+CACHE_TTL = float(os.environ.get('REG_CACHE_TTL', '30'))                # seconds; 0 disables the cache
+CACHE_MAX_ENTRIES = int(os.environ.get('REG_CACHE_MAX_ENTRIES', '256'))
+
+# ===== Pagination Settings =====
+PAGE_SIZE = int(os.environ.get('REG_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('REG_MAX_PAGE_SIZE', '1000'))
+DASHBOARD_ROWS = int(os.environ.get('REG_DASHBOARD_ROWS', '10'))   # students / log records on /dashboard
+
+# ===== Search Index Settings =====
+SEARCH_INDEX = os.environ.get('REG_SEARCH_INDEX', '1') == '1'          # 0: /search is off, existence checks query the DB
+INDEX_REFRESH_SECONDS = float(os.environ.get('REG_INDEX_REFRESH_SECONDS', '5'))    # poll logs for deleted students
+INDEX_RELOAD_SECONDS = float(os.environ.get('REG_INDEX_RELOAD_SECONDS', '300'))    # full reload (picks up rows added outside the app)
+SEARCH_LIMIT = int(os.environ.get('REG_SEARCH_LIMIT', '20'))
+
+# ===== Web Server Settings =====
+WEB_PORT = int(os.environ.get('REG_WEB_PORT', '8000'))
+WEB_WORKERS = int(os.environ.get('REG_WEB_WORKERS', str(min(32, (os.cpu_count() or 1) * 4))))
+WEB_QUEUE = int(os.environ.get('REG_WEB_QUEUE', '64'))           # accepted connections waiting for a worker
+KEEPALIVE_TIMEOUT = float(os.environ.get('REG_KEEPALIVE_TIMEOUT', '15'))  # idle keep-alive connections are closed after this
+KEEPALIVE_POLL = float(os.environ.get('REG_KEEPALIVE_POLL', '0.05'))  # how often an idle connection checks for queued ones
+STREAM_CHUNK_BYTES = int(os.environ.get('REG_STREAM_CHUNK_BYTES', '16384'))  # coalesce streamed rows up to this size
+GZIP_MIN_BYTES = int(os.environ.get('REG_GZIP_MIN_BYTES', '1024'))   # smaller dynamic responses go out uncompressed
+GZIP_LEVEL = int(os.environ.get('REG_GZIP_LEVEL', '6'))              # for dynamic responses; static pages use 9
+STATIC_MAX_AGE = int(os.environ.get('REG_STATIC_MAX_AGE', '3600'))   # Cache-Control max-age of the home and form pages
+
+# ===== Metrics Settings =====
+LATENCY_BUCKETS = tuple(float(b) for b in os.environ.get(
+    'REG_LATENCY_BUCKETS', '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10').split(','))   # seconds
+SLOW_REQUEST_MS = float(os.environ.get('REG_SLOW_REQUEST_MS', '0'))   # log requests slower than this; 0 = off
+SLOW_CALL_MS = float(os.environ.get('REG_SLOW_CALL_MS', '0'))         # log DB calls slower than this; 0 = off
+SLOW_LOG = os.environ.get('REG_SLOW_LOG', '')                         # file for the slow log; stderr if unset
+
+# ===== Metrics =====
+# name -> (type, help); everything exported at /metrics is declared here.
+METRICS = {
+    'reg_http_requests_total': ('counter', 'HTTP requests by route, method and status.'),
+    'reg_http_request_seconds': ('histogram', 'HTTP request latency by route and method.'),
+    'reg_http_requests_in_flight': ('gauge', 'HTTP requests being handled right now.'),
+    'reg_http_rejected_total': ('counter', 'Connections turned away with 503 because every worker and queue slot was taken.'),
+    'reg_db_call_seconds': ('histogram', 'Database call latency by procedure or query (cache misses only).'),
+    'reg_db_calls_in_flight': ('gauge', 'Database calls running right now.'),
+    'reg_db_errors_total': ('counter', 'Database calls whose output carried an ORA- error, by procedure and code.'),
+    'reg_stage_seconds': ('histogram', 'Time spent in each stage: sqlplus spawn, DB round trip, output filtering, page rendering, response write.'),
+    'reg_sqlplus_spawns_total': ('counter', 'sqlplus processes started.'),
+    'reg_cache_entries': ('gauge', 'Entries in the listing cache.'),
+    'reg_cache_hits_total': ('counter', 'Listing cache hits.'),
+    'reg_cache_misses_total': ('counter', 'Listing cache misses.'),
+    'reg_cache_evictions_total': ('counter', 'Listing cache LRU evictions.'),
+    'reg_cache_invalidations_total': ('counter', 'Listing cache entries dropped by writes.'),
+    'reg_pool_size': ('gauge', 'Most sessions the database pool will open.'),
+    'reg_pool_sessions': ('gauge', 'Database pool sessions by state.'),
+    'reg_search_index_rows': ('gauge', 'Students and classes in the search index.'),
+    'reg_predict_batches_total': ('counter', 'Forward passes run for /predict.'),
+    'reg_predict_rows_total': ('counter', 'Rows predicted for /predict.'),
+    'reg_predict_batch_seconds': ('histogram', 'Duration of one /predict forward pass.'),
+}
+
+
+class Metrics:
+    """
+    Thread-safe counters, gauges and histograms keyed by (name, labels), rendered in the
+    Prometheus text format. Values owned by other objects (cache, pool) are read at scrape
+    time from the registered collectors.
+    """
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values = {}       # (name, labels) -> float, for counters and gauges
+        self._histograms = {}   # (name, labels) -> [count per bucket..., +Inf count, sum]
+        self._collectors = []   # callables yielding (name, labels dict, value)
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += 1
+            hist[-1] += seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    @staticmethod
+    def _labels(pairs, extra: str = '') -> str:
+        parts = ['%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                 for k, v in pairs]
+        if extra:
+            parts.append(extra)
+        return '{' + ','.join(parts) + '}' if parts else ''
+
+    def render(self) -> str:
+        with self._lock:
+            values = dict(self._values)
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                values[self._key(name, labels)] = value
+        lines = []
+        for name, (kind, text) in METRICS.items():
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'histogram':
+                for (n, labels), hist in sorted(histograms.items()):
+                    if n != name:
+                        continue
+                    for bound, count in zip(self.buckets, hist):
+                        le = 'le="%g"' % bound
+                        lines.append(f"{name}_bucket{self._labels(labels, le)} {count}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{self._labels(labels, le)} {hist[-2]}")
+                    lines.append(f"{name}_sum{self._labels(labels)} {hist[-1]:.6f}")
+                    lines.append(f"{name}_count{self._labels(labels)} {hist[-2]}")
+            else:
+                for (n, labels), value in sorted(values.items()):
+                    if n == name:
+                        lines.append(f"{name}{self._labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+_slow_log_lock = threading.Lock()
+
+
+def slow_log(kind: str, elapsed: float, threshold_ms: float, detail: str):
+    """
+    Append one line to the slow log if elapsed (seconds) is over threshold_ms (0 = off).
+    """
+    if threshold_ms <= 0 or elapsed * 1000 < threshold_ms:
+        return
+    line = f"{time.strftime('%Y-%m-%dT%H:%M:%S')} SLOW {kind} {elapsed * 1000:.1f}ms {detail}\n"
+    with _slow_log_lock:
+        if SLOW_LOG:
+            with open(SLOW_LOG, 'a', encoding='utf-8') as f:
+                f.write(line)
+        else:
+            sys.stderr.write(line)
+
+
+def ora_code(output: str):
+    """
+    The first ORA-nnnnn code in a procedure's output, or None if it succeeded.
+    """
+    if 'ORA-' not in output:
+        return None
+    m = re.search(r'ORA-\d+', output)
+    return m.group(0) if m else 'ORA-'
+
+
+@contextmanager
+def db_call(label: str, detail: str = ''):
+    """
+    Time one database call for reg_db_call_seconds, the in-flight gauge and the slow log.
+    """
+    metrics.inc('reg_db_calls_in_flight', 1)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        metrics.inc('reg_db_errors_total', call=label, code=ora_code(str(e)) or type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.inc('reg_db_calls_in_flight', -1)
+        metrics.observe('reg_db_call_seconds', elapsed, call=label)
+        slow_log('call', elapsed, SLOW_CALL_MS, f"{label}{detail}")
+
+
+def count_db_error(label: str, output: str):
+    code = ora_code(output)
+    if code is not None:
+        metrics.inc('reg_db_errors_total', call=label, code=code)
+
+# ===== SQL*Plus Session Pool =====
+class SessionError(Exception):
+    """
+    Raised when a pooled SQL*Plus session dies, times out or cannot be obtained.
+    sent is True once the block was written to sqlplus: it may have run (and autocommitted)
+    even though its output was lost, so it must not be sent again.
+    """
+    def __init__(self, message: str, sent: bool = False):
+        super().__init__(message)
+        self.sent = sent
+
+
+class SqlPlusSession:
+    """
+    A long-lived sqlplus process. Each SQL block is followed by a PROMPT marker so the
+    output belonging to that block can be read back without waiting for the process to exit.
+    """
+    def __init__(self):
+        cmd = [SQLPLUS_BIN, '-s', f"{DB_USER}/{DB_PASS}@{DB_DSN}"]
+        start = time.perf_counter()
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1
+        )
+        self._lines = queue.Queue()
+        threading.Thread(target=self._pump, daemon=True).start()
+        self.last_used = time.monotonic()
+        try:
+            # The session outlives each block, so nothing would commit on EXIT any more.
+            # DEFINE OFF: an & in a bound value would otherwise prompt for a substitution
+            # variable and read the next line (the PROMPT marker) as its value.
+            self.execute("SET SERVEROUTPUT ON\nSET FEEDBACK OFF\nSET VERIFY OFF\nSET AUTOCOMMIT ON\nSET DEFINE OFF\n")
+        except SessionError as e:
+            self.close()
+            raise SessionError(f"sqlplus session did not start: {e}")
+        # Spawn through login and the first answered block
+        metrics.inc('reg_sqlplus_spawns_total')
+        metrics.observe('reg_stage_seconds', time.perf_counter() - start, stage='spawn')
+
+    def _pump(self):
+        for line in self.proc.stdout:
+            self._lines.put(line.rstrip('\n'))
+        self._lines.put(None)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def execute(self, sql_block: str, timeout: float = POOL_CALL_TIMEOUT) -> list:
+        """
+        Send one SQL block and return the raw output lines it produced.
+        """
+        return list(self.iter_execute(sql_block, timeout))
+
+    def iter_execute(self, sql_block: str, timeout: float = POOL_CALL_TIMEOUT):
+        """
+        Send one SQL block and yield its raw output lines as sqlplus prints them.
+        timeout is the longest silence allowed between two lines.
+        """
+        marker = f"__REG_END_{uuid.uuid4().hex}__"
+        start = time.perf_counter()
+        if not self.alive():
+            raise SessionError("sqlplus session is gone")
+        try:
+            self.proc.stdin.write(f"{sql_block.rstrip()}\nPROMPT {marker}\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as e:
+            raise SessionError(f"sqlplus session is gone: {e}")
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                raise SessionError(f"sqlplus did not answer within {timeout}s", sent=True)
+            if line is None:
+                raise SessionError("sqlplus exited", sent=True)
+            if line.strip() == marker:
+                break
+            yield line
+        self.last_used = time.monotonic()
+        metrics.observe('reg_stage_seconds', time.perf_counter() - start, stage='db_roundtrip')
+
+    def ping(self) -> bool:
+        try:
+            self.execute('', timeout=5)
+            return True
+        except SessionError:
+            return False
+
+    def close(self):
+        try:
+            self.proc.stdin.write("EXIT\n")
+            self.proc.stdin.flush()
+            self.proc.wait(timeout=2)
+        except Exception:
+            self.proc.kill()
+
+
+class SqlPlusPool:
     """
-    Execute a SQL*Plus session with the provided SQL/PLSQL block and return its output.
+    Bounded pool of SqlPlusSession objects with idle eviction, health checks on checkout
+    and reconnect-on-failure.
     """
-    cmd = ['sqlplus', '-s', f"{DB_USER}/{DB_PASS}@{DB_DSN}"]
-    proc = subprocess.Popen(
-        cmd,
-        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-        text=True
-    )
-    out, err = proc.communicate(sql_block)
+    def __init__(self, size: int = POOL_SIZE, idle_timeout: float = POOL_IDLE_TIMEOUT,
+                 health_interval: float = POOL_HEALTH_INTERVAL, call_timeout: float = POOL_CALL_TIMEOUT):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.call_timeout = call_timeout
+        self._idle = []   # most recently used last
+        self._open = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._reaper = None
+
+    def _start_reaper(self):
+        if self._reaper is None and self.idle_timeout > 0:
+            self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._closed:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            self.evict_idle()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._cond:
+            stale = [s for s in self._idle if now - s.last_used > self.idle_timeout]
+            self._idle = [s for s in self._idle if s not in stale]
+            self._open -= len(stale)
+            self._cond.notify_all()
+        for s in stale:
+            s.close()
+
+    def acquire(self, timeout: float = POOL_ACQUIRE_TIMEOUT) -> SqlPlusSession:
+        self.evict_idle()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._closed:
+                raise SessionError("pool is closed")
+            self._start_reaper()
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise SessionError(f"no sqlplus session free after {timeout}s")
+            session = self._idle.pop() if self._idle else None
+            if session is None:
+                self._open += 1
+        if session is not None:
+            stale = time.monotonic() - session.last_used > self.health_interval
+            if session.alive() and (not stale or session.ping()):
+                return session
+            session.close()
+        try:
+            return SqlPlusSession()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, session: SqlPlusSession, broken: bool = False):
+        keep = not broken and not self._closed and session.alive()
+        with self._cond:
+            if keep:
+                self._idle.append(session)
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if not keep:
+            session.close()
+
+    @contextmanager
+    def session(self):
+        s = self.acquire()
+        try:
+            yield s
+        except BaseException:
+            self.release(s, broken=True)
+            raise
+        else:
+            self.release(s)
+
+    def run(self, sql_block: str) -> list:
+        """
+        Run a block on a pooled session, reconnecting once if the session has died.
+        Only a block that never reached sqlplus is retried: once sent it may have run and
+        committed, and running enroll / drop / delete twice is worse than reporting the error.
+        """
+        for attempt in (1, 2):
+            try:
+                with self.session() as s:
+                    return s.execute(sql_block, self.call_timeout)
+            except SessionError as e:
+                if e.sent or attempt == 2:
+                    raise
+
+    def iter_run(self, sql_block: str):
+        """
+        Stream a block's output from a pooled session. A consumer that stops early leaves
+        unread output behind, so the session is then discarded rather than returned.
+        """
+        s = self.acquire()
+        finished = False
+        try:
+            yield from s.iter_execute(sql_block, self.call_timeout)
+            finished = True
+        finally:
+            self.release(s, broken=not finished)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {'size': self.size, 'open': self._open, 'idle': len(self._idle)}
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for s in idle:
+            s.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> SqlPlusPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SqlPlusPool()
+            atexit.register(_pool.close)
+        return _pool
+
+# ===== Core SQL*Plus Integration =====
+def _strip_exit(sql_block: str) -> str:
+    # Sessions are reused, so a trailing EXIT must not reach sqlplus.
+    return "\n".join(l for l in sql_block.splitlines()
+                     if l.strip().upper().rstrip(';') not in ('EXIT', 'QUIT'))
+
+
+def _filter_output(lines):
     # Filter out prompts and blank lines
-    lines = []
-    for line in out.splitlines():
+    for line in lines:
         text = line.strip()
         if not text or text.startswith('Connected to') or text.startswith('SQL>'):
             continue
-        lines.append(line)
-    return "\n".join(lines).strip()
+        yield line
+
+
+def run_sqlplus(sql_block: str) -> str:
+    """
+    Execute the provided SQL/PLSQL block on a pooled SQL*Plus session and return its output.
+    """
+    out = get_pool().run(_strip_exit(sql_block))
+    with metrics.timer('reg_stage_seconds', stage='output_filter'):
+        return "\n".join(_filter_output(out)).strip()
+
+
+def iter_sqlplus(sql_block: str):
+    """
+    Like run_sqlplus(), but yields output lines as they are read instead of waiting for the end.
+    """
+    yield from _filter_output(get_pool().iter_run(_strip_exit(sql_block)))
+
+
+def sql_literal(value) -> str:
+    """
+    Render a Python value as a SQL literal for text sent through SQL*Plus.
+    """
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+CONTROL_CHARS = re.compile(r'[\x00-\x1f\x7f]')
+
+
+def check_plain_text(value: str, what: str) -> str:
+    """
+    Refuse control characters in a value that is written into SQL*Plus script text: a line
+    break ends the statement, and a line holding just / or HOST would run as a command.
+    """
+    if CONTROL_CHARS.search(value):
+        raise ValueError(f"{what} cannot contain line breaks or other control characters")
+    return value
+
+
+def bind_variables(params: dict) -> str:
+    """
+    SQL*Plus VARIABLE commands giving each :name bind its value on the client side
+    (VARIABLE ... = value needs SQL*Plus 12.2+). The statement text that follows stays the
+    same whatever the values, so the server parses it once and shares the cursor.
+    """
+    lines = []
+    for name, value in params.items():
+        if value is None:
+            # A constant block, so it is shared as well
+            lines.append(f"VARIABLE {name} VARCHAR2(4000)\nEXEC :{name} := NULL")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"VARIABLE {name} NUMBER = {value!r}")
+        else:
+            text = str(value)
+            if '\n' in text or '\r' in text:
+                raise ValueError(f"bind :{name} cannot contain a line break")
+            lines.append(f"VARIABLE {name} VARCHAR2(4000) = {sql_literal(text)}")
+    return "".join(line + "\n" for line in lines)
+
+
+# ===== Database Backends =====
+class Backend:
+    """
+    Interface shared by every database backend.
+
+    call()  runs a reg_pkg procedure and returns its DBMS_OUTPUT text ('ORA-' marks errors).
+    call_many() runs several procedures in one session and returns each one's text.
+    query() runs a SELECT with :name binds and returns rows as dicts keyed by lower-case column.
+    iter_call() / iter_query() are the streaming forms, yielding lines / rows as they arrive.
+    """
+    name = 'base'
+    limit_clause = 'FETCH FIRST :page_rows ROWS ONLY'
+
+    def call(self, proc_name: str, *args) -> str:
+        raise NotImplementedError
+
+    def query(self, sql: str, params: dict = None) -> list:
+        return list(self.iter_query(sql, params))
+
+    def call_many(self, calls: list) -> list:
+        """
+        Run (proc_name, args) pairs in order and return their outputs, one string per call.
+        Backends that talk to a server override this to make it a single round trip.
+        """
+        return [self.call(proc_name, *args) for proc_name, args in calls]
+
+    def iter_call(self, proc_name: str, *args):
+        yield from self.call(proc_name, *args).splitlines()
+
+    def iter_query(self, sql: str, params: dict = None):
+        raise NotImplementedError
+
+    def call_batch(self, requests: list, commit_every: int = 0) -> str:
+        """
+        Run reg_pkg.process_enrollment_batch for (op, B#, classid) tuples in one session.
+        """
+        raise NotImplementedError
+
+    def student_exists(self, bnum: str) -> bool:
+        rows = self.query('SELECT COUNT(*) AS n FROM students WHERE "B#" = :b', {'b': bnum})
+        return bool(rows) and int(rows[0]['n']) > 0
+
+    def close(self):
+        pass
+
+
+class SqlPlusBackend(Backend):
+    """
+    Screen-scrapes pooled SQL*Plus sessions. Rows come back as strings.
+    """
+    name = 'sqlplus'
+
+    def __init__(self):
+        self._statements = {}   # (proc_name, argc) -> PL/SQL call text with :p1..:pN binds
+
+    def _statement(self, proc_name: str, argc: int) -> str:
+        key = (proc_name, argc)
+        stmt = self._statements.get(key)
+        if stmt is None:
+            binds = ", ".join(f":p{i}" for i in range(1, argc + 1))
+            stmt = self._statements.setdefault(key, f"BEGIN\n  reg_pkg.{proc_name}({binds});\nEND;\n/\n")
+        return stmt
+
+    def _call_block(self, proc_name: str, args) -> str:
+        return (
+            "SET SERVEROUTPUT ON\n"
+            "SET FEEDBACK OFF\n"
+            "SET VERIFY OFF\n"
+            + bind_variables({f"p{i}": str(arg) for i, arg in enumerate(args, 1)})
+            + self._statement(proc_name, len(args))
+        )
+
+    def call(self, proc_name: str, *args) -> str:
+        return run_sqlplus(self._call_block(proc_name, args))
+
+    def iter_call(self, proc_name: str, *args):
+        yield from iter_sqlplus(self._call_block(proc_name, args))
+
+    def call_many(self, calls: list) -> list:
+        """
+        All calls as one script on one pooled session, each in its own block (so each fails
+        or commits alone, as separate calls would) and followed by a PROMPT marker that
+        splits the output back up.
+        """
+        marker = f"__REG_CALL_{uuid.uuid4().hex}__"
+        script = "".join(self._call_block(proc_name, args) + f"PROMPT {marker}\n" for proc_name, args in calls)
+        outputs, current = [], []
+        for line in _filter_output(get_pool().run(script)):
+            if line.strip() == marker:
+                outputs.append("\n".join(current).strip())
+                current = []
+            else:
+                current.append(line)
+        if len(outputs) != len(calls):
+            raise SessionError(f"expected {len(calls)} call outputs, got {len(outputs)}", sent=True)
+        return outputs
+
+    def call_batch(self, requests: list, commit_every: int = 0) -> str:
+        for req in requests:
+            for value in req:
+                check_plain_text(str(value), 'a batch value')   # the values become script text
+        rows = ",\n".join(f"    enrollment_req_t({', '.join(sql_literal(v) for v in req)})" for req in requests)
+        sql = (
+            "SET SERVEROUTPUT ON SIZE UNLIMITED\n"
+            "SET FEEDBACK OFF\n"
+            "SET VERIFY OFF\n"
+            "BEGIN\n"
+            f"  reg_pkg.process_enrollment_batch(enrollment_req_tab(\n{rows}\n  ), {int(commit_every)});\n"
+            "END;\n"
+            "/\n"
+        )
+        return run_sqlplus(sql)
+
+    def iter_query(self, sql: str, params: dict = None):
+        block = (
+            "SET MARKUP CSV ON QUOTE ON\n"
+            "SET PAGESIZE 50000\n"
+            + bind_variables(params or {})
+            + f"{sql.rstrip().rstrip(';')};\n"
+            "SET MARKUP CSV OFF\n"
+        )
+
+        def checked(lines):
+            for line in lines:
+                if line.startswith(('ORA-', 'SP2-')):
+                    raise RuntimeError(line)
+                yield line
+        columns = None
+        for row in csv.reader(checked(iter_sqlplus(block))):
+            if columns is None:
+                columns = [c.lower() for c in row]
+            else:
+                yield dict(zip(columns, row))
+
+    def close(self):
+        if _pool is not None:
+            _pool.close()
+
+
+class OracleBackend(Backend):
+    """
+    In-process python-oracledb driver: no process spawn, no text parsing, typed rows.
+    """
+    name = 'oracledb'
+
+    def __init__(self):
+        if oracledb is None:
+            raise RuntimeError("REG_DB_BACKEND=oracledb needs the python-oracledb package")
+        self.pool = oracledb.create_pool(user=DB_USER, password=DB_PASS, dsn=DB_DSN,
+                                         min=1, max=POOL_SIZE, increment=1,
+                                         stmtcachesize=STMT_CACHE_SIZE)
+        self._statements = {}   # (proc_name, argc) -> anonymous block with :1..:N binds
+
+    def _statement(self, proc_name: str, argc: int) -> str:
+        key = (proc_name, argc)
+        stmt = self._statements.get(key)
+        if stmt is None:
+            binds = ", ".join(f":{i}" for i in range(1, argc + 1))
+            stmt = self._statements.setdefault(key, f"begin reg_pkg.{proc_name}({binds}); end;")
+        return stmt
+
+    @staticmethod
+    def _dbms_output(cur):
+        chunk = 100
+        lines_var = cur.arrayvar(str, chunk)
+        num_var = cur.var(int)
+        while True:
+            num_var.setvalue(0, chunk)
+            cur.callproc('dbms_output.get_lines', (lines_var, num_var))
+            n = num_var.getvalue()
+            yield from (line or '' for line in lines_var.getvalue()[:n])
+            if n < chunk:
+                return
+
+    def call(self, proc_name: str, *args) -> str:
+        return "\n".join(self.iter_call(proc_name, *args)).strip()
+
+    def iter_call(self, proc_name: str, *args):
+        with self.pool.acquire() as conn:
+            cur = conn.cursor()
+            cur.callproc('dbms_output.enable', [None])
+            try:
+                # Same text for every call of a procedure, so the connection's statement
+                # cache hands back the already-parsed cursor.
+                cur.execute(self._statement(proc_name, len(args)), [str(arg) for arg in args])
+                conn.commit()
+            except oracledb.DatabaseError as e:
+                conn.rollback()
+                yield str(e)
+                return
+            yield from self._dbms_output(cur)
+
+    def call_many(self, calls: list) -> list:
+        """
+        One anonymous block calling every procedure, with a marker line after each call's
+        output: one execute and one DBMS_OUTPUT fetch. If any call raises, the block is rolled
+        back and the calls are made one at a time on the same connection instead, so each
+        error is reported against its own call as with call().
+        """
+        key = tuple((proc_name, len(args)) for proc_name, args in calls)
+        block = self._statements.get(key)
+        if block is None:
+            body, n = [], 0
+            for proc_name, argc in key:
+                binds = ", ".join(f":a{i}" for i in range(n + 1, n + argc + 1))
+                body.append(f"reg_pkg.{proc_name}({binds}); dbms_output.put_line(:sep);")
+                n += argc
+            block = self._statements.setdefault(key, f"begin {' '.join(body)} end;")
+        marker = f"__REG_CALL_{uuid.uuid4().hex}__"
+        values = {f"a{i}": str(arg) for i, arg in enumerate((a for _, args in calls for a in args), 1)}
+        with self.pool.acquire() as conn:
+            cur = conn.cursor()
+            cur.callproc('dbms_output.enable', [None])
+            try:
+                cur.execute(block, dict(values, sep=marker))
+                conn.commit()
+            except oracledb.DatabaseError:
+                conn.rollback()
+                for _ in self._dbms_output(cur):   # discard what the failed block printed
+                    pass
+                return [self._call_on(conn, proc_name, args) for proc_name, args in calls]
+            outputs, current = [], []
+            for line in self._dbms_output(cur):
+                if line == marker:
+                    outputs.append("\n".join(current).strip())
+                    current = []
+                else:
+                    current.append(line)
+            return outputs
+
+    def _call_on(self, conn, proc_name: str, args) -> str:
+        cur = conn.cursor()
+        cur.callproc('dbms_output.enable', [None])
+        try:
+            cur.execute(self._statement(proc_name, len(args)), [str(arg) for arg in args])
+            conn.commit()
+        except oracledb.DatabaseError as e:
+            conn.rollback()
+            return str(e)
+        return "\n".join(self._dbms_output(cur)).strip()
+
+    def call_batch(self, requests: list, commit_every: int = 0) -> str:
+        with self.pool.acquire() as conn:
+            req_type = conn.gettype('ENROLLMENT_REQ_T')
+            tab_type = conn.gettype('ENROLLMENT_REQ_TAB')
+            items = []
+            for op, bnum, classid in requests:
+                item = req_type.newobject()
+                item.OP = op
+                setattr(item, 'B#', bnum)
+                item.CLASSID = classid
+                items.append(item)
+            cur = conn.cursor()
+            cur.callproc('dbms_output.enable', [None])
+            try:
+                cur.callproc('reg_pkg.process_enrollment_batch', [tab_type.newobject(items), int(commit_every)])
+                conn.commit()
+            except oracledb.DatabaseError as e:
+                conn.rollback()
+                return str(e)
+            return "\n".join(self._dbms_output(cur)).strip()
+
+    def iter_query(self, sql: str, params: dict = None):
+        with self.pool.acquire() as conn:
+            cur = conn.cursor()
+            cur.arraysize = 500
+            cur.execute(sql, params or {})
+            columns = [d[0].lower() for d in cur.description]
+            for row in cur:
+                yield dict(zip(columns, row))
+
+    def close(self):
+        self.pool.close()
+
+
+class SqliteBackend(Backend):
+    """
+    reg_pkg reimplemented on SQLite (see reg_pkg_sqlite.py) for local benchmarks and load tests.
+    """
+    name = 'sqlite'
+    limit_clause = 'LIMIT :page_rows'
+
+    def __init__(self, path: str = None):
+        self.path = path or SQLITE_PATH
+        self._local = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        self._drain_stop = threading.Event()
+        if ASYNC_LOG:
+            threading.Thread(target=self._drain_logs, name='log-drain', daemon=True).start()
+
+    def pkg(self) -> reg_pkg_sqlite.RegPkg:
+        pkg = getattr(self._local, 'pkg', None)
+        if pkg is None:
+            conn = reg_pkg_sqlite.connect(self.path, DB_USER.upper(), async_log=ASYNC_LOG)
+            with self._conns_lock:
+                self._conns.append(conn)
+            pkg = self._local.pkg = reg_pkg_sqlite.RegPkg(conn)
+        return pkg
+
+    def call(self, proc_name: str, *args) -> str:
+        return "\n".join(self.pkg().call(proc_name, *args)).strip()
+
+    def call_batch(self, requests: list, commit_every: int = 0) -> str:
+        return self.call('process_enrollment_batch', requests, commit_every)
+
+    def iter_query(self, sql: str, params: dict = None):
+        cur = self.pkg().conn.execute(sql, params or {})
+        columns = [d[0].lower() for d in cur.description]
+        for row in cur:
+            yield dict(zip(columns, row))
+
+    def _drain_logs(self):
+        """
+        Stand-in for the Oracle LOG_QUEUE_DRAIN job: move queued audit rows into logs.
+        """
+        while not self._drain_stop.wait(LOG_FLUSH_SECONDS):
+            try:
+                self.flush_logs(LOG_FLUSH_ROWS)
+            except Exception as e:
+                print(f"log drain failed: {e}", file=sys.stderr)
+
+    def flush_logs(self, max_rows: int = None):
+        if not self.call('flush_log_queue', max_rows).startswith('Flushed 0 '):
+            listing_cache.invalidate({'logs'})
+
+    def close(self):
+        if ASYNC_LOG:
+            self._drain_stop.set()
+            self.flush_logs()
+        with self._conns_lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns = []
+
+
+BACKENDS = {'sqlplus': SqlPlusBackend, 'oracledb': OracleBackend, 'sqlite': SqliteBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> Backend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if DB_BACKEND not in BACKENDS:
+                raise RuntimeError(f"Unknown REG_DB_BACKEND {DB_BACKEND!r}; choose from {', '.join(BACKENDS)}")
+            _backend = BACKENDS[DB_BACKEND]()
+        return _backend
+
+
+# ===== Listing Cache =====
+# Tables each cached read depends on, and the tables each write changes when it succeeds.
+CACHE_READS = {
+    'show_students': {'students'},
+    'show_students_page': {'students'},
+    'show_g_enrollments_page': {'g_enrollments'},
+    'show_logs_page': {'logs'},
+    'show_summary': {'students', 'courses', 'classes', 'g_enrollments', 'reg_config'},
+    'show_courses': {'courses'},
+    'show_classes': {'classes'},
+    'list_prerequisites': {'courses', 'prerequisites'},
+}
+CACHE_WRITES = {
+    'enroll_grad_student': ({'g_enrollments', 'classes', 'logs'}, 'Enrollment successful.'),
+    'drop_grad_student': ({'g_enrollments', 'classes', 'logs'}, 'Drop successful.'),
+    'delete_student': ({'students', 'g_enrollments', 'classes', 'logs'}, 'Student deleted successfully.'),
+    'archive_logs': ({'logs'}, 'Archived '),
+    'set_current_term': ({'reg_config'}, 'Current term set to '),
+}
+
+
+class ResultCache:
+    """
+    TTL + LRU cache of procedure output keyed by (proc_name, args).
+    Writes made through call_procedure invalidate dependent entries; writes made
+    elsewhere (other processes, SQL*Plus by hand) show up once the TTL expires.
+    Each table has a generation that invalidate() bumps: a value loaded while one of its
+    tables was invalidated may predate the write, so store() drops it.
+    """
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()   # key -> (expires_at, tables, value)
+        self._generations = {}       # table -> invalidations so far
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get_or_load(self, key: tuple, tables: set, loader):
+        value = self.lookup(key)
+        if value is None:
+            generation = self.generation(tables)
+            value = loader()
+            self.store(key, tables, value, generation)
+        return value
+
+    def lookup(self, key: tuple):
+        """
+        The cached value for key, or None (counted as a miss) if it is absent or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        return None
+
+    def generation(self, tables: set) -> int:
+        """
+        Snapshot to take before loading a value for tables and pass to store().
+        """
+        with self._lock:
+            return sum(self._generations.get(t, 0) for t in tables)
+
+    def store(self, key: tuple, tables: set, value, generation: int = None):
+        if (isinstance(value, str) and 'ORA-' in value) or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and sum(self._generations.get(t, 0) for t in tables) != generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, tables, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables: set):
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+            stale = [k for k, (_, deps, _) in self._data.items() if deps & tables]
+            for k in stale:
+                del self._data[k]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._data), 'max_entries': self.max_entries, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'invalidations': self.invalidations}
+
+
+listing_cache = ResultCache()
+
+
+def _runtime_metrics():
+    # Scrape-time values for /metrics from the cache and whichever pool is in use.
+    cache = listing_cache.stats()
+    yield 'reg_cache_entries', {}, cache['entries']
+    for stat in ('hits', 'misses', 'evictions', 'invalidations'):
+        yield f'reg_cache_{stat}_total', {}, cache[stat]
+    if _pool is not None:
+        pool = _pool.stats()
+        yield 'reg_pool_size', {'backend': 'sqlplus'}, pool['size']
+        yield 'reg_pool_sessions', {'backend': 'sqlplus', 'state': 'idle'}, pool['idle']
+        yield 'reg_pool_sessions', {'backend': 'sqlplus', 'state': 'busy'}, pool['open'] - pool['idle']
+    if _search_index is not None:
+        yield 'reg_search_index_rows', {'kind': 'students'}, len(_search_index.students)
+        yield 'reg_search_index_rows', {'kind': 'classes'}, len(_search_index.classes)
+    if isinstance(_backend, OracleBackend):
+        yield 'reg_pool_size', {'backend': 'oracledb'}, _backend.pool.max
+        yield 'reg_pool_sessions', {'backend': 'oracledb', 'state': 'idle'}, _backend.pool.opened - _backend.pool.busy
+        yield 'reg_pool_sessions', {'backend': 'oracledb', 'state': 'busy'}, _backend.pool.busy
+
+
+metrics.add_collector(_runtime_metrics)
 
 
 def call_procedure(proc_name: str, *args) -> str:
     """
-    Build and run a PL/SQL block to invoke a reg_pkg procedure with given arguments.
-    """
-    quoted = ", ".join(f"'{arg}'" for arg in args)
-    sql = (
-        "SET SERVEROUTPUT ON\n"
-        "SET FEEDBACK OFF\n"
-        "SET VERIFY OFF\n"
-        "BEGIN\n"
-        f"  reg_pkg.{proc_name}({quoted});\n"
-        "END;\n"
-        "/\n"
-        "EXIT;\n"
-    )
-    return run_sqlplus(sql)
+    Invoke a reg_pkg procedure with given arguments on the configured backend.
+    Listings are served through listing_cache; successful writes invalidate it.
+    """
+    if proc_name not in reg_pkg_sqlite.PROCEDURES:
+        raise ValueError(f"reg_pkg has no procedure {proc_name}")
+    if proc_name in CACHE_READS:
+        return listing_cache.get_or_load((proc_name,) + args, CACHE_READS[proc_name],
+                                         lambda: _timed_call(proc_name, *args))
+    out = _timed_call(proc_name, *args)
+    _invalidate_after(proc_name, out)
+    return out
+
+def call_procedures(*calls) -> list:
+    """
+    call_procedure() for several (proc_name, args) pairs at once, for pages that show more
+    than one listing: cached outputs come from listing_cache and the rest go to the backend
+    together, in one session and round trip. Returns the outputs in call order.
+    """
+    for proc_name, _ in calls:
+        if proc_name not in reg_pkg_sqlite.PROCEDURES:
+            raise ValueError(f"reg_pkg has no procedure {proc_name}")
+    outputs = [listing_cache.lookup((proc_name,) + tuple(args)) if proc_name in CACHE_READS else None
+               for proc_name, args in calls]
+    pending = [i for i, out in enumerate(outputs) if out is None]
+    if not pending:
+        return outputs
+    generations = {i: listing_cache.generation(CACHE_READS[calls[i][0]])
+                   for i in pending if calls[i][0] in CACHE_READS}
+    label = '+'.join(calls[i][0] for i in pending)
+    with db_call('call_many', f"({label})"):
+        results = get_backend().call_many([calls[i] for i in pending])
+    for i, out in zip(pending, results):
+        proc_name, args = calls[i]
+        count_db_error(proc_name, out)
+        if proc_name in CACHE_READS:
+            listing_cache.store((proc_name,) + tuple(args), CACHE_READS[proc_name], out, generations[i])
+        _invalidate_after(proc_name, out)
+        outputs[i] = out
+    return outputs
+
+def _invalidate_after(proc_name: str, out: str):
+    if proc_name in CACHE_WRITES:
+        tables, success = CACHE_WRITES[proc_name]
+        if success in out:
+            listing_cache.invalidate(tables)
+
+def _timed_call(proc_name: str, *args) -> str:
+    with db_call(proc_name, '(' + ', '.join(map(repr, args)) + ')'):
+        out = get_backend().call(proc_name, *args)
+    count_db_error(proc_name, out)
+    return out
+
+def stream_procedure(proc_name: str, *args):
+    """
+    Yield a reg_pkg procedure's output lines as the backend produces them (never cached).
+    """
+    if proc_name not in reg_pkg_sqlite.PROCEDURES:
+        raise ValueError(f"reg_pkg has no procedure {proc_name}")
+    with db_call(proc_name, '(' + ', '.join(map(repr, args)) + ')'):
+        yield from get_backend().iter_call(proc_name, *args)
 
 def check_student_exists(bnum: str) -> bool:
     """
-    Check if a student with the given B# exists in the database.
-    """
-    sql = (
-        "SET SERVEROUTPUT ON\n"
-        "SET FEEDBACK OFF\n"
-        "SET VERIFY OFF\n"
-        "DECLARE\n"
-        "  v_count NUMBER;\n"
-        "BEGIN\n"
-        f"  SELECT COUNT(*) INTO v_count FROM students WHERE b# = '{bnum}';\n"
-        "  IF v_count = 0 THEN\n"
-        "    RAISE_APPLICATION_ERROR(-20001, 'Student not found');\n"
-        "  END IF;\n"
-        "END;\n"
-        "/\n"
-        "EXIT;\n"
-    )
-    try:
-        run_sqlplus(sql)
+    Check if a student with the given B# exists. A hit in the search index answers without a
+    query; a miss may be a student added since the last reload, so the database decides.
+    """
+    index = get_search_index()
+    if index is not None and index.has_student(bnum):
         return True
-    except:
+    try:
+        return get_backend().student_exists(bnum)
+    except Exception:
         return False
 
+# ===== JSON API =====
+# name -> (SELECT with :name binds, tables it reads). Columns are aliased to JSON-friendly names.
+API_QUERIES = {
+    'students': (
+        'SELECT "B#" AS bnum, first_name, last_name, st_level, gpa, email FROM students{where} '
+        'ORDER BY "B#" {limit}',
+        {'students'}),
+    'courses': (
+        'SELECT dept_code, "COURSE#" AS course_no, title FROM courses ORDER BY dept_code, "COURSE#"',
+        {'courses'}),
+    'classes': (
+        'SELECT classid, dept_code, "COURSE#" AS course_no, "SECT#" AS sect_no, year, semester, '
+        '"LIMIT" AS class_limit, class_size, room FROM classes ORDER BY classid',
+        {'classes'}),
+    'roster': (
+        'SELECT s."B#" AS bnum, s.first_name, s.last_name FROM students s '
+        'JOIN g_enrollments g ON s."B#" = g."G_B#" WHERE g.classid = :classid ORDER BY s."B#"',
+        {'students', 'g_enrollments'}),
+    'prerequisites': (
+        'SELECT dept_code, "COURSE#" AS course_no, pre_dept_code, "PRE_COURSE#" AS pre_course_no '
+        'FROM prerequisites ORDER BY dept_code, "COURSE#", pre_dept_code, "PRE_COURSE#"',
+        {'prerequisites'}),
+    'course_prerequisites': (
+        'SELECT pre_dept_code, "PRE_COURSE#" AS pre_course_no, depth FROM prereq_closure '
+        'WHERE dept_code = :dept AND "COURSE#" = :course ORDER BY depth, pre_dept_code, "PRE_COURSE#"',
+        {'prerequisites'}),
+    'enrollments': (
+        'SELECT "G_B#" AS bnum, classid, score FROM g_enrollments{where} '
+        'ORDER BY "G_B#", classid {limit}',
+        {'g_enrollments'}),
+    'logs': (
+        'SELECT "LOG#" AS log_no, user_name, op_time, table_name, operation, tuple_keyvalue FROM logs{where} '
+        'ORDER BY "LOG#" DESC {limit}',
+        {'logs'}),
+}
+
+# Optional predicates of the listings above as (bind, condition) pairs. A condition is left out
+# when its bind is None instead of being written ':x IS NULL OR ...', an OR the optimizer cannot
+# turn into an index range scan; the enrollments seek repeats its leading column so it has one.
+API_FILTERS = {
+    'students': [('after', '"B#" > :after')],
+    'enrollments': [('after_b', '"G_B#" >= :after_b AND ("G_B#" > :after_b OR classid > :after_classid)')],
+    'logs': [('before', '"LOG#" < :before'),
+             ('from_time', "op_time >= TO_DATE(:from_time, 'YYYY-MM-DD HH24:MI:SS')"),
+             ('to_time', "op_time < TO_DATE(:to_time, 'YYYY-MM-DD HH24:MI:SS')")],
+}
+
+# Keyset-paginated API listings: how to build the next cursor from the last row of a page.
+API_CURSORS = {
+    'students': lambda row: str(row['bnum']),
+    'enrollments': lambda row: f"{row['bnum']},{row['classid']}",
+    'logs': lambda row: str(row['log_no']),
+}
+
+
+def api_sql(name: str, params: dict, limit: str = '') -> tuple:
+    """
+    The SELECT of API_QUERIES[name] with the API_FILTERS conditions whose binds are set, and
+    the binds it uses.
+    """
+    sql = API_QUERIES[name][0]
+    conditions = [cond for bind, cond in API_FILTERS.get(name, ()) if params.get(bind) is not None]
+    sql = sql.format(where=' WHERE ' + ' AND '.join(conditions) if conditions else '', limit=limit)
+    return sql, {k: v for k, v in params.items() if re.search(rf':{k}\b', sql)}
+
+
+def api_listing(name: str, limit: int = PAGE_SIZE, **params) -> str:
+    """
+    Run one of API_QUERIES and return it as compact JSON text, cached like the HTML listings.
+    Paginated listings fetch limit + 1 rows and report the cursor of the next page as "next".
+    """
+    sql, tables = API_QUERIES[name]
+
+    def load():
+        backend = get_backend()
+        if name not in API_CURSORS:
+            with db_call(f'api:{name}'):
+                rows = backend.query(sql, params)
+            return json.dumps({'rows': rows, 'count': len(rows)}, separators=(',', ':'), default=str)
+        with db_call(f'api:{name}'):
+            page_sql, binds = api_sql(name, dict(params, page_rows=limit + 1), backend.limit_clause)
+            rows = backend.query(page_sql, binds)
+        next_cursor = API_CURSORS[name](rows[limit - 1]) if len(rows) > limit else None
+        rows = rows[:limit]
+        return json.dumps({'rows': rows, 'count': len(rows), 'next': next_cursor},
+                          separators=(',', ':'), default=str)
+    key = ('api', name, limit if name in API_CURSORS else None) + tuple(sorted(params.items()))
+    return listing_cache.get_or_load(key, tables, load)
+
+
+def class_exists(classid: str) -> bool:
+    index = get_search_index()
+    if index is not None and index.has_class(classid):
+        return True   # a miss may be a class added since the last reload
+    rows = get_backend().query('SELECT COUNT(*) AS n FROM classes WHERE classid = :c', {'c': classid})
+    return bool(rows) and int(rows[0]['n']) > 0
+
+
+def course_exists(dept: str, course: int) -> bool:
+    rows = get_backend().query('SELECT COUNT(*) AS n FROM courses WHERE dept_code = :d AND "COURSE#" = :c',
+                               {'d': dept, 'c': course})
+    return bool(rows) and int(rows[0]['n']) > 0
+
+# ===== Search Index =====
+class SearchIndex:
+    """
+    In-memory students and classes with sorted lower-case keys for prefix (typeahead) search:
+    B#, first name and last name; classid and dept_code + course# ('CS432' and 'CS 432').
+
+    Students deleted through this process are dropped at once, deletes made elsewhere are
+    read from logs every INDEX_REFRESH_SECONDS, and a full reload every INDEX_RELOAD_SECONDS
+    picks up rows added outside the app (inserts into students and classes are not logged).
+    Keys of removed rows stay in the sorted lists until the next reload and are skipped.
+    Since a row can exist before the index sees it, existence checks trust only a hit.
+    """
+    STUDENTS_SQL = 'SELECT "B#" AS bnum, first_name, last_name FROM students'
+    CLASSES_SQL = 'SELECT classid, dept_code, "COURSE#" AS course_no, year, semester FROM classes'
+    LAST_LOG_SQL = 'SELECT MAX("LOG#") AS n FROM logs'
+    DELETES_SQL = ('SELECT "LOG#" AS log_no, tuple_keyvalue FROM logs '
+                   "WHERE table_name = 'STUDENTS' AND operation = 'delete' AND \"LOG#\" > :after ORDER BY \"LOG#\"")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.students = {}       # B# -> (first_name, last_name)
+        self.classes = {}        # classid -> (dept_code, course#, year, semester)
+        self._student_keys = []  # sorted (key, B#)
+        self._class_keys = []    # sorted (key, classid)
+        self.last_log = 0        # highest LOG# already applied
+        self.loaded_at = 0.0
+
+    def load(self, backend: Backend):
+        # LOG# first: a student deleted while the rows are read is removed again by refresh()
+        rows = backend.query(self.LAST_LOG_SQL)
+        last_log = int(rows[0]['n'] or 0) if rows else 0
+        students, student_keys = {}, []
+        for row in backend.iter_query(self.STUDENTS_SQL):
+            bnum, first, last = str(row['bnum']), row['first_name'] or '', row['last_name'] or ''
+            students[bnum] = (first, last)
+            student_keys += [(key.lower(), bnum) for key in {bnum, first, last} if key]
+        classes, class_keys = {}, []
+        for row in backend.iter_query(self.CLASSES_SQL):
+            classid, dept, course = str(row['classid']), row['dept_code'] or '', str(row['course_no'])
+            classes[classid] = (dept, course, str(row['year']), row['semester'] or '')
+            class_keys += [(key.lower(), classid) for key in (classid, f"{dept}{course}", f"{dept} {course}")]
+        student_keys.sort()
+        class_keys.sort()
+        with self._lock:
+            self.students, self.classes = students, classes
+            self._student_keys, self._class_keys = student_keys, class_keys
+            self.last_log = max(self.last_log, last_log)
+            self.loaded_at = time.monotonic()
+
+    def refresh(self, backend: Backend):
+        for row in backend.query(self.DELETES_SQL, {'after': self.last_log}):
+            self.remove_student(str(row['tuple_keyvalue']))
+            self.last_log = max(self.last_log, int(row['log_no']))
+
+    def start_refresh(self):
+        threading.Thread(target=self._refresh_loop, name='search-index', daemon=True).start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(INDEX_REFRESH_SECONDS):
+            try:
+                if time.monotonic() - self.loaded_at >= INDEX_RELOAD_SECONDS:
+                    with db_call('index_load'):
+                        self.load(get_backend())
+                else:
+                    with db_call('index_refresh'):
+                        self.refresh(get_backend())
+            except Exception as e:
+                print(f"search index refresh failed: {e}", file=sys.stderr)
+
+    def close(self):
+        self._stop.set()
+
+    def remove_student(self, bnum: str):
+        with self._lock:
+            self.students.pop(bnum, None)
+
+    def has_student(self, bnum: str) -> bool:
+        return bnum in self.students
+
+    def has_class(self, classid: str) -> bool:
+        return classid in self.classes
+
+    @staticmethod
+    def _prefix_ids(keys: list, prefix: str, live: dict, limit: int) -> list:
+        ids = []
+        i = bisect.bisect_left(keys, (prefix,))
+        while i < len(keys) and len(ids) < limit and keys[i][0].startswith(prefix):
+            ident = keys[i][1]
+            if ident in live and ident not in ids:
+                ids.append(ident)
+            i += 1
+        return ids
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> list:
+        """
+        Students, then classes, with a key starting with query (case-insensitive), at most limit in all.
+        """
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+        with self._lock:
+            results = [{'type': 'student', 'bnum': b, 'first_name': self.students[b][0],
+                        'last_name': self.students[b][1]}
+                       for b in self._prefix_ids(self._student_keys, prefix, self.students, limit)]
+            for c in self._prefix_ids(self._class_keys, prefix, self.classes, limit - len(results)):
+                dept, course, year, semester = self.classes[c]
+                results.append({'type': 'class', 'classid': c, 'dept_code': dept, 'course_no': course,
+                                'year': year, 'semester': semester})
+        return results
+
+
+def search_line(result: dict) -> str:
+    if result['type'] == 'student':
+        return f"{result['bnum']} {result['first_name']} {result['last_name']}"
+    return f"{result['classid']} {result['dept_code']}{result['course_no']} {result['semester']} {result['year']}"
+
+
+def search_form(query: str) -> str:
+    return f'''
+        <form method="GET" action="/search" class="row g-2 mb-3">
+            <div class="col"><input type="search" class="form-control" name="q" placeholder="B#, name, classid or course (e.g. CS432)" value="{escape(query)}" autofocus></div>
+            <div class="col-auto"><button type="submit" class="btn btn-outline-primary">Search</button></div>
+        </form>'''
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def get_search_index():
+    """
+    The SearchIndex, loaded (and its refresh thread started) on first use; None when
+    REG_SEARCH_INDEX=0 or it could not be loaded, in which case callers ask the database.
+    """
+    global _search_index
+    if not SEARCH_INDEX:
+        return None
+    with _search_index_lock:
+        if _search_index is None:
+            index = SearchIndex()
+            try:
+                with db_call('index_load'):
+                    index.load(get_backend())
+            except Exception as e:
+                print(f"search index not loaded: {e}", file=sys.stderr)
+                return None
+            index.start_refresh()
+            _search_index = index
+        return _search_index
+
+# ===== Batch Enrollment =====
+BATCH_OPS = ('enroll', 'drop')
+BATCH_SUCCESS = {'Enrollment successful.', 'Drop successful.'}
+BATCH_MAX_ROWS = int(os.environ.get('REG_BATCH_MAX_ROWS', '500'))   # requests sent per DB call
+
+
+def _batch_request(op, bnum, classid, where: str) -> tuple:
+    for name, value in (('op', op), ('B#', bnum), ('classid', classid)):
+        check_plain_text(str(value), f"{where}: {name}")
+    op = str(op).strip().lower()
+    if op not in BATCH_OPS:
+        raise ValueError(f"{where}: op must be enroll or drop, not {op!r}")
+    if not str(bnum).strip() or not str(classid).strip():
+        raise ValueError(f"{where}: B# and classid are required")
+    return op, str(bnum).strip(), str(classid).strip()
+
+
+def parse_batch_csv(text: str) -> list:
+    """
+    Parse op,B#,classid lines (an 'op,...' header line is skipped) into request tuples.
+    """
+    requests = []
+    for n, row in enumerate(csv.reader(text.splitlines()), 1):
+        if not row or not ''.join(row).strip():
+            continue
+        if n == 1 and row[0].strip().lower() == 'op':
+            continue
+        if len(row) != 3:
+            raise ValueError(f"line {n}: expected op,B#,classid")
+        requests.append(_batch_request(*row, where=f"line {n}"))
+    return requests
+
+
+def parse_batch_json(data) -> list:
+    """
+    Accept [{"op", "bnum", "classid"}, ...] (optionally wrapped in {"requests": [...]}).
+    """
+    if isinstance(data, dict):
+        data = data.get('requests')
+    if not isinstance(data, list):
+        raise ValueError("expected a list of requests")
+    requests = []
+    for n, item in enumerate(data, 1):
+        if not isinstance(item, dict):
+            raise ValueError(f"request {n}: expected an object")
+        requests.append(_batch_request(item.get('op', ''), item.get('bnum', item.get('b#', '')),
+                                       item.get('classid', ''), where=f"request {n}"))
+    return requests
+
+
+def run_batch(requests: list, commit_every: int = 0) -> list:
+    """
+    Run enroll/drop requests through reg_pkg.process_enrollment_batch, BATCH_MAX_ROWS per
+    DB call, and return one result dict per request in input order.
+    """
+    results = []
+    for start in range(0, len(requests), BATCH_MAX_ROWS):
+        chunk = requests[start:start + BATCH_MAX_ROWS]
+        with db_call('process_enrollment_batch', f' ({len(chunk)} requests)'):
+            out = get_backend().call_batch(chunk, commit_every)
+        count_db_error('process_enrollment_batch', out)
+        outcomes = {}
+        for line in out.splitlines():
+            parts = line.split('|', 4)
+            if len(parts) == 5 and parts[0].isdigit():
+                outcomes[int(parts[0])] = parts[4]
+        for i, (op, bnum, classid) in enumerate(chunk, 1):
+            # A call that failed as a whole reports its error against every row in it.
+            message = outcomes.get(i, out if 'ORA-' in out else 'No result returned.')
+            results.append({'row': start + i, 'op': op, 'bnum': bnum, 'classid': classid,
+                            'ok': message in BATCH_SUCCESS, 'message': message})
+    if any(r['ok'] for r in results):
+        listing_cache.invalidate({'g_enrollments', 'classes', 'logs'})
+    return results
+
+# ===== Prediction Service =====
+MODEL_PATH = os.environ.get('REG_MODEL_PATH', '')   # artifact from inference.export_model(); unset: /predict answers 503
+PREDICT_MAX_ROWS = int(os.environ.get('REG_PREDICT_MAX_ROWS', '256'))           # most rows in one forward pass
+PREDICT_MAX_WAIT_MS = float(os.environ.get('REG_PREDICT_MAX_WAIT_MS', '2'))     # how long a pass waits for more requests
+PREDICT_MAX_INSTANCES = int(os.environ.get('REG_PREDICT_MAX_INSTANCES', '1000'))  # per request
+PREDICT_THREADS = int(os.environ.get('REG_PREDICT_THREADS', '0'))               # torch threads; 0 = torch's default
+PREDICT_TIMEOUT = float(os.environ.get('REG_PREDICT_TIMEOUT', '30'))             # seconds before /predict answers 504
+
+
+class PredictUnavailable(Exception):
+    """Raised when /predict has no model to serve."""
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+def get_predictor():
+    """
+    The process-wide inference.MicroBatcher, loading REG_MODEL_PATH on first use.
+    inference (and with it torch, a few hundred MB) is imported only once a model is configured.
+    """
+    global _predictor
+    with _predictor_lock:
+        if _predictor is None:
+            if not MODEL_PATH:
+                raise PredictUnavailable("No model configured; set REG_MODEL_PATH.")
+            try:
+                import inference
+            except ImportError:
+                raise PredictUnavailable("Prediction needs torch and numpy installed.")
+            _predictor = inference.MicroBatcher(inference.Predictor(MODEL_PATH, PREDICT_THREADS or None),
+                                                PREDICT_MAX_ROWS, PREDICT_MAX_WAIT_MS / 1000, on_batch=_count_batch)
+        return _predictor
+
+
+def _count_batch(rows: int, seconds: float):
+    metrics.inc('reg_predict_batches_total')
+    metrics.inc('reg_predict_rows_total', rows)
+    metrics.observe('reg_predict_batch_seconds', seconds)
+
+
+def predict(instances) -> list:
+    """
+    Predictions for JSON instances: lists of values in column order or objects keyed by column.
+    Concurrent calls share forward passes through the micro-batcher.
+    """
+    batcher = get_predictor()
+    if isinstance(instances, list) and len(instances) > PREDICT_MAX_INSTANCES:
+        raise ValueError(f"at most {PREDICT_MAX_INSTANCES} instances per request")
+    return batcher.predict(batcher.predictor.rows(instances), timeout=PREDICT_TIMEOUT).tolist()
+
+# ===== Pagination =====
+NEXT_PREFIX = 'NEXT: '   # last DBMS_OUTPUT line of a *_page procedure when more rows follow
+
+
+def page_size(value) -> int:
+    """
+    Parse a requested page size, falling back to PAGE_SIZE and capping at MAX_PAGE_SIZE.
+    """
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+    return max(1, min(n, MAX_PAGE_SIZE))
+
+
+def list_page(proc_name: str, *cursor, limit: int = PAGE_SIZE, filters: tuple = ()):
+    """
+    Call a keyset-paginated reg_pkg procedure; returns (lines, next_cursor or None).
+    filters are the procedure's optional arguments after p_limit.
+    """
+    return split_page(call_procedure(proc_name, *cursor, limit, *filters))
+
+
+def split_page(output: str):
+    """
+    A *_page procedure's output as (lines, next_cursor or None).
+    """
+    lines = output.splitlines()
+    next_cursor = None
+    if lines and lines[-1].startswith(NEXT_PREFIX):
+        next_cursor = lines.pop()[len(NEXT_PREFIX):].strip()
+    return lines, next_cursor
+
+
+def iter_json_rows(rows):
+    """
+    Stream rows as the same {"rows": [...], "count": n} document the API returns.
+    """
+    yield '{"rows":['
+    n = 0
+    for row in rows:
+        yield (',' if n else '') + json.dumps(row, separators=(',', ':'), default=str)
+        n += 1
+    yield f'],"count":{n}}}'
+
+
+def pager_link(path: str, next_cursor: str, limit: int, param: str = 'after', extra: dict = None) -> str:
+    if not next_cursor:
+        return ''
+    query = dict(extra or {}, **{param: next_cursor, 'limit': limit})
+    return (f'<a href="{escape(path + "?" + urlencode(query))}" class="btn btn-outline-primary">Next page</a> '
+            f'<a href="{escape(path + "?" + urlencode(dict(extra or {}, all=1)))}" class="btn btn-outline-secondary">Show all</a>')
+
+
+LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'   # = 'YYYY-MM-DD HH24:MI:SS' in reg_pkg.show_logs_page
+
+
+def parse_log_time(value: str):
+    """
+    Normalize a from/to filter ('2021-03-01', '2021-03-01T09:30', ...) to LOG_TIME_FORMAT.
+    Blank means no bound; anything else unparseable raises ValueError.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).strftime(LOG_TIME_FORMAT)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a date or date-time (YYYY-MM-DD[ HH:MM[:SS]])") from None
+
+
+def recent_log_cutoff() -> str:
+    """
+    Start of the window show_logs reads when no range is given (c_recent_log_months in reg_pkg).
+    In UTC, the clock SQLite's datetime('now') stamps op_time with.
+    """
+    now = datetime.now(timezone.utc)
+    month = now.year * 12 + now.month - reg_pkg_sqlite.RECENT_LOG_MONTHS
+    return datetime(month // 12, month % 12 + 1, 1).strftime(LOG_TIME_FORMAT)
+
+
+def log_filter_form(from_time: str, to_time: str) -> str:
+    return f'''
+        <form method="GET" action="/logs" class="row g-2 mb-3">
+            <div class="col"><input type="text" class="form-control" name="from" placeholder="From (YYYY-MM-DD HH:MM)" value="{escape(from_time or '')}"></div>
+            <div class="col"><input type="text" class="form-control" name="to" placeholder="Before (YYYY-MM-DD HH:MM)" value="{escape(to_time or '')}"></div>
+            <div class="col-auto"><button type="submit" class="btn btn-outline-primary">Filter</button></div>
+        </form>'''
+
+# ===== Page Templates =====
+# Every page is LAYOUT_HEAD + <title> + the page kind's stylesheet + body + LAYOUT_TAIL.
+# The fixed parts are encoded to bytes once at import; per request only the title and
+# the rows are escaped and encoded.
+LAYOUT_HEAD = b'''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>'''
+
+BASE_CSS = '''
+        body {
+            background-color: #f8f9fa;
+            padding: 20px;
+        }
+        .container {
+            max-width: %dpx;
+            margin: 0 auto;
+            background: white;
+            padding: 30px;
+            border-radius: 10px;
+            box-shadow: 0 0 20px rgba(0,0,0,0.1);
+        }
+        h1, h2 {
+            color: #2c3e50;
+            text-align: center;
+            margin-bottom: 30px;
+        }
+        .back-link {
+            display: inline-block;
+            margin-top: 20px;
+            color: #3498db;
+            text-decoration: none;
+        }
+        .back-link:hover {
+            color: #2980b9;
+        }'''
+
+PAGE_CSS = {
+    'list': BASE_CSS % 800 + '''
+        .list-group {
+            margin-bottom: 20px;
+        }''',
+    'menu': BASE_CSS % 800 + '''
+        .menu-list {
+            list-style: none;
+            padding: 0;
+        }
+        .menu-list li {
+            margin: 10px 0;
+        }
+        .menu-list a {
+            display: block;
+            padding: 15px;
+            background: #3498db;
+            color: white;
+            text-decoration: none;
+            border-radius: 5px;
+            transition: all 0.3s ease;
+        }
+        .menu-list a:hover {
+            background: #2980b9;
+            transform: translateX(10px);
+        }''',
+    'form': BASE_CSS % 600 + '''
+        .form-group {
+            margin-bottom: 20px;
+        }
+        .form-control {
+            border-radius: 5px;
+            border: 1px solid #ddd;
+            padding: 10px;
+        }
+        .btn-primary {
+            width: 100%;
+            padding: 12px;
+            background: #3498db;
+            border: none;
+            border-radius: 5px;
+            color: white;
+            font-size: 16px;
+            cursor: pointer;
+            transition: background 0.3s ease;
+        }
+        .btn-primary:hover {
+            background: #2980b9;
+        }
+        .back-link {
+            display: block;
+            text-align: center;
+        }''',
+    'message': BASE_CSS % 800 + '''
+        .error-message {
+            color: #dc3545;
+            padding: 20px;
+            background: #f8d7da;
+            border-radius: 5px;
+            margin-bottom: 20px;
+        }
+        .alert-success {
+            padding: 20px;
+            background: #d4edda;
+            border-radius: 5px;
+            margin-bottom: 20px;
+            color: #155724;
+        }''',
+}
+
+# Closes <title> and opens the container, per page kind
+LAYOUT_STYLE = {kind: ('''</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+    <style>''' + css + '''
+    </style>
+</head>
+<body>
+    <div class="container">
+''').encode() for kind, css in PAGE_CSS.items()}
+
+LAYOUT_TAIL = b'''
+        <a href="/" class="back-link">Back to Home</a>
+    </div>
+</body>
+</html>
+'''
+
+LIST_OPEN = b'\n        <ul class="list-group">\n'
+LIST_CLOSE = b'        </ul>\n'
+
+
+def page(kind: str, title: str, *body: bytes) -> bytes:
+    return b''.join((LAYOUT_HEAD, escape(title).encode(), LAYOUT_STYLE[kind]) + body + (LAYOUT_TAIL,))
+
+
+def list_item(line: str) -> bytes:
+    return f'            <li class="list-group-item">{escape(line)}</li>\n'.encode()
+
+
+def render_list_page(title: str, lines: list, footer: str = '') -> bytes:
+    """
+    A listing page: one escaped <li> per DBMS_OUTPUT line. footer is trusted HTML.
+    """
+    with metrics.timer('reg_stage_seconds', stage='render'):
+        heading = f'        <h2>{escape(title)}</h2>'.encode()
+        return page('list', title, heading, LIST_OPEN, *map(list_item, lines), LIST_CLOSE, footer.encode())
+
+
+def render_dashboard_page(title: str, sections: list) -> bytes:
+    """
+    Several listings on one page, one (heading, lines, footer) per section. footer is trusted HTML.
+    """
+    with metrics.timer('reg_stage_seconds', stage='render'):
+        body = []
+        for heading, lines, footer in sections:
+            body += [f'        <h2>{escape(heading)}</h2>'.encode(), LIST_OPEN, *map(list_item, lines),
+                     LIST_CLOSE, footer.encode()]
+        return page('list', title, *body)
+
+
+def iter_list_page(title: str, lines, footer: str = ''):
+    """
+    render_list_page() as a generator, for streaming a listing while it is still being read.
+    """
+    yield b''.join((LAYOUT_HEAD, escape(title).encode(), LAYOUT_STYLE['list'],
+                    f'        <h2>{escape(title)}</h2>'.encode(), LIST_OPEN))
+    for line in lines:
+        yield list_item(line)
+    yield LIST_CLOSE + footer.encode() + LAYOUT_TAIL
+
+
+def render_message_page(title: str, message: str, css_class: str = 'error-message') -> bytes:
+    body = escape(message).replace('\n', '<br>')
+    return page('message', title, f'        <div class="{css_class}">\n            {body}\n        </div>'.encode())
+
+
+# ----- Static pages: the home menu and the forms never change while the server runs -----
+MENU = [
+    ('/dashboard', 'Dashboard'),
+    ('/students', 'Show All Students'),
+    ('/enroll', 'Enroll Graduate Student'),
+    ('/drop', 'Drop Graduate Student'),
+    ('/class', 'List Students in Class'),
+    ('/prereqs', 'List Course Prerequisites'),
+    ('/courses', 'Show All Courses'),
+    ('/classes', 'Show All Classes'),
+    ('/enrollments', 'Show All Enrollments'),
+    ('/logs', 'Show Logs'),
+    ('/delete', 'Delete Student'),
+    ('/batch', 'Batch Enroll / Drop'),
+    ('/search', 'Search Students and Classes'),
+]
+
+
+def form_field(name: str, label: str, kind: str = 'text', extra: str = 'required') -> str:
+    return f'''
+            <div class="form-group">
+                <label for="{name}">{label}</label>
+                <input type="{kind}" class="form-control" id="{name}" name="{name}" {extra}>
+            </div>'''
+
+
+FORMS = {
+    '/enroll': ('Enroll Graduate Student', form_field('bnum', 'Student B#:') + form_field('classid', 'Class ID:')),
+    '/drop': ('Drop Graduate Student', form_field('bnum', 'Student B#:') + form_field('classid', 'Class ID:')),
+    '/class': ('List Students in Class', form_field('classid', 'Class ID:')),
+    '/delete': ('Delete Student', form_field('bnum', 'Student B# to Delete:') + '''
+            <div class="alert alert-warning">
+                Warning: This action cannot be undone. Please make sure you have the correct student B#.
+            </div>'''),
+    '/prereqs': ('List Course Prerequisites',
+                 form_field('dept', 'Department code:') + form_field('course', 'Course#:', 'number')),
+    '/batch': ('Batch Enroll / Drop', '''
+            <div class="form-group">
+                <label for="csv">Requests, one per line as op,B#,classid (op is enroll or drop):</label>
+                <textarea class="form-control" id="csv" name="csv" rows="12" required
+                          placeholder="enroll,B001,c0001&#10;drop,B002,c0003"></textarea>
+            </div>''' + form_field('commit_every', 'Commit every N requests (0 = once per batch):',
+                                   'number', 'value="0" min="0"')),
+}
+
+
+def render_home_page() -> bytes:
+    items = ''.join(f'\n            <li><a href="{href}">{label}</a></li>' for href, label in MENU)
+    return page('menu', 'Student Management System',
+                f'        <h1>Student Management System</h1>\n        <ul class="menu-list">{items}\n        </ul>'.encode())
+
+
+def render_form_page(title: str, fields: str) -> bytes:
+    return page('form', title, f'''        <h2>{escape(title)}</h2>
+        <form method="POST">{fields}
+            <button type="submit" class="btn btn-primary">Submit</button>
+        </form>'''.encode())
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """
+    Content codings named in an Accept-Encoding header, minus those refused with q=0.
+    """
+    accepted = set()
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if coding and not (q.startswith('q=') and q[2:].strip('0.') == ''):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def variant_etag(etag: str, coding: str) -> str:
+    # Each content coding is a different representation, so it gets its own strong ETag.
+    return etag if coding == 'identity' else f'{etag[:-1]}-{coding}"'
+
+
+def etag_base(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    for coding in ('gzip', 'br'):
+        if tag.endswith(f'-{coding}"'):
+            return tag[:-len(coding) - 2] + '"'
+    return tag
+
+
+class StaticPage:
+    """
+    A fixed response body kept pre-encoded, with gzip (and brotli, if installed) variants,
+    its ETag and the Last-Modified time of the server start that built it.
+    """
+    def __init__(self, body: bytes, content_type: str = 'text/html; charset=utf-8'):
+        self.content_type = content_type
+        self.variants = {'identity': body, 'gzip': gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body)
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """
+        Pick the smallest variant the client accepts.
+        """
+        accepted = accepted_encodings(accept_encoding)
+        best = 'identity'
+        for coding in ('br', 'gzip'):
+            if coding in self.variants and (coding in accepted or '*' in accepted) \
+                    and len(self.variants[coding]) < len(self.variants[best]):
+                best = coding
+        return best
+
+
+STATIC_PAGES = {'/': StaticPage(render_home_page())}
+STATIC_PAGES.update((path, StaticPage(render_form_page(title, fields))) for path, (title, fields) in FORMS.items())
+
 # ===== CLI Interface =====
+def cli_paged(proc_name: str, cursor_prompt: str, cursor_parts: int = 1, filters: tuple = ()):
+    """
+    Print a keyset-paginated listing one page at a time.
+    """
+    limit = page_size(input(f"Page size [{PAGE_SIZE}]: ").strip())
+    cursor = input(f"{cursor_prompt} (blank for first page): ").strip()
+    while True:
+        args = cursor.split(',', cursor_parts - 1)
+        args += [''] * (cursor_parts - len(args))
+        lines, cursor = list_page(proc_name, *args, limit=limit, filters=filters)
+        print("\n".join(lines))
+        if not cursor:
+            break
+        if input(f"-- next cursor: {cursor}  (Enter for next page, q to stop) ").strip().lower() == 'q':
+            break
+
+def run_batch_cli(argv: list):
+    parser = argparse.ArgumentParser(prog='web_interface.py batch',
+                                     description='Run enroll/drop requests from a CSV (op,B#,classid) or JSON file.')
+    parser.add_argument('file')
+    parser.add_argument('--commit-every', type=int, default=0,
+                        help='commit after every N requests (0 = once per batch call)')
+    opts = parser.parse_args(argv)
+    with open(opts.file, encoding='utf-8') as f:
+        text = f.read()
+    requests = parse_batch_json(json.loads(text)) if opts.file.endswith('.json') else parse_batch_csv(text)
+    results = run_batch(requests, opts.commit_every)
+    for r in results:
+        print(f"{r['row']:>5}  {'OK  ' if r['ok'] else 'FAIL'}  {r['op']:<6} {r['bnum']:<8} {r['classid']:<8} {r['message']}")
+    ok = sum(r['ok'] for r in results)
+    print(f"{ok} succeeded, {len(results) - ok} failed.")
+
+def run_archive_cli(argv: list):
+    parser = argparse.ArgumentParser(prog='web_interface.py archive-logs',
+                                     description='Move logs older than the retention window into logs_archive.')
+    parser.add_argument('--keep-months', type=int, default=6,
+                        help='whole months of logs to keep in the logs table')
+    opts = parser.parse_args(argv)
+    print(call_procedure('archive_logs', opts.keep_months))
+
+def run_set_term_cli(argv: list):
+    parser = argparse.ArgumentParser(prog='web_interface.py set-term',
+                                     description='Set the term enroll and drop treat as current.')
+    parser.add_argument('year', type=int)
+    parser.add_argument('semester', help='e.g. Spring, Fall')
+    opts = parser.parse_args(argv)
+    print(call_procedure('set_current_term', opts.year, opts.semester))
+
 def run_cli():
     menu = [
         "\n===== Main Menu =====",
@@ -83,6 +1932,10 @@ def run_cli():
         "5. Show all courses",
         "6. Show all classes",
         "7. Delete student",
+        "8. Show all enrollments",
+        "9. Show logs",
+        "10. Batch enroll/drop from a CSV file",
+        "11. List prerequisites of a course",
         "0. Exit"
     ]
     while True:
@@ -92,7 +1945,7 @@ def run_cli():
             print("Exiting.")
             break
         elif choice == '1':
-            print(run_sqlplus("SET SERVEROUTPUT ON\nEXEC reg_pkg.show_students;\nEXIT;"))
+            cli_paged('show_students_page', "Start after B#")
         elif choice == '2':
             b = input("Enter student B#: ").strip()
             c = input("Enter class ID: ").strip()
@@ -107,374 +1960,326 @@ def run_cli():
             cid = input("Enter class ID: ").strip()
             print(call_procedure('list_students_in_class', cid))
         elif choice == '5':
-            print(run_sqlplus("SET SERVEROUTPUT ON\nEXEC reg_pkg.show_courses;\nEXIT;"))
+            print(call_procedure('show_courses'))
         elif choice == '6':
-            print(run_sqlplus("SET SERVEROUTPUT ON\nEXEC reg_pkg.show_classes;\nEXIT;"))
+            print(call_procedure('show_classes'))
         elif choice == '7':
             b = input("Enter student B# to delete: ").strip()
             out = call_procedure('delete_student', b)
             print("Deletion succeeded." if 'ORA-' not in out else f"Deletion failed:\n{out}")
+        elif choice == '8':
+            cli_paged('show_g_enrollments_page', "Start after B#,classid", cursor_parts=2)
+        elif choice == '9':
+            try:
+                span = tuple(parse_log_time(input(f"{label} (YYYY-MM-DD[ HH:MM], blank for none): "))
+                             for label in ("From time", "Before time"))
+            except ValueError as e:
+                print(e)
+                continue
+            cli_paged('show_logs_page', "Start before log#", filters=span if any(span) else ())
+        elif choice == '10':
+            path = input("CSV file (op,B#,classid per line): ").strip()
+            commit_every = input("Commit every N requests [0 = once per batch]: ").strip() or '0'
+            try:
+                run_batch_cli([path, '--commit-every', commit_every])
+            except (OSError, ValueError, SystemExit) as e:
+                print(f"Batch failed: {e}")
+        elif choice == '11':
+            dept = input("Enter department code: ").strip()
+            course = input("Enter course#: ").strip()
+            print(call_procedure('list_prerequisites', dept, course) or "No prerequisites.")
         else:
             print("Invalid selection, please try again.")
 
 # ===== Web Interface =====
+# Routes reported by name in metrics; anything else is counted as 'other' to bound label values.
+ROUTES = {
+    '/', '/dashboard', '/students', '/courses', '/classes', '/enrollments', '/logs', '/stats', '/metrics',
+    '/enroll', '/drop', '/class', '/delete', '/batch', '/prereqs',
+    '/api/students', '/api/courses', '/api/classes', '/api/prerequisites', '/api/enrollments',
+    '/api/logs', '/api/batch', '/predict', '/search', '/api/search',
+}
+ROUTE_PATTERNS = [
+    (re.compile(r'^/api/classes/[^/]+/students$'), '/api/classes/{classid}/students'),
+    (re.compile(r'^/api/courses/[^/]+/[^/]+/prerequisites$'), '/api/courses/{dept}/{course}/prerequisites'),
+]
+
+
+def route_label(path: str) -> str:
+    if path in ROUTES:
+        return path
+    for pattern, label in ROUTE_PATTERNS:
+        if pattern.match(path):
+            return label
+    return 'other'
+
+
+def instrumented(handler):
+    """
+    Wrap a do_* method with the per-route request metrics and the slow-request log.
+    """
+    @wraps(handler)
+    def wrapper(self):
+        route = route_label(self.path.split('?')[0])
+        self.status = None
+        metrics.inc('reg_http_requests_in_flight', 1)
+        start = time.perf_counter()
+        try:
+            return handler(self)
+        except Exception:
+            self.status = self.status or 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.inc('reg_http_requests_in_flight', -1)
+            metrics.observe('reg_http_request_seconds', elapsed, route=route, method=self.command)
+            metrics.inc('reg_http_requests_total', route=route, method=self.command, status=str(self.status))
+            slow_log('request', elapsed, SLOW_REQUEST_MS, f"{self.command} {self.path} {self.status}")
+    return wrapper
+
+
 class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive, so every response must carry Content-Length.
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle on, the body waits for the client's
+    # delayed ACK of the headers (~40 ms) on every kept-alive response.
+    disable_nagle_algorithm = True
+    timeout = KEEPALIVE_TIMEOUT
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.next_request_ready():
+            self.handle_one_request()
+
+    def next_request_ready(self) -> bool:
+        """
+        Wait for the next request on a kept-alive connection. Gives up (and the connection is
+        closed) after KEEPALIVE_TIMEOUT, or as soon as another connection is queued for a
+        worker: an idle client must not hold a worker that a waiting one could use.
+        """
+        # A pipelined request may already sit in rfile's buffer, where the selector cannot see it
+        self.connection.setblocking(False)
+        try:
+            if self.rfile.peek(1):
+                return True
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+        deadline = time.monotonic() + self.timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.connection, selectors.EVENT_READ)
+            while not selector.select(KEEPALIVE_POLL):
+                if getattr(self.server, 'queued', 0) or time.monotonic() >= deadline:
+                    return False
+        return True
+
+    @instrumented
     def do_GET(self):
         path = self.path.split('?')[0]
-        if path == '/':
-            self.send_html(
-                '''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>Student Management System</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body {
-                            background-color: #f8f9fa;
-                            padding: 20px;
-                        }
-                        .container {
-                            max-width: 800px;
-                            margin: 0 auto;
-                            background: white;
-                            padding: 30px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                        }
-                        h1 {
-                            color: #2c3e50;
-                            text-align: center;
-                            margin-bottom: 30px;
-                        }
-                        .menu-list {
-                            list-style: none;
-                            padding: 0;
-                        }
-                        .menu-list li {
-                            margin: 10px 0;
-                        }
-                        .menu-list a {
-                            display: block;
-                            padding: 15px;
-                            background: #3498db;
-                            color: white;
-                            text-decoration: none;
-                            border-radius: 5px;
-                            transition: all 0.3s ease;
-                        }
-                        .menu-list a:hover {
-                            background: #2980b9;
-                            transform: translateX(10px);
-                        }
-                        .back-link {
-                            display: inline-block;
-                            margin-top: 20px;
-                            color: #3498db;
-                            text-decoration: none;
-                        }
-                        .back-link:hover {
-                            color: #2980b9;
-                        }
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h1>Student Management System</h1>
-                        <ul class="menu-list">
-                            <li><a href="/students">Show All Students</a></li>
-                            <li><a href="/enroll">Enroll Graduate Student</a></li>
-                            <li><a href="/drop">Drop Graduate Student</a></li>
-                            <li><a href="/class">List Students in Class</a></li>
-                            <li><a href="/courses">Show All Courses</a></li>
-                            <li><a href="/classes">Show All Classes</a></li>
-                            <li><a href="/delete">Delete Student</a></li>
-                        </ul>
-                    </div>
-                </body>
-                </html>
-                '''
-            )
+        if path.startswith('/api/'):
+            try:
+                self.do_api(path)
+            except ValueError as e:
+                self.send_json({'error': str(e)}, status=400)
+        elif path in STATIC_PAGES:
+            self.send_static(STATIC_PAGES[path])
         elif path == '/students':
-            content = run_sqlplus("SET SERVEROUTPUT ON\nEXEC reg_pkg.show_students;\nEXIT;" )
-            items = ''.join(f'<li class="list-group-item">{line}</li>' for line in content.splitlines())
-            self.send_html(
-                f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>All Students</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body {{
-                            background-color: #f8f9fa;
-                            padding: 20px;
-                        }}
-                        .container {{
-                            max-width: 800px;
-                            margin: 0 auto;
-                            background: white;
-                            padding: 30px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                        }}
-                        h2 {{
-                            color: #2c3e50;
-                            text-align: center;
-                            margin-bottom: 30px;
-                        }}
-                        .list-group {{
-                            margin-bottom: 20px;
-                        }}
-                        .back-link {{
-                            display: inline-block;
-                            margin-top: 20px;
-                            color: #3498db;
-                            text-decoration: none;
-                        }}
-                        .back-link:hover {{
-                            color: #2980b9;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h2>All Students</h2>
-                        <ul class="list-group">
-                            {items}
-                        </ul>
-                        <a href="/" class="back-link">Back to Home</a>
-                    </div>
-                </body>
-                </html>
-                '''
-            )
+            query = parse_qs(self.path.partition('?')[2])
+            limit = page_size(query.get('limit', [''])[0])
+            lines, next_cursor = list_page('show_students_page', query.get('after', [''])[0], limit=limit)
+            self.send_html(render_list_page('All Students', lines, pager_link('/students', next_cursor, limit)))
+        elif path == '/dashboard':
+            # Three listings, one database round trip (or none, when all three are cached)
+            summary, students, logs = call_procedures(('show_summary', ()),
+                                                      ('show_students_page', ('', DASHBOARD_ROWS)),
+                                                      ('show_logs_page', ('', DASHBOARD_ROWS)))
+            self.send_html(render_dashboard_page('Dashboard', [
+                ('Summary', summary.splitlines(), ''),
+                ('Students', split_page(students)[0], '        <a href="/students" class="btn btn-outline-primary">All students</a>\n'),
+                ('Latest Log Records', split_page(logs)[0], '        <a href="/logs" class="btn btn-outline-primary">All logs</a>\n'),
+            ]))
         elif path == '/courses':
-            content = run_sqlplus("SET SERVEROUTPUT ON\nEXEC reg_pkg.show_courses;\nEXIT;" )
-            items = ''.join(f'<li class="list-group-item">{line}</li>' for line in content.splitlines())
-            self.send_html(
-                f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>All Courses</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body {{
-                            background-color: #f8f9fa;
-                            padding: 20px;
-                        }}
-                        .container {{
-                            max-width: 800px;
-                            margin: 0 auto;
-                            background: white;
-                            padding: 30px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                        }}
-                        h2 {{
-                            color: #2c3e50;
-                            text-align: center;
-                            margin-bottom: 30px;
-                        }}
-                        .list-group {{
-                            margin-bottom: 20px;
-                        }}
-                        .back-link {{
-                            display: inline-block;
-                            margin-top: 20px;
-                            color: #3498db;
-                            text-decoration: none;
-                        }}
-                        .back-link:hover {{
-                            color: #2980b9;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h2>All Courses</h2>
-                        <ul class="list-group">
-                            {items}
-                        </ul>
-                        <a href="/" class="back-link">Back to Home</a>
-                    </div>
-                </body>
-                </html>
-                '''
-            )
+            self.send_html(render_list_page('All Courses', call_procedure('show_courses').splitlines()))
         elif path == '/classes':
-            content = run_sqlplus("SET SERVEROUTPUT ON\nEXEC reg_pkg.show_classes;\nEXIT;" )
-            items = ''.join(f'<li class="list-group-item">{line}</li>' for line in content.splitlines())
-            self.send_html(
-                f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>All Classes</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body {{
-                            background-color: #f8f9fa;
-                            padding: 20px;
-                        }}
-                        .container {{
-                            max-width: 800px;
-                            margin: 0 auto;
-                            background: white;
-                            padding: 30px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                        }}
-                        h2 {{
-                            color: #2c3e50;
-                            text-align: center;
-                            margin-bottom: 30px;
-                        }}
-                        .list-group {{
-                            margin-bottom: 20px;
-                        }}
-                        .back-link {{
-                            display: inline-block;
-                            margin-top: 20px;
-                            color: #3498db;
-                            text-decoration: none;
-                        }}
-                        .back-link:hover {{
-                            color: #2980b9;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h2>All Classes</h2>
-                        <ul class="list-group">
-                            {items}
-                        </ul>
-                        <a href="/" class="back-link">Back to Home</a>
-                    </div>
-                </body>
-                </html>
-                '''
-            )
-        elif path in ['/enroll','/drop','/class','/delete']:
-            label = {'/enroll':'Enroll Graduate Student','/drop':'Drop Graduate Student','/class':'List Students in Class','/delete':'Delete Student'}[path]
-            form = (
-                f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>{label}</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body {{
-                            background-color: #f8f9fa;
-                            padding: 20px;
-                        }}
-                        .container {{
-                            max-width: 600px;
-                            margin: 0 auto;
-                            background: white;
-                            padding: 30px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                        }}
-                        h2 {{
-                            color: #2c3e50;
-                            text-align: center;
-                            margin-bottom: 30px;
-                        }}
-                        .form-group {{
-                            margin-bottom: 20px;
-                        }}
-                        .form-control {{
-                            border-radius: 5px;
-                            border: 1px solid #ddd;
-                            padding: 10px;
-                        }}
-                        .btn-primary {{
-                            width: 100%;
-                            padding: 12px;
-                            background: #3498db;
-                            border: none;
-                            border-radius: 5px;
-                            color: white;
-                            font-size: 16px;
-                            cursor: pointer;
-                            transition: background 0.3s ease;
-                        }}
-                        .btn-primary:hover {{
-                            background: #2980b9;
-                        }}
-                        .back-link {{
-                            display: block;
-                            text-align: center;
-                            margin-top: 20px;
-                            color: #3498db;
-                            text-decoration: none;
-                        }}
-                        .back-link:hover {{
-                            color: #2980b9;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h2>{label}</h2>
-                        <form method="POST">
-                '''
-            )
-            if path in ['/enroll','/drop','/class']:
-                form += '''
-                            <div class="form-group">
-                                <label for="bnum">Student B#:</label>
-                                <input type="text" class="form-control" id="bnum" name="bnum" required>
-                            </div>
-                '''
-            if path in ['/enroll','/drop','/class']:
-                form += '''
-                            <div class="form-group">
-                                <label for="classid">Class ID:</label>
-                                <input type="text" class="form-control" id="classid" name="classid" required>
-                            </div>
-                '''
-            if path == '/delete':
-                form += '''
-                            <div class="form-group">
-                                <label for="bnum">Student B# to Delete:</label>
-                                <input type="text" class="form-control" id="bnum" name="bnum" required>
-                            </div>
-                            <div class="alert alert-warning">
-                                Warning: This action cannot be undone. Please make sure you have the correct student B#.
-                            </div>
-                '''
-            form += '''
-                            <button type="submit" class="btn btn-primary">Submit</button>
-                        </form>
-                        <a href="/" class="back-link">Back to Home</a>
-                    </div>
-                </body>
-                </html>
-                '''
-            self.send_html(form)
+            self.send_html(render_list_page('All Classes', call_procedure('show_classes').splitlines()))
+        elif path in ('/enrollments', '/logs') and 'all=1' in self.path.partition('?')[2].split('&'):
+            proc, title = {'/enrollments': ('show_g_enrollments', 'All Enrollments'),
+                           '/logs': ('show_logs', 'Logs')}[path]
+            args = ()
+            if path == '/logs':
+                # show_logs reads only the recent months unless given a range (which includes the archive)
+                query = parse_qs(self.path.partition('?')[2])
+                try:
+                    span = tuple(parse_log_time(query.get(k, [''])[0]) for k in ('from', 'to'))
+                except ValueError as e:
+                    self.send_html(render_message_page('Invalid Time Range', str(e)))
+                    return
+                if any(span):
+                    args = span
+                else:
+                    title = f'Recent Logs (since {recent_log_cutoff()[:10]})'
+            self.send_chunked('text/html; charset=utf-8', iter_list_page(title, stream_procedure(proc, *args)))
+        elif path == '/enrollments':
+            query = parse_qs(self.path.partition('?')[2])
+            limit = page_size(query.get('limit', [''])[0])
+            after_b, _, after_classid = query.get('after', [''])[0].partition(',')
+            lines, next_cursor = list_page('show_g_enrollments_page', after_b, after_classid, limit=limit)
+            self.send_html(render_list_page('All Enrollments', lines, pager_link('/enrollments', next_cursor, limit)))
+        elif path == '/logs':
+            query = parse_qs(self.path.partition('?')[2])
+            limit = page_size(query.get('limit', [''])[0])
+            try:
+                span = tuple(parse_log_time(query.get(k, [''])[0]) for k in ('from', 'to'))
+            except ValueError as e:
+                self.send_html(render_message_page('Invalid Time Range', str(e)))
+                return
+            lines, next_cursor = list_page('show_logs_page', query.get('before', [''])[0], limit=limit,
+                                           filters=span if any(span) else ())
+            extra = {k: v for k, v in zip(('from', 'to'), span) if v}
+            self.send_html(render_list_page('Logs', lines, log_filter_form(*span) +
+                                            pager_link('/logs', next_cursor, limit, 'before', extra)))
+        elif path == '/metrics':
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == '/search':
+            query = parse_qs(self.path.partition('?')[2])
+            q = query.get('q', [''])[0]
+            index = get_search_index()
+            if index is None:
+                self.send_html(render_message_page('Error Message', 'Error: Search is not available.'))
+                return
+            limit = page_size(query.get('limit', [str(SEARCH_LIMIT)])[0])
+            lines = [search_line(r) for r in index.search(q, limit)]
+            self.send_html(render_list_page('Search', lines or ([f'No matches for {q}.'] if q.strip() else []),
+                                            search_form(q)))
+        elif path == '/predict':
+            try:
+                meta = get_predictor().predictor.meta
+            except PredictUnavailable as e:
+                self.send_json({'error': str(e)}, status=503)
+                return
+            self.send_json({'columns': meta['columns'], 'features': meta['features'], 'quantized': meta['quantized']})
+        elif path == '/stats':
+            self.send_json({'cache': listing_cache.stats(),
+                            'pool': _pool.stats() if _pool is not None else None})
         else:
             self.send_error(404)
 
+    def do_api(self, path: str):
+        parts = path.strip('/').split('/')[1:]
+        query = parse_qs(self.path.partition('?')[2])
+        limit = page_size(query.get('limit', [''])[0])
+        after = query.get('after', [''])[0] or None
+        if parts == ['logs']:
+            try:
+                span = {k + '_time': parse_log_time(query.get(k, [''])[0]) for k in ('from', 'to')}
+            except ValueError as e:
+                self.send_json({'error': str(e)}, status=400)
+                return
+        if parts in (['enrollments'], ['logs']) and query.get('all') == ['1']:
+            if parts == ['logs'] and not any(span.values()):
+                span['from_time'] = recent_log_cutoff()   # same window as show_logs
+            sql, params = api_sql(parts[0], span if parts == ['logs'] else {})
+            self.send_chunked('application/json', iter_json_rows(get_backend().iter_query(sql, params)))
+        elif parts == ['students']:
+            self.send_json_text(api_listing('students', limit, after=after))
+        elif parts == ['search']:
+            index = get_search_index()
+            if index is None:
+                self.send_json({'error': 'Search is not available'}, status=503)
+                return
+            rows = index.search(query.get('q', [''])[0], page_size(query.get('limit', [str(SEARCH_LIMIT)])[0]))
+            self.send_json({'rows': rows, 'count': len(rows)})
+        elif parts == ['enrollments']:
+            after_b, _, after_classid = (after or '').partition(',')
+            self.send_json_text(api_listing('enrollments', limit, after_b=after_b or None,
+                                            after_classid=after_classid or None))
+        elif parts == ['logs']:
+            before = query.get('before', [''])[0]
+            if before and not before.isdigit():
+                self.send_json({'error': 'before must be a log#'}, status=400)
+                return
+            self.send_json_text(api_listing('logs', limit, before=int(before) if before else None, **span))
+        elif len(parts) == 1 and parts[0] in ('courses', 'classes', 'prerequisites'):
+            self.send_json_text(api_listing(parts[0]))
+        elif len(parts) == 4 and parts[0] == 'courses' and parts[3] == 'prerequisites':
+            dept = unquote(parts[1])
+            if not parts[2].isdigit() or not course_exists(dept, int(parts[2])):
+                self.send_json({'error': 'dept_code || course# does not exist.'}, status=404)
+            else:
+                self.send_json_text(api_listing('course_prerequisites', dept=dept, course=int(parts[2])))
+        elif len(parts) == 3 and parts[0] == 'classes' and parts[2] == 'students':
+            classid = unquote(parts[1])
+            if not class_exists(classid):
+                self.send_json({'error': 'The classid is invalid.'}, status=404)
+            else:
+                self.send_json_text(api_listing('roster', classid=classid))
+        else:
+            self.send_json({'error': 'Not found'}, status=404)
+
+    @instrumented
     def do_POST(self):
         length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(length).decode()
+        try:
+            body = self.rfile.read(length).decode()
+        except UnicodeDecodeError:
+            self.send_json({'error': 'The request body is not UTF-8'}, status=400)
+            return
         params = parse_qs(body)
-        path = self.path
+        path = self.path.split('?')[0]
+        if path == '/predict':
+            try:
+                data = json.loads(body)
+                self.send_json({'predictions': predict(data.get('instances') if isinstance(data, dict) else None)})
+            except PredictUnavailable as e:
+                self.send_json({'error': str(e)}, status=503)
+            except (TimeoutError, FutureTimeoutError):   # the same class from Python 3.11 on
+                self.send_json({'error': f'No prediction within {PREDICT_TIMEOUT:g} s'}, status=504)
+            except ValueError as e:
+                self.send_json({'error': str(e)}, status=400)
+        elif path == '/api/batch':
+            query = parse_qs(self.path.partition('?')[2])
+            try:
+                if 'json' in self.headers.get('Content-Type', ''):
+                    requests = parse_batch_json(json.loads(body))
+                else:
+                    requests = parse_batch_csv(body)
+                commit_every = int(query.get('commit_every', ['0'])[0])
+            except ValueError as e:
+                self.send_json({'error': str(e)}, status=400)
+                return
+            results = run_batch(requests, commit_every)
+            ok = sum(r['ok'] for r in results)
+            self.send_json({'results': results, 'succeeded': ok, 'failed': len(results) - ok})
+        elif path == '/batch':
+            try:
+                requests = parse_batch_csv(params.get('csv', [''])[0])
+                commit_every = int(params.get('commit_every', ['0'])[0] or 0)
+            except ValueError as e:
+                self.redirect(f"ORA-20000: {e}")
+                return
+            results = run_batch(requests, commit_every)
+            lines = [f"{r['row']}. {r['op']} {r['bnum']} {r['classid']}: {r['message']}" for r in results]
+            ok = sum(r['ok'] for r in results)
+            self.send_html(render_list_page('Batch Results', lines, f'<p>{ok} succeeded, {len(results) - ok} failed.</p>'))
+        else:
+            try:
+                self.post_form(path, params)
+            except ValueError as e:
+                # bind_variables() refuses values with line breaks
+                self.redirect(f"ORA-20000: {e}")
+
+    def post_form(self, path: str, params: dict):
         if path == '/enroll':
             b = params.get('bnum', [''])[0]
             c = params.get('classid', [''])[0]
@@ -485,249 +2290,256 @@ class Handler(BaseHTTPRequestHandler):
             c = params.get('classid', [''])[0]
             out = call_procedure('drop_grad_student', b, c)
             self.redirect(out)
+        elif path == '/prereqs':
+            dept = params.get('dept', [''])[0].strip()
+            course = params.get('course', [''])[0].strip()
+            lines = call_procedure('list_prerequisites', dept, course).splitlines()
+            self.send_html(render_list_page(f'Prerequisites of {dept}{course}', lines or ['No prerequisites.']))
         elif path == '/class':
             cid = params.get('classid', [''])[0]
-            content = call_procedure('list_students_in_class', cid)
-            items = ''.join(f'<li class="list-group-item">{line}</li>' for line in content.splitlines())
-            self.send_html(
-                f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>Class Students List</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body {{
-                            background-color: #f8f9fa;
-                            padding: 20px;
-                        }}
-                        .container {{
-                            max-width: 800px;
-                            margin: 0 auto;
-                            background: white;
-                            padding: 30px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                        }}
-                        h2 {{
-                            color: #2c3e50;
-                            text-align: center;
-                            margin-bottom: 30px;
-                        }}
-                        .list-group {{
-                            margin-bottom: 20px;
-                        }}
-                        .back-link {{
-                            display: inline-block;
-                            margin-top: 20px;
-                            color: #3498db;
-                            text-decoration: none;
-                        }}
-                        .back-link:hover {{
-                            color: #2980b9;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h2>Students in Class {cid}</h2>
-                        <ul class="list-group">
-                            {items}
-                        </ul>
-                        <a href="/" class="back-link">Back to Home</a>
-                    </div>
-                </body>
-                </html>
-                '''
-            )
+            lines = call_procedure('list_students_in_class', cid).splitlines()
+            self.send_html(render_list_page(f'Students in Class {cid}', lines))
         elif path == '/delete':
             b = params.get('bnum', [''])[0]
-            if not check_student_exists(b):
-                self.send_html(
-                    f'''
-                    <!DOCTYPE html>
-                    <html>
-                    <head>
-                        <meta charset="UTF-8">
-                        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                        <title>Error Message</title>
-                        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                        <style>
-                            body {{
-                                background-color: #f8f9fa;
-                                padding: 20px;
-                            }}
-                            .container {{
-                                max-width: 600px;
-                                margin: 0 auto;
-                                background: white;
-                                padding: 30px;
-                                border-radius: 10px;
-                                box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                            }}
-                            .error-message {{
-                                color: #dc3545;
-                                padding: 20px;
-                                background: #f8d7da;
-                                border-radius: 5px;
-                                margin-bottom: 20px;
-                            }}
-                            .back-link {{
-                                display: inline-block;
-                                margin-top: 20px;
-                                color: #3498db;
-                                text-decoration: none;
-                            }}
-                            .back-link:hover {{
-                                color: #2980b9;
-                            }}
-                        </style>
-                    </head>
-                    <body>
-                        <div class="container">
-                            <div class="error-message">
-                                Error: Student {b} does not exist.
-                            </div>
-                            <a href="/" class="back-link">Back to Home</a>
-                        </div>
-                    </body>
-                    </html>
-                    '''
-                )
+            # delete_student checks the B# itself, so this is the only round trip
+            out = call_procedure('delete_student', b)
+            index = get_search_index()
+            if index is not None and 'ORA-' not in out:
+                index.remove_student(b)
+            if 'The B# is invalid.' in out:
+                self.send_html(render_message_page('Error Message', f'Error: Student {b} does not exist.'))
+            elif 'ORA-' not in out:
+                self.send_html(render_message_page('Delete Success', f'Student {b} has been successfully deleted.',
+                                                   'alert-success'))
             else:
-                out = call_procedure('delete_student', b)
-                if 'ORA-' not in out:
-                    self.send_html(
-                        f'''
-                        <!DOCTYPE html>
-                        <html>
-                        <head>
-                            <meta charset="UTF-8">
-                            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                            <title>Delete Success</title>
-                            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                            <style>
-                                body {{
-                                    background-color: #f8f9fa;
-                                    padding: 20px;
-                                }}
-                                .container {{
-                                    max-width: 600px;
-                                    margin: 0 auto;
-                                    background: white;
-                                    padding: 30px;
-                                    border-radius: 10px;
-                                    box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                                }}
-                                .alert-success {{
-                                    padding: 20px;
-                                    background: #d4edda;
-                                    border-radius: 5px;
-                                    margin-bottom: 20px;
-                                    color: #155724;
-                                }}
-                                .back-link {{
-                                    display: inline-block;
-                                    margin-top: 20px;
-                                    color: #3498db;
-                                    text-decoration: none;
-                                }}
-                                .back-link:hover {{
-                                    color: #2980b9;
-                                }}
-                            </style>
-                        </head>
-                        <body>
-                            <div class="container">
-                                <div class="alert-success">
-                                    Student {b} has been successfully deleted.
-                                </div>
-                                <a href="/" class="back-link">Back to Home</a>
-                            </div>
-                        </body>
-                        </html>
-                        '''
-                    )
-                else:
-                    self.redirect(out)
+                self.redirect(out)
         else:
             self.send_error(404)
 
-    def send_html(self, html: str):
+    def accepts_gzip(self) -> bool:
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+        return 'gzip' in accepted or '*' in accepted
+
+    def not_modified(self, etag: str, last_modified: str = None) -> bool:
+        """
+        Conditional GET: If-None-Match wins over If-Modified-Since when both are sent.
+        """
+        sent = self.headers.get('If-None-Match')
+        if sent is not None:
+            tags = {etag_base(t) for t in sent.split(',')}
+            return '*' in tags or etag in tags
+        since = self.headers.get('If-Modified-Since')
+        if since and last_modified:
+            try:
+                return parsedate_to_datetime(since) >= parsedate_to_datetime(last_modified)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_body(self, body: bytes, content_type: str, status: int = 200, headers: dict = None,
+                  etag: str = None):
+        """
+        Write a complete response, gzipped when the client accepts it and it is worth it.
+        """
+        coding = 'identity'
+        if len(body) >= GZIP_MIN_BYTES and self.accepts_gzip():
+            body = gzip.compress(body, GZIP_LEVEL)
+            coding = 'gzip'
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if etag:
+            self.send_header('ETag', variant_etag(etag, coding))
+        self.send_header('Vary', 'Accept-Encoding')
+        if coding != 'identity':
+            self.send_header('Content-Encoding', coding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        with metrics.timer('reg_stage_seconds', stage='write'):
+            self.wfile.write(body)
+
+    def send_not_modified(self, headers: dict):
+        self.send_response(304)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def send_html(self, body: bytes):
+        self.send_body(body, 'text/html; charset=utf-8')
+
+    def send_static(self, page: StaticPage):
+        coding = page.negotiate(self.headers.get('Accept-Encoding', ''))
+        headers = {'ETag': variant_etag(page.etag, coding),
+                   'Last-Modified': page.last_modified,
+                   'Cache-Control': f'public, max-age={STATIC_MAX_AGE}',
+                   'Vary': 'Accept-Encoding'}
+        if self.not_modified(page.etag, page.last_modified):
+            self.send_not_modified(headers)
+            return
+        body = page.variants[coding]
         self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-type', page.content_type)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if coding != 'identity':
+            self.send_header('Content-Encoding', coding)
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(html.encode())
+        with metrics.timer('reg_stage_seconds', stage='write'):
+            self.wfile.write(body)
+
+    def send_chunked(self, content_type: str, chunks):
+        """
+        Send a 200 whose body is produced incrementally, using chunked transfer encoding.
+        Small pieces are coalesced up to STREAM_CHUNK_BYTES; the first is sent at once.
+        Chunks may be str or already-encoded bytes.
+        """
+        chunks = (c if isinstance(c, bytes) else c.encode() for c in chunks)
+        if self.request_version != 'HTTP/1.1':
+            self.send_body(b''.join(chunks), content_type)
+            return
+        # gzip as a stream: each coalesced piece is sync-flushed so the client can render it
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if self.accepts_gzip() else None
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Vary', 'Accept-Encoding')
+        if compressor:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write_chunk(data: bytes, final: bool = False):
+            if compressor:
+                data = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+            if data:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+        buf, size, first = [], 0, True
+        try:
+            for data in chunks:
+                buf.append(data)
+                size += len(data)
+                if first or size >= STREAM_CHUNK_BYTES:
+                    write_chunk(b''.join(buf))
+                    buf, size, first = [], 0, False
+        except Exception as e:
+            # Headers are gone already; drop the connection so the client sees a truncated body.
+            self.log_error('stream aborted: %s', e)
+            self.close_connection = True
+            return
+        write_chunk(b''.join(buf), final=True)
+        self.wfile.write(b'0\r\n\r\n')
+
+    def send_json(self, data, status: int = 200):
+        body = json.dumps(data, separators=(',', ':'), default=str).encode()
+        self.send_body(body, 'application/json', status)
+
+    def send_json_text(self, text: str):
+        """
+        Send a JSON listing with a content ETag; a matching If-None-Match gets 304 and no body.
+        """
+        body = text.encode()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        if self.not_modified(etag):
+            coding = 'gzip' if len(body) >= GZIP_MIN_BYTES and self.accepts_gzip() else 'identity'
+            self.send_not_modified({'ETag': variant_etag(etag, coding), 'Cache-Control': 'no-cache',
+                                    'Vary': 'Accept-Encoding'})
+            return
+        self.send_body(body, 'application/json', headers={'Cache-Control': 'no-cache'}, etag=etag)
 
     def redirect(self, result: str):
         if 'ORA-' not in result:
             self.send_response(303)
             self.send_header('Location', '/students')
+            self.send_header('Content-Length', '0')
             self.end_headers()
         else:
-            safe = result.replace('\n', '<br>')
-            self.send_html(
-                f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>Error Message</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body {{
-                            background-color: #f8f9fa;
-                            padding: 20px;
-                        }}
-                        .container {{
-                            max-width: 800px;
-                            margin: 0 auto;
-                            background: white;
-                            padding: 30px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                        }}
-                        .error-message {{
-                            color: #dc3545;
-                            padding: 20px;
-                            background: #f8d7da;
-                            border-radius: 5px;
-                            margin-bottom: 20px;
-                        }}
-                        .back-link {{
-                            display: inline-block;
-                            margin-top: 20px;
-                            color: #3498db;
-                            text-decoration: none;
-                        }}
-                        .back-link:hover {{
-                            color: #2980b9;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="error-message">
-                            {safe}
-                        </div>
-                        <a href="/" class="back-link">Back to Home</a>
-                    </div>
-                </body>
-                </html>
-                '''
-            )
+            self.send_html(render_message_page('Error Message', result))
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that hands accepted connections to a fixed pool of worker threads.
+    At most workers + queue_size connections are held; the rest get an immediate 503. While
+    any are queued, idle kept-alive connections are closed to free their workers.
+    """
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers: int = WEB_WORKERS, queue_size: int = WEB_QUEUE):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='web')
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.queued = 0   # accepted connections no worker has picked up yet; idle keep-alives yield to them
+        self.queued_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            self.reject(request)
+            return
+        with self.queued_lock:
+            self.queued += 1
+        self.executor.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        with self.queued_lock:
+            self.queued -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def reject(self, request):
+        metrics.inc('reg_http_rejected_total')
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\n"
+                            b"Retry-After: 1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_web(argv: list):
+    parser = argparse.ArgumentParser(prog='web_interface.py web')
+    parser.add_argument('--port', type=int, default=WEB_PORT)
+    parser.add_argument('--workers', type=int, default=WEB_WORKERS,
+                        help='request worker threads; keep this at or above the DB pool size')
+    parser.add_argument('--queue', type=int, default=WEB_QUEUE,
+                        help='connections allowed to wait for a worker before new ones get 503')
+    opts = parser.parse_args(argv)
+    server = PooledHTTPServer(('0.0.0.0', opts.port), Handler, opts.workers, opts.queue)
+    index = get_search_index()   # loaded before the first request rather than during it
+    if index is not None:
+        print(f'Search index: {len(index.students)} students, {len(index.classes)} classes')
+    print(f'Serving on http://localhost:{opts.port} with {opts.workers} workers  (Ctrl+C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 # ===== Entry point =====
 if __name__ == '__main__':
     # Web mode
     if len(sys.argv) > 1 and sys.argv[1] == 'web':
-        PORT = 8000
-        server = HTTPServer(('0.0.0.0', PORT), Handler)
-        print(f'Serving on http://localhost:{PORT}  (Ctrl+C to stop)')
-        server.serve_forever()
+        run_web(sys.argv[2:])
+    # Batch mode
+    elif len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        run_batch_cli(sys.argv[2:])
+    # Log retention (the LOGS_ARCHIVE job runs this on Oracle)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'archive-logs':
+        run_archive_cli(sys.argv[2:])
+    # Start of a new term
+    elif len(sys.argv) > 1 and sys.argv[1] == 'set-term':
+        run_set_term_cli(sys.argv[2:])
     # CLI mode
     else:
         run_cli()